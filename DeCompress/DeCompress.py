@@ -2,17 +2,33 @@ import sys
 import os
 import time
 import gc
+import heapq
+import itertools
 import threading
+import hashlib
+import json
+import sqlite3
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
 # Standard library modules for various archive types
 import zipfile
 import tarfile
 import shutil
+import gzip
+import bz2
+import lzma
 
 # Third-party libraries for rar and 7z
 import rarfile          # pip install rarfile (requires unrar or rar in PATH)
 import py7zr            # pip install py7zr
+import py7zr.callbacks
+
+try:
+    import zstandard    # pip install zstandard, optional: only needed for .zst files
+except ImportError:
+    zstandard = None
 
 # PyQt5 imports
 from PyQt5 import QtCore, QtGui, QtWidgets
@@ -30,6 +46,29 @@ WATCH_FOLDER = os.path.join(os.path.expanduser("~"), "Downloads")  # Dynamic pat
 GC_INTERVAL = 3600   # Force garbage collection every 1 hour
 FILE_ACCESS_ATTEMPTS = 5
 FILE_ACCESS_DELAY_SEC = 1
+EXTRACT_WORKERS = 2             # Archives extracted at the same time
+EXTRACT_ORDER = 'smallest'      # 'smallest' first, or 'fifo' in arrival order
+PROGRESS_INTERVAL_SEC = 0.25    # Minimum time between progress updates sent to the GUI
+COPY_BUFFER_SIZE = 1024 * 1024  # Reusable per-worker buffer for streaming members to disk
+ZIP_THREADS = min(8, os.cpu_count() or 1)   # Threads inflating members of one zip in parallel
+ZIP_PARALLEL_MIN_BYTES = 16 * 1024 * 1024   # Smaller zips are extracted on the calling thread
+NESTED_EXTRACTION = False       # Also extract archives found inside extracted archives
+NESTED_MAX_DEPTH = 3            # Levels below the downloaded archive
+NESTED_MAX_TOTAL_BYTES = 16 * 1024**3   # Extracted bytes per download, across all nested levels
+MIN_FREE_SPACE_BYTES = 1024**3  # Extraction stops before leaving less than this free on the disk
+MAX_COMPRESSION_RATIO = 200     # Uncompressed:compressed above this is treated as a zip bomb ...
+RATIO_CHECK_MIN_BYTES = 256 * 1024 * 1024   # ... once this much would be written
+MAX_ARCHIVE_MEMBERS = 100000
+# Files already looked at and left in place, so restarts do not examine them again
+INDEX_PATH = os.path.join(os.environ.get('LOCALAPPDATA') or os.path.join(os.path.expanduser("~"), ".local", "share"),
+                          "DeCompress", "processed.sqlite3")
+DUPLICATE_ACTION = 'skip'       # Archive identical to one extracted before: 'skip', 'link' or 'extract' again
+PARTIAL_HASH_BYTES = 64 * 1024  # Read from both ends of an archive to tell same-size archives apart
+STAGING_PREFIX = '.decompress-'  # Hidden staging folders and journals of extractions in progress
+DOWNLOAD_STABLE_SEC = 2         # Size and mtime must stay unchanged this long before extracting
+
+# Browsers write downloads under these suffixes and rename them when done
+TEMP_DOWNLOAD_SUFFIXES = ('.crdownload', '.part', '.partial', '.download', '.opdownload')
 
 # List of recognized archive formats. The first item is the file extension (or pattern),
 # second is the format label we'll use in extraction logic.
@@ -41,7 +80,36 @@ ARCHIVE_FORMATS = [
     ('.zip',      'zip'),
     ('.rar',      'rar'),
     ('.7z',       '7z'),
+    ('.tar.zst',  'tar.zst'), ('.tzst',    'tar.zst'),
+    # Single compressed files, checked after the tar variants above
+    ('.gz',       'gz'),
+    ('.bz2',      'bz2'),
+    ('.xz',       'xz'),
+    ('.zst',      'zst'),
+]
+
+# Single-stream compressions; the output is one file instead of a folder
+STREAM_FORMATS = ('gz', 'bz2', 'xz', 'zst')
+
+# Magic bytes at the start of the file. Tar has 'ustar' at offset 257 instead.
+ARCHIVE_MAGIC = [
+    (b'PK\x03\x04',             'zip'),
+    (b'PK\x05\x06',             'zip'),     # empty zip
+    (b'Rar!\x1a\x07',           'rar'),
+    (b'7z\xbc\xaf\x27\x1c',     '7z'),
+    (b'\x1f\x8b',               'gz'),
+    (b'BZh',                    'bz2'),
+    (b'\xfd7zXZ\x00',           'xz'),
+    (b'\x28\xb5\x2f\xfd',       'zst'),
 ]
+SNIFF_BYTES = 512
+
+# Only files with one of these extensions (or none) are recognized by their content.
+# Many formats are zip or tar inside (.docx, .jar, .war, .ova, .npz, ...) and must be left alone.
+SNIFF_EXTENSIONS = ('', '.bin', '.dat')
+
+# Refuse absolute paths, links out of the folder and device files when extracting tar links
+TAR_EXTRACT_FILTER = {'filter': 'data'} if hasattr(tarfile, 'data_filter') else {}
 
 # ------------------------------------------------------------------
 # Helper: wait_for_file
@@ -64,81 +132,1136 @@ def wait_for_file(file_path, attempts=FILE_ACCESS_ATTEMPTS, delay=FILE_ACCESS_DE
 # ------------------------------------------------------------------
 # Helper: detect_archive_type
 # ------------------------------------------------------------------
-def detect_archive_type(file_name: str) -> str:
-    """
-    Returns a string describing the archive format based on the file_name,
-    or an empty string if unrecognized.
-    We match multi-part extensions first (e.g. .tar.gz).
-    """
+def _type_from_extension(file_name: str) -> str:
     name_lower = file_name.lower()
     for pattern, fmt_label in ARCHIVE_FORMATS:
         if name_lower.endswith(pattern):
             return fmt_label
-    return ''  # not recognized
+    return ''
+
+def might_be_archive(file_name: str) -> bool:
+    """
+    Cheap name-only check used on the watchdog thread: True for known archive
+    extensions and for files whose content still has to be sniffed.
+    """
+    name_lower = file_name.lower()
+    if name_lower.endswith(TEMP_DOWNLOAD_SUFFIXES) or name_lower.startswith(STAGING_PREFIX):
+        return False
+    return bool(_type_from_extension(name_lower)) or os.path.splitext(name_lower)[1] in SNIFF_EXTENSIONS
+
+def unique_path(path: str) -> str:
+    """
+    'path', or 'name (1).ext', 'name (2).ext', ... if it already exists.
+    """
+    root, ext = os.path.splitext(path)
+    counter = 1
+    while os.path.exists(path):
+        path = f"{root} ({counter}){ext}"
+        counter += 1
+    return path
+
+def open_stream(fileobj, stream_format: str):
+    """
+    Decompressing reader over 'fileobj' for a single-stream format.
+    """
+    if stream_format == 'gz':
+        return gzip.GzipFile(fileobj=fileobj)
+    if stream_format == 'bz2':
+        return bz2.BZ2File(fileobj)
+    if stream_format == 'xz':
+        return lzma.LZMAFile(fileobj)
+    if stream_format == 'zst':
+        if zstandard is None:
+            raise RuntimeError("the zstandard package is required for .zst files")
+        return zstandard.ZstdDecompressor().stream_reader(fileobj, closefd=False)
+    raise ValueError(f"not a stream format: {stream_format}")
+
+def _is_tar_header(block: bytes) -> bool:
+    return block[257:262] == b'ustar'
+
+def sniff_archive_type(file_path: str) -> str:
+    """
+    Archive format from the first SNIFF_BYTES of the file, or an empty string.
+    For single-stream compressions the first decompressed block is checked
+    for a tar header, so e.g. a renamed .tar.gz is still extracted as a tar.
+    """
+    try:
+        with open(file_path, 'rb') as f:
+            head = f.read(SNIFF_BYTES)
+            fmt_label = next((label for magic, label in ARCHIVE_MAGIC if head.startswith(magic)), '')
+            if not fmt_label:
+                return 'tar' if _is_tar_header(head) else ''
+            if fmt_label in STREAM_FORMATS:
+                if fmt_label == 'zst' and zstandard is None:
+                    return ''   # Cannot be extracted without zstandard, leave it alone
+                f.seek(0)
+                with open_stream(f, fmt_label) as stream:
+                    if _is_tar_header(stream.read(SNIFF_BYTES)):
+                        return f"tar.{fmt_label}"
+            return fmt_label
+    except Exception:
+        return ''   # Unreadable or corrupt, we cannot tell
+
+def detect_archive_type(file_name: str, file_path: str = None) -> str:
+    """
+    Returns a string describing the archive format, or an empty string if
+    unrecognized. Known extensions are the fast path (multi-part extensions
+    like .tar.gz are matched first). With 'file_path', files without a known
+    extension are recognized by their magic bytes, and single compressed
+    files are checked for a tar inside.
+    """
+    fmt_label = _type_from_extension(file_name)
+    if not file_path:
+        return fmt_label
+    if fmt_label in STREAM_FORMATS or (not fmt_label and might_be_archive(file_name)):
+        return sniff_archive_type(file_path) or fmt_label
+    return fmt_label
+
+# ------------------------------------------------------------------
+# Helper: ExtractionProgress
+# ------------------------------------------------------------------
+class ExtractionProgress:
+    """
+    Counts extracted bytes of one archive and reports bytes done, total,
+    MB/s and ETA to 'callback' at most every 'interval' seconds, so the
+    copy loop can call add() for every buffer without flooding the GUI.
+    'on_finish' is called with the name once the archive is done, whether
+    it succeeded or not.
+    """
+    def __init__(self, name, callback=None, interval=PROGRESS_INTERVAL_SEC, on_finish=None):
+        self.name = name
+        self.callback = callback
+        self.on_finish = on_finish
+        self.interval = interval
+        self.total = 0
+        self.done = 0
+        self.start_time = time.time()
+        self._last_emit = 0.0
+        self._lock = threading.Lock()
+        self._finished = False
+
+    def add(self, nbytes):
+        with self._lock:    # Parallel zip workers share one progress
+            self.done += nbytes
+        self._maybe_emit()
+
+    def set(self, done):
+        self.done = done
+        self._maybe_emit()
+
+    def _maybe_emit(self):
+        now = time.time()
+        if now - self._last_emit >= self.interval:
+            self._last_emit = now
+            self._emit(now)
+
+    def _emit(self, now):
+        if not self.callback:
+            return
+        elapsed = now - self.start_time
+        mbps = self.done / elapsed / (1024 * 1024) if elapsed > 0 else 0.0
+        rate = self.done / elapsed if elapsed > 0 else 0.0
+        eta = (self.total - self.done) / rate if rate > 0 and self.total > self.done else -1.0
+        self.callback(self.name, float(self.done), float(self.total), mbps, eta)
+
+    def finish(self):
+        """
+        Final report with done == total, then the end of this archive.
+        """
+        if self._finished:
+            return
+        self._finished = True
+        self.total = max(self.total, self.done)
+        self.done = self.total
+        self._emit(time.time())
+        if self.on_finish:
+            self.on_finish(self.name)
 
 # ------------------------------------------------------------------
 # Helper: extract_archive
 # ------------------------------------------------------------------
-def extract_archive(file_path: str, archive_format: str, dest_folder: str):
+_copy_buffers = threading.local()
+
+def _copy_buffer():
+    """
+    One reusable copy buffer per extraction worker thread.
+    """
+    buffer = getattr(_copy_buffers, 'buffer', None)
+    if buffer is None:
+        buffer = _copy_buffers.buffer = memoryview(bytearray(COPY_BUFFER_SIZE))
+    return buffer
+
+def copy_stream(src, dst, on_chunk):
+    """
+    Copy 'src' to 'dst' through the thread's reusable buffer, calling
+    'on_chunk' with the size of every chunk written.
+    """
+    buffer = _copy_buffer()
+    while True:
+        n = src.readinto(buffer)
+        if not n:
+            break
+        dst.write(buffer[:n])
+        on_chunk(n)
+
+def member_target(dest_folder: str, member_name: str):
+    """
+    Path inside 'dest_folder' for an archive member, or None when the
+    name is absolute or climbs out of the folder. Names like "./" map to
+    'dest_folder' itself.
+    """
+    parts = [part for part in member_name.replace('\\', '/').split('/') if part not in ('', '.')]
+    if os.path.isabs(member_name) or '..' in parts or (parts and ':' in parts[0]):
+        return None
+    return os.path.join(dest_folder, *parts)
+
+class ExtractionAborted(Exception):
+    """
+    Raised when an archive is refused or stopped by its ExtractionGuard.
+    'transient' is set when the same archive may succeed later, e.g. once
+    there is enough free space again.
+    """
+    def __init__(self, message, transient=False):
+        super().__init__(message)
+        self.transient = transient
+
+class DiskReservations:
+    """
+    Free space promised to extractions that are still running, per disk and
+    shared by all workers of the process. Each guard reserves what its
+    archive declares before writing; the bytes it writes are then taken
+    from its own reservation, which the disk's free space already reflects.
+    Without this every worker would compare its archive with the same free
+    space, and together they could fill the disk.
+    """
+    def __init__(self):
+        self._pending = {}      # Reserved but not written yet, per device
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _available(path, pending):
+        return shutil.disk_usage(path).free - MIN_FREE_SPACE_BYTES - pending
+
+    def reserve(self, guard, nbytes):
+        """
+        Reserve 'nbytes' more for 'guard', or raise when they do not fit.
+        """
+        with self._lock:
+            pending = self._pending.get(guard.device, 0)
+            available = self._available(guard.disk_path, pending)
+            if nbytes > available:
+                raise ExtractionAborted(f"needs {nbytes / 1024**3:.2f} GB, only {max(0, available) / 1024**3:.2f} GB "
+                                        f"may be used", transient=True)
+            self._pending[guard.device] = pending + nbytes
+            guard.reserved += nbytes
+
+    def charge(self, guard, nbytes):
+        """
+        Take 'nbytes' written by 'guard' from its reservation. Bytes beyond it
+        must fit next to what the other extractions still have reserved.
+        """
+        with self._lock:
+            covered = min(nbytes, guard.reserved)
+            guard.reserved -= covered
+            pending = self._pending.get(guard.device, 0) - covered
+            self._pending[guard.device] = pending
+            if nbytes > covered and self._available(guard.disk_path, pending) < 0:
+                raise ExtractionAborted(f"less than {MIN_FREE_SPACE_BYTES / 1024**3:.2f} GB would be left free "
+                                        f"on the disk", transient=True)
+
+    def release(self, guard):
+        """
+        Return what is left of the reservation of a finished or aborted extraction.
+        """
+        with self._lock:
+            self._pending[guard.device] = self._pending.get(guard.device, 0) - guard.reserved
+            guard.reserved = 0
+
+# One per process, every extraction worker reserves from it
+disk_reservations = DiskReservations()
+
+class ExtractionGuard:
+    """
+    Resource budget of one extraction. preflight() checks what the archive
+    declares before anything is written; member() and written() account
+    for what is actually extracted, so archives that lie about their sizes
+    are stopped as soon as they cross a limit instead of when the disk is
+    full. Disk space is reserved in disk_reservations, the caller calls
+    release() once the extraction is committed or aborted, and removes
+    what was extracted before an abort.
     """
-    Extracts the archive at 'file_path' into 'dest_folder',
-    using the appropriate library for each format.
+    def __init__(self, file_path: str, dest: str, shared=None):
+        self.dest = dest
+        self.compressed_size = os.path.getsize(file_path)
+        self.disk_path = dest if os.path.isdir(dest) else os.path.dirname(dest)
+        self.device = os.stat(self.disk_path).st_dev
+        self.reserved = 0       # Part of the disk reservation not written yet
+        # NestedExtraction whose size limit all archives of one download share
+        self.shared = shared
+        self.written_bytes = 0
+        self.members = 0
+        self.links = False      # Set once a tar link was extracted, later members are resolved
+        self._lock = threading.Lock()
+
+    def preflight(self, total_bytes, member_count=0):
+        """
+        Refuse an archive from its declared size and member count.
+        """
+        if member_count > MAX_ARCHIVE_MEMBERS:
+            raise ExtractionAborted(f"{member_count} members, the limit is {MAX_ARCHIVE_MEMBERS}")
+        self._check_ratio(total_bytes)
+        if self.shared:
+            self.shared.check(total_bytes)
+        disk_reservations.reserve(self, total_bytes)
+
+    def release(self):
+        disk_reservations.release(self)
+
+    def _check_ratio(self, nbytes):
+        if nbytes >= RATIO_CHECK_MIN_BYTES and nbytes > self.compressed_size * MAX_COMPRESSION_RATIO:
+            raise ExtractionAborted(f"compression ratio above {MAX_COMPRESSION_RATIO}:1, possible zip bomb")
+
+    def member(self, dest_folder: str, name: str, is_dir=False) -> str:
+        """
+        Validated target path of the next member, counted against the limit.
+        """
+        target = member_target(dest_folder, name)
+        if target is None or (target == dest_folder and not is_dir):
+            raise ExtractionAborted(f"unsafe member path '{name}'")
+        with self._lock:
+            self.members += 1
+            if self.members > MAX_ARCHIVE_MEMBERS:
+                raise ExtractionAborted(f"more than {MAX_ARCHIVE_MEMBERS} members")
+        return target
+
+    def check_resolved(self, dest_folder: str, target: str):
+        """
+        Refuse a target that an extracted link redirects out of 'dest_folder'.
+        """
+        root = os.path.realpath(dest_folder)
+        parent = os.path.realpath(os.path.dirname(target))
+        if os.path.islink(target) or os.path.commonpath([root, parent]) != root:
+            raise ExtractionAborted(f"member path '{os.path.relpath(target, dest_folder)}' leads through a link")
+
+    def written(self, nbytes):
+        """
+        Account 'nbytes' actually written to disk.
+        """
+        with self._lock:
+            self.written_bytes += nbytes
+            total = self.written_bytes
+        self._check_ratio(total)
+        disk_reservations.charge(self, nbytes)
+        if self.shared:
+            self.shared.charge(nbytes)
+
+def _extract_member(src_open, guard: ExtractionGuard, dest_folder, name, is_dir, on_chunk):
+    target = guard.member(dest_folder, name, is_dir)
+    if guard.links:
+        guard.check_resolved(dest_folder, target)
+    if is_dir:
+        os.makedirs(target, exist_ok=True)
+        return
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    with src_open() as src, open(target, 'wb') as dst:
+        copy_stream(src, dst, on_chunk)
+
+def extract_zip_parallel(file_path: str, dest_folder: str, guard: ExtractionGuard, on_chunk, threads=ZIP_THREADS):
+    """
+    Zip members are compressed independently, so they are inflated on a
+    thread pool (zlib releases the GIL while decompressing). Every thread
+    reads through its own ZipFile handle, since one handle's file position
+    cannot be shared. Members are queued largest first so a big member
+    does not start last and leave the other threads idle.
+    """
+    with zipfile.ZipFile(file_path, 'r') as zf:
+        members = zf.infolist()
+
+    # Directories first, so no worker races another to create them
+    for info in members:
+        if info.is_dir():
+            _extract_member(None, guard, dest_folder, info.filename, True, on_chunk)
+    files = sorted((info for info in members if not info.is_dir()), key=lambda info: info.file_size, reverse=True)
+
+    handles = threading.local()
+    opened = []
+    opened_lock = threading.Lock()
+
+    def extract(info):
+        zf = getattr(handles, 'zf', None)
+        if zf is None:
+            zf = handles.zf = zipfile.ZipFile(file_path, 'r')
+            with opened_lock:
+                opened.append(zf)
+        _extract_member(lambda: zf.open(info), guard, dest_folder, info.filename, False, on_chunk)
+
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, threads), thread_name_prefix="unzip") as pool:
+            futures = [pool.submit(extract, info) for info in files]
+            try:
+                for future in futures:
+                    future.result()
+            except BaseException:
+                # Stop queued members from starting once one has failed or crossed a limit
+                for future in futures:
+                    future.cancel()
+                raise
+    finally:
+        for zf in opened:
+            zf.close()
+
+class _SevenZipProgress(py7zr.callbacks.ExtractCallback):
+    """
+    Forwards py7zr's decompressed byte counts to an ExtractionProgress.
+    """
+    def __init__(self, progress):
+        self.progress = progress
+        self._file_done = 0
+
+    def report_start_preparation(self):
+        pass
+
+    def report_start(self, processing_file_path, processing_bytes):
+        self._file_done = 0
+
+    def report_update(self, decompressed_bytes):
+        self._file_done += int(decompressed_bytes)
+        self.progress.add(int(decompressed_bytes))
+
+    def report_end(self, processing_file_path, wrote_bytes):
+        # Small files end without an update, large ones may miss the last chunk
+        self.progress.add(max(0, int(wrote_bytes) - self._file_done))
+
+    def report_warning(self, message):
+        print(f"7z warning: {message}")
+
+    def report_postprocess(self):
+        pass
+
+def extract_archive(file_path: str, archive_format: str, dest_folder: str,
+                    progress: ExtractionProgress = None, guard: ExtractionGuard = None):
+    """
+    Extracts the archive at 'file_path' into 'dest_folder' member by member,
+    using the appropriate library for each format. Bytes written are
+    accounted on 'guard', which raises ExtractionAborted when a limit is
+    crossed, and counted on 'progress'. Tar progress counts the archive
+    bytes read, since a compressed tar has no index of its uncompressed size.
     """
+    progress = progress or ExtractionProgress(os.path.basename(file_path))
+    if guard is None:
+        guard = ExtractionGuard(file_path, dest_folder)
+        try:
+            return extract_archive(file_path, archive_format, dest_folder, progress, guard)
+        finally:
+            guard.release()
+
+    def on_bytes(n):
+        guard.written(n)
+        progress.add(n)
+
     if archive_format == 'zip':
         with zipfile.ZipFile(file_path, 'r') as zf:
-            zf.extractall(dest_folder)
+            members = zf.infolist()
+            progress.total = sum(info.file_size for info in members)
+            guard.preflight(progress.total, len(members))
+            parallel = ZIP_THREADS > 1 and len(members) > 1 and progress.total >= ZIP_PARALLEL_MIN_BYTES
+            if not parallel:
+                for info in members:
+                    _extract_member(lambda: zf.open(info), guard, dest_folder, info.filename, info.is_dir(), on_bytes)
+        if parallel:
+            extract_zip_parallel(file_path, dest_folder, guard, on_bytes)
 
     elif archive_format == 'rar':
         with rarfile.RarFile(file_path) as rf:
-            rf.extractall(dest_folder)
+            members = rf.infolist()
+            progress.total = sum(info.file_size for info in members)
+            guard.preflight(progress.total, len(members))
+            for info in members:
+                _extract_member(lambda: rf.open(info), guard, dest_folder, info.filename, info.is_dir(), on_bytes)
 
     elif archive_format == '7z':
         with py7zr.SevenZipFile(file_path, 'r') as sz:
-            sz.extractall(dest_folder)
+            members = sz.list()
+            progress.total = sz.archiveinfo().uncompressed
+            guard.preflight(progress.total, len(members))
+            for info in members:
+                guard.member(dest_folder, info.filename, info.is_directory)
+            # py7zr reports progress from its own thread, where an exception cannot stop the
+            # extraction, so 7z relies on the preflight; its sizes are enforced while decoding
+            sz.extractall(dest_folder, callback=_SevenZipProgress(progress))
+
+    elif archive_format in STREAM_FORMATS:
+        # 'dest_folder' is the output file here
+        guard.member(os.path.dirname(dest_folder), os.path.basename(dest_folder))
+        with open(file_path, 'rb') as raw, open_stream(raw, archive_format) as src, open(dest_folder, 'wb') as dst:
+            progress.total = guard.compressed_size
+            guard.preflight(guard.compressed_size)
+
+            def on_chunk(n):
+                guard.written(n)
+                progress.set(raw.tell())
 
-    elif archive_format.startswith('tar'):  # tar, tar.gz, tar.bz2, tar.xz
-        with tarfile.open(file_path, 'r:*') as tf:
-            tf.extractall(dest_folder)
+            copy_stream(src, dst, on_chunk)
+
+    elif archive_format.startswith('tar'):  # tar, tar.gz, tar.bz2, tar.xz, tar.zst
+        with open(file_path, 'rb') as raw:
+            progress.total = guard.compressed_size
+            guard.preflight(guard.compressed_size)
+
+            def on_chunk(n):
+                guard.written(n)
+                progress.set(raw.tell())
+
+            # tarfile has no zstd support, decompress it ourselves and read a plain tar stream
+            fileobj = open_stream(raw, 'zst') if archive_format == 'tar.zst' else raw
+            # Stream mode reads every member once, in order, without seeking back
+            with tarfile.open(fileobj=fileobj, mode='r|' if fileobj is not raw else 'r|*') as tf:
+                for member in tf:
+                    if member.isfile():
+                        _extract_member(lambda: tf.extractfile(member), guard, dest_folder, member.name, False, on_chunk)
+                    elif member.isdir():
+                        _extract_member(None, guard, dest_folder, member.name, True, on_chunk)
+                    else:
+                        # Links and special files, the 'data' filter refuses anything unsafe
+                        guard.member(dest_folder, member.name)
+                        if member.issym() or member.islnk():
+                            if not TAR_EXTRACT_FILTER:
+                                print(f"Skipping tar link {member.name}: links need Python with tarfile filters")
+                                on_chunk(0)
+                                continue
+                            guard.links = True
+                        try:
+                            tf.extract(member, dest_folder, **TAR_EXTRACT_FILTER)
+                        except (tarfile.TarError, OSError) as e:
+                            print(f"Skipping tar member {member.name}: {e}")
+                    on_chunk(0)
 
     else:
-        # Optionally handle any other single-file compressions or fallback
+        # Fallback for anything else
         # e.g. shutil.unpack_archive(file_path, dest_folder)
         pass
 
+    progress.finish()
+
+# ------------------------------------------------------------------
+# Helper: StagingJournal
+# ------------------------------------------------------------------
+def hide_path(path: str, hidden=True):
+    """
+    Hide or unhide a file or folder in Explorer; on other systems the leading dot does that.
+    """
+    if os.name == 'nt':
+        import ctypes
+        kernel32 = ctypes.windll.kernel32
+        attributes = kernel32.GetFileAttributesW(path)
+        if attributes == 0xFFFFFFFF:  # INVALID_FILE_ATTRIBUTES
+            return
+        if hidden:
+            attributes |= 0x02        # FILE_ATTRIBUTE_HIDDEN
+        else:
+            attributes &= ~0x02
+        kernel32.SetFileAttributesW(path, attributes)
+
+class StagingJournal:
+    """
+    Archives are extracted into a hidden staging folder next to their
+    target, on the same disk, and renamed into place in one step once
+    complete, so a crash never leaves a half-extracted folder under the
+    final name. Each extraction in progress has a small JSON journal in
+    'folder' (next to the archive when None); recover() uses them to finish
+    or discard what a previous run left behind.
+    """
+    def __init__(self, folder=None):
+        self.folder = folder
+
+    def begin(self, archive: str, archive_format: str, target: str, keep_archive=False) -> dict:
+        """
+        Journal a new extraction and create its staging folder. Extract into
+        entry['staging'], for single compressed files as the target's name inside it.
+        With 'keep_archive' the archive is not deleted once extracted.
+        """
+        token = uuid.uuid4().hex[:12]
+        entry = {
+            'archive': archive,
+            'format': archive_format,
+            'target': target,
+            'staging': os.path.join(os.path.dirname(target), f"{STAGING_PREFIX}{token}"),
+            'journal': os.path.join(self.folder or os.path.dirname(archive), f"{STAGING_PREFIX}{token}.journal"),
+            'keep_archive': keep_archive,
+            'state': 'extracting',
+        }
+        self._write(entry)
+        os.makedirs(entry['staging'])
+        hide_path(entry['staging'])
+        return entry
+
+    def _write(self, entry: dict):
+        # Replaced in one step, a crash leaves the old or the new journal, never half of one
+        tmp_path = entry['journal'] + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(entry, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, entry['journal'])
+        hide_path(entry['journal'])
+
+    def commit(self, entry: dict) -> str:
+        """
+        Mark the extraction complete, move it into place and delete the archive
+        unless it is kept.
+        Returns the final path.
+        """
+        entry['state'] = 'extracted'
+        self._write(entry)
+        return self._finish(entry)
+
+    def _finish(self, entry: dict) -> str:
+        # Every step checks what is already done, so an interrupted finish can simply run again
+        staging, target = entry['staging'], entry['target']
+        source = staging
+        if entry['format'] in STREAM_FORMATS:
+            source = os.path.join(staging, os.path.basename(target))
+        if os.path.exists(source):
+            if os.path.exists(target):
+                target = unique_path(target)  # Something took the name while extracting
+            os.rename(source, target)
+        if source == staging and os.path.isdir(target):
+            hide_path(target, hidden=False)  # The rename keeps the staging folder's hidden attribute
+        shutil.rmtree(staging, ignore_errors=True)
+        if not entry.get('keep_archive') and os.path.exists(entry['archive']):
+            os.remove(entry['archive'])
+        os.remove(entry['journal'])
+        return target
+
+    def abort(self, entry: dict):
+        """
+        Discard the staging folder, the archive is left alone.
+        """
+        shutil.rmtree(entry['staging'], ignore_errors=True)
+        try:
+            os.remove(entry['journal'])
+        except FileNotFoundError:
+            pass
+
+    def recover(self) -> list:
+        """
+        Finish the extractions of a previous run that were complete and discard
+        the unfinished ones. Returns the archives of the discarded ones, to be
+        extracted again.
+        """
+        retry = []
+        for dir_entry in os.scandir(self.folder):
+            name = dir_entry.name
+            if not name.startswith(STAGING_PREFIX):
+                continue
+            if name.endswith('.journal.tmp'):
+                os.remove(dir_entry.path)
+                continue
+            if not name.endswith('.journal'):
+                continue
+            try:
+                with open(dir_entry.path, 'r', encoding='utf-8') as f:
+                    entry = json.load(f)
+                if entry['state'] == 'extracted':
+                    target = self._finish(entry)
+                    print(f"Finished interrupted extraction of {entry['archive']} into {target}")
+                else:
+                    self.abort(entry)
+                    print(f"Discarded unfinished extraction of {entry['archive']}")
+                    if os.path.exists(entry['archive']):
+                        retry.append(entry['archive'])
+            except (OSError, ValueError, KeyError) as e:
+                print(f"Could not recover {dir_entry.path}: {e}")
+        return retry
+
+# ------------------------------------------------------------------
+# Helper: ProcessedIndex
+# ------------------------------------------------------------------
+class ProcessedIndex:
+    """
+    Persistent record of files in the watch folder that were examined and
+    left in place for good: not archives, or refused by the guard for their
+    content. Failures that may pass (locked file, full disk) are not recorded.
+    Entries are keyed by path, size, mtime and inode, a file that is changed
+    or replaced under the same name is examined again.
+    Extracted archives are deleted, but their content hashes are kept with
+    where they were extracted to, so a downloaded copy of the same archive
+    is recognized.
+    """
+    def __init__(self, db_path=INDEX_PATH):
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        # Shared by the extraction workers, the lock serializes them
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS files ("
+                "path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, inode INTEGER, status TEXT, recorded TEXT)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS extracted ("
+                "full_hash TEXT PRIMARY KEY, size INTEGER, partial_hash TEXT, target TEXT, recorded TEXT)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS extracted_size ON extracted (size)")
+
+    def load(self) -> dict:
+        """
+        All entries as {path: (size, mtime_ns, inode)}, read in one query for the startup scan.
+        """
+        with self._lock:
+            rows = self._conn.execute("SELECT path, size, mtime_ns, inode FROM files").fetchall()
+        return {path: (size, mtime_ns, inode) for path, size, mtime_ns, inode in rows}
+
+    def record(self, path: str, status: str):
+        try:
+            st = os.stat(path)
+        except OSError:
+            return  # Gone already, nothing to remember
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?)",
+                (path, st.st_size, st.st_mtime_ns, st.st_ino, status, datetime.now().isoformat(timespec='seconds'))
+            )
+
+    def find_extracted(self, fingerprint: tuple):
+        """
+        Where an archive with this fingerprint was extracted to, or None.
+        """
+        size, partial, full = fingerprint
+        with self._lock:
+            row = self._conn.execute("SELECT target FROM extracted WHERE full_hash = ? AND size = ? "
+                                     "AND partial_hash = ?", (full, size, partial)).fetchone()
+        if row and os.path.exists(row[0]):
+            return row[0]
+        return None
+
+    @staticmethod
+    def fingerprint(file_path: str) -> tuple:
+        """
+        Size and hashes of an archive, taken once before it is extracted: the
+        same fingerprint is looked up and then recorded with the extraction.
+        """
+        return os.path.getsize(file_path), partial_hash(file_path), file_hash(file_path)
+
+    def record_extracted(self, fingerprint: tuple, target: str):
+        size, partial, full = fingerprint
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO extracted VALUES (?, ?, ?, ?, ?)",
+                (full, size, partial, target, datetime.now().isoformat(timespec='seconds'))
+            )
+
+    def prune(self, existing_paths):
+        """
+        Drop entries of files that no longer exist, and of extractions that were deleted.
+        """
+        existing = set(existing_paths)
+        with self._lock, self._conn:
+            stale = [(path,) for (path,) in self._conn.execute("SELECT path FROM files") if path not in existing]
+            self._conn.executemany("DELETE FROM files WHERE path = ?", stale)
+            gone = [(target,) for (target,) in self._conn.execute("SELECT target FROM extracted")
+                    if not os.path.exists(target)]
+            self._conn.executemany("DELETE FROM extracted WHERE target = ?", gone)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+# ------------------------------------------------------------------
+# Helper: NestedExtraction
+# ------------------------------------------------------------------
+def file_hash(file_path: str) -> str:
+    """
+    SHA-256 of a file's content, read through the thread's copy buffer.
+    """
+    digest = hashlib.sha256()
+    buffer = _copy_buffer()
+    with open(file_path, 'rb', buffering=0) as f:
+        while True:
+            n = f.readinto(buffer)
+            if not n:
+                break
+            digest.update(buffer[:n])
+    return digest.hexdigest()
+
+def partial_hash(file_path: str) -> str:
+    """
+    SHA-256 of the size and the first and last PARTIAL_HASH_BYTES of a file.
+    Cheap to compute for any size, and archives that differ almost always
+    differ there, since both ends hold headers or the central directory.
+    """
+    size = os.path.getsize(file_path)
+    digest = hashlib.sha256(str(size).encode())
+    with open(file_path, 'rb') as f:
+        digest.update(f.read(PARTIAL_HASH_BYTES))
+        if size > 2 * PARTIAL_HASH_BYTES:
+            f.seek(-PARTIAL_HASH_BYTES, os.SEEK_END)
+        digest.update(f.read())
+    return digest.hexdigest()
+
+class NestedExtraction:
+    """
+    Shared state of one downloaded archive and all archives nested in it:
+    the depth and total-size budget, and the content hashes of archives
+    already extracted. An archive that contains itself (or an ancestor)
+    is not extracted again, and identical nested archives only once.
+    """
+    def __init__(self, max_depth=NESTED_MAX_DEPTH, max_total_bytes=NESTED_MAX_TOTAL_BYTES):
+        self.max_depth = max_depth
+        self.max_total_bytes = max_total_bytes
+        self.total_bytes = 0    # Written so far, plus the reservations of queued archives
+        self._reserved = {}
+        self._seen = set()
+        self._lock = threading.Lock()
+
+    def claim(self, file_path: str) -> bool:
+        """
+        True the first time an archive with this content is seen.
+        """
+        content_hash = file_hash(file_path)
+        with self._lock:
+            if content_hash in self._seen:
+                return False
+            self._seen.add(content_hash)
+            return True
+
+    def reserve(self, file_path: str) -> bool:
+        """
+        Reserve the size of a queued nested archive, the least its extraction
+        will write, so archives extracted at the same time cannot each count
+        on the whole remaining budget. False when it does not fit.
+        """
+        nbytes = os.path.getsize(file_path)
+        with self._lock:
+            if self.total_bytes + nbytes > self.max_total_bytes:
+                return False
+            self.total_bytes += nbytes
+            self._reserved[file_path] = nbytes
+            return True
+
+    def release(self, file_path: str):
+        """
+        Drop a reservation when its archive starts, from then on its bytes are charged as written.
+        """
+        with self._lock:
+            self.total_bytes -= self._reserved.pop(file_path, 0)
+
+    def check(self, nbytes):
+        """
+        Refuse an archive that declares more than what is left of the budget.
+        """
+        with self._lock:
+            remaining = self.max_total_bytes - self.total_bytes
+        if nbytes > remaining:
+            raise ExtractionAborted(f"needs {nbytes / 1024**3:.2f} GB, only {max(0, remaining) / 1024**3:.2f} GB "
+                                    f"of the download's size limit are left")
+
+    def charge(self, nbytes):
+        """
+        Account bytes written by any extraction of this download.
+        """
+        with self._lock:
+            self.total_bytes += nbytes
+            total = self.total_bytes
+        if total > self.max_total_bytes:
+            raise ExtractionAborted(f"size limit of {self.max_total_bytes / 1024**3:.2f} GB for this download reached")
+
+    def add_bytes(self, nbytes):
+        with self._lock:
+            self.total_bytes += nbytes
+
+    def within_budget(self) -> bool:
+        with self._lock:
+            return self.total_bytes < self.max_total_bytes
+
+# ------------------------------------------------------------------
+# Helper: ExtractionScheduler
+# ------------------------------------------------------------------
+class ExtractionScheduler:
+    """
+    Runs extraction jobs on a small pool of worker threads so the watchdog
+    observer only enqueues work and never blocks.
+    Jobs are ordered by priority (lower first), then by file size when
+    EXTRACT_ORDER is 'smallest', then by arrival. A path that is already
+    queued or being extracted is ignored, which de-duplicates the bursts
+    of events one download produces.
+    """
+    def __init__(self, worker_func, workers=EXTRACT_WORKERS, order=EXTRACT_ORDER):
+        self.worker_func = worker_func
+        self.workers = max(1, workers)
+        self.order = order
+        self._heap = []
+        self._pending = set()   # queued or running paths
+        self._counter = itertools.count()
+        self._condition = threading.Condition()
+        self._threads = []
+        self._stopping = False
+
+    def start(self):
+        for index in range(self.workers):
+            thread = threading.Thread(target=self._worker, name=f"extract-{index + 1}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def submit(self, file_path, priority=0, **job_args):
+        """
+        Queue a file for extraction, 'job_args' are passed on to the worker
+        function. Returns False if it is already queued or running, or if
+        the scheduler is stopping.
+        """
+        key = os.path.normcase(os.path.abspath(file_path))
+        try:
+            size = os.path.getsize(file_path) if self.order == 'smallest' else 0
+        except OSError:
+            size = 0
+
+        with self._condition:
+            if self._stopping or key in self._pending:
+                return False
+            self._pending.add(key)
+            heapq.heappush(self._heap, (priority, size, next(self._counter), key, file_path, job_args))
+            self._condition.notify()
+        return True
+
+    def _worker(self):
+        while True:
+            with self._condition:
+                while not self._heap and not self._stopping:
+                    self._condition.wait()
+                if self._stopping:
+                    return
+                _, _, _, key, file_path, job_args = heapq.heappop(self._heap)
+
+            try:
+                self.worker_func(file_path, **job_args)
+            except Exception as e:
+                print(f"Extraction job failed for {file_path}: {e}")
+            finally:
+                with self._condition:
+                    self._pending.discard(key)
+
+    def stop(self, wait=True):
+        """
+        Drop queued jobs and stop the workers. Running extractions finish first
+        when 'wait' is True.
+        """
+        with self._condition:
+            self._stopping = True
+            self._heap.clear()
+            self._condition.notify_all()
+        if wait:
+            for thread in self._threads:
+                thread.join()
+        self._threads = []
+
+# ------------------------------------------------------------------
+# Helper: CompletionDetector
+# ------------------------------------------------------------------
+class CompletionDetector:
+    """
+    Decides when a file has finished downloading. Every tracked file sits in
+    a heap keyed by the time it is due for a re-check; one timer thread
+    sleeps until the earliest entry, so no extraction worker waits on a
+    download. A file is ready once its size and mtime did not change for
+    'window' seconds, it is not empty, it can be opened, and no browser
+    temp file for it exists next to it. Ready files go to 'on_ready'.
+    """
+    def __init__(self, on_ready, window=DOWNLOAD_STABLE_SEC):
+        self.on_ready = on_ready
+        self.window = window
+        self._heap = []
+        self._tracked = {}      # path -> (size, mtime, last change)
+        self._counter = itertools.count()
+        self._condition = threading.Condition()
+        self._thread = None
+        self._stopping = False
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="completion-detector", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        with self._condition:
+            self._stopping = True
+            self._condition.notify_all()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def track(self, file_path):
+        """
+        Called for every created/modified/moved-in event. Cheap: one stat,
+        the stability check happens on the timer thread.
+        """
+        state = self._stat(file_path)
+        if state is None:
+            return
+        now = time.time()
+
+        with self._condition:
+            previous = self._tracked.get(file_path)
+            if previous is None:
+                # mtime is the last change when we first see a file, e.g. after a rename
+                last_change = min(now, state[1])
+                self._tracked[file_path] = (state[0], state[1], last_change)
+                heapq.heappush(self._heap, (last_change + self.window, next(self._counter), file_path))
+                self._condition.notify()
+            elif previous[:2] != state:
+                self._tracked[file_path] = (state[0], state[1], now)
+
+    @staticmethod
+    def _stat(file_path):
+        try:
+            st = os.stat(file_path)
+        except OSError:
+            return None
+        return (st.st_size, st.st_mtime)
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._stopping and (not self._heap or self._heap[0][0] > time.time()):
+                    timeout = self._heap[0][0] - time.time() if self._heap else None
+                    self._condition.wait(timeout)
+                if self._stopping:
+                    return
+                _, _, file_path = heapq.heappop(self._heap)
+
+            due = self._check(file_path)
+            if due is None:
+                continue
+            if due is True:
+                self.on_ready(file_path)
+            else:
+                with self._condition:
+                    heapq.heappush(self._heap, (due, next(self._counter), file_path))
+
+    def _check(self, file_path):
+        """
+        True when the file is ready, the next check time while it is still
+        changing, None when it should no longer be tracked.
+        """
+        now = time.time()
+        state = self._stat(file_path)
+        with self._condition:
+            tracked = self._tracked.get(file_path)
+            if state is None or tracked is None:
+                self._tracked.pop(file_path, None)
+                return None
+            last_change = tracked[2] if tracked[:2] == state else now
+            self._tracked[file_path] = (state[0], state[1], last_change)
+            if now - last_change < self.window:
+                return last_change + self.window
+
+        busy = state[0] == 0 or any(os.path.exists(file_path + suffix) for suffix in TEMP_DOWNLOAD_SUFFIXES)
+        if not busy:
+            try:
+                with open(file_path, 'rb'):
+                    pass
+            except PermissionError:
+                busy = True     # Still locked by the browser or a virus scanner (Windows)
+            except OSError:
+                self._forget(file_path)
+                return None
+        if busy:
+            return now + self.window
+
+        self._forget(file_path)
+        return True
+
+    def _forget(self, file_path):
+        with self._condition:
+            self._tracked.pop(file_path, None)
+
 # ------------------------------------------------------------------
 # Signals object to communicate from Watchdog to the GUI
 # ------------------------------------------------------------------
 class MonitorSignals(QObject):
     file_extracted = pyqtSignal(str)  # string with info about the file
+    # archive name, bytes done, bytes total, MB/s, ETA in seconds (-1 if unknown)
+    extraction_progress = pyqtSignal(str, float, float, float, float)
+    extraction_finished = pyqtSignal(str)  # archive name, sent once it is done or has failed
 
 # ------------------------------------------------------------------
 # Watchdog Event Handler
 # ------------------------------------------------------------------
 class ArchiveHandler(FileSystemEventHandler):
     """
-    Handles created files in the watch folder. Checks if it's an archive
-    we recognize, then extracts it, deletes the original file,
-    and emits a signal about the extraction.
+    Handles created, modified and moved-in files in the watch folder. Checks
+    if it's an archive we recognize and hands it to the completion detector,
+    which queues it on the scheduler once the download is finished. The
+    scheduler's workers extract it, delete the original file, and emit a
+    signal about the extraction.
     """
     def __init__(self, signals: MonitorSignals):
         super().__init__()
         self.signals = signals
+        self.scheduler = None
+        self.detector = None
+        self.journal = StagingJournal()
+        self.index = None
 
     def on_created(self, event):
         if event.is_directory:
             return
-        self.process_file(event.src_path)
+        self.enqueue(event.src_path)
 
-    def process_file(self, file_path):
+    def on_modified(self, event):
+        if event.is_directory:
+            return
+        self.enqueue(event.src_path)
+
+    def on_moved(self, event):
+        # Browsers rename "file.zip.crdownload" to "file.zip" when the download is done
+        if event.is_directory:
+            return
+        self.enqueue(event.dest_path)
+
+    def enqueue(self, file_path):
+        """
+        Hand a file to the completion detector, or straight to the scheduler
+        (or process it directly) when there is none.
+        """
+        if not might_be_archive(os.path.basename(file_path)):
+            return
+        if self.detector:
+            self.detector.track(file_path)
+        elif self.scheduler:
+            self.scheduler.submit(file_path)
+        else:
+            self.process_file(file_path)
+
+    def process_file(self, file_path, nested: NestedExtraction = None, depth=0):
+        """
+        Extracts one archive next to itself. 'nested' and 'depth' are set for
+        archives found inside another one by the recursive stage.
+        """
         file_name = os.path.basename(file_path)
-        archive_type = detect_archive_type(file_name)
-        if not archive_type:
+        if nested:
+            nested.release(file_path)
+        if not might_be_archive(file_name):
             return  # Not an archive we handle
 
         if not wait_for_file(file_path):
             print(f"Could not access file after multiple attempts: {file_path}")
             return
 
+        archive_type = detect_archive_type(file_name, file_path)
+        if not archive_type:
+            self.remember(file_path, 'not an archive', depth)
+            return  # Not an archive we handle
+
+        if NESTED_EXTRACTION and nested is None:
+            nested = NestedExtraction()
+        if nested and depth > 0:
+            # Nothing was extracted from the download yet at depth 0, there is nothing to compare with
+            if not nested.within_budget():
+                print(f"Not extracting nested archive {file_path}: size limit of the download reached")
+                return
+            if not nested.claim(file_path):
+                print(f"Not extracting {file_path}: identical archive was already extracted from this download")
+                return
+
         # Deduce a subfolder name
         file_base = file_name
         # Remove recognized patterns from the end to get a cleaner base name
@@ -152,16 +1275,118 @@ class ArchiveHandler(FileSystemEventHandler):
             # Or you can do multiple passes if needed
             file_base, _ = os.path.splitext(file_base)
 
-        new_folder = os.path.join(WATCH_FOLDER, file_base)
-        os.makedirs(new_folder, exist_ok=True)
+        # A single compressed file becomes a single file, e.g. "notes.txt.gz" -> "notes.txt".
+        # The result is renamed into place in one step, so an existing name is never merged into.
+        new_folder = unique_path(os.path.join(os.path.dirname(file_path), file_base))
+
+        # A type known only from the content may still be a document or package we do
+        # not know about, so its original is kept
+        sniffed = not _type_from_extension(file_name)
 
+        # Hashed once, only when a later copy would be looked up
+        fingerprint = None
+        if self.index and depth == 0 and DUPLICATE_ACTION != 'extract':
+            fingerprint = ProcessedIndex.fingerprint(file_path)
+            existing = self.index.find_extracted(fingerprint)
+            if existing:
+                self.handle_duplicate(file_path, archive_type, existing, new_folder, sniffed)
+                return
+
+        progress = ExtractionProgress(file_name, self.signals.extraction_progress.emit,
+                                      on_finish=self.signals.extraction_finished.emit)
+        entry = None
+        guard = None
         try:
-            extract_archive(file_path, archive_type, new_folder)
-            os.remove(file_path)
+            entry = self.journal.begin(file_path, archive_type, new_folder, keep_archive=sniffed)
+            dest = entry['staging']
+            if archive_type in STREAM_FORMATS:
+                dest = os.path.join(dest, os.path.basename(new_folder))
+            # Nested archives also share what is left of the download's size limit
+            guard = ExtractionGuard(file_path, dest, nested)
+            extract_archive(file_path, archive_type, dest, progress, guard)
+            new_folder = self.journal.commit(entry)
+            if fingerprint:
+                self.index.record_extracted(fingerprint, new_folder)
             msg = f"{file_base} ({archive_type.upper()}) extracted at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
+            if sniffed:
+                msg += ", original kept"
+                self.remember(file_path, 'extracted, kept', depth)
             self.signals.file_extracted.emit(msg)
+            if nested:
+                if archive_type == '7z':
+                    # py7zr writes without the guard seeing the bytes, they count once done
+                    nested.add_bytes(progress.done)
+                self.queue_nested(new_folder, nested, depth + 1)
+        except ExtractionAborted as e:
+            # The archive is kept, what was extracted from it goes with the staging folder
+            self.journal.abort(entry)
+            print(f"Not extracting {file_path}: {e}")
+            self.signals.file_extracted.emit(f"{file_base} ({archive_type.upper()}) NOT extracted: {e}")
+            if not e.transient:
+                self.remember(file_path, 'refused', depth)
         except Exception as e:
+            # Not remembered: a locked file or a full disk is retried on the next start
+            if entry and entry['state'] == 'extracting':
+                self.journal.abort(entry)
             print(f"Error handling {archive_type} file {file_path}: {e}")
+        finally:
+            if guard:
+                guard.release()
+            progress.finish()
+
+    def handle_duplicate(self, file_path, archive_type, existing, link, keep=False):
+        """
+        A download identical to an archive extracted before, e.g. "foo (1).zip".
+        It is deleted like an extracted archive; with DUPLICATE_ACTION 'link'
+        a link to the existing extraction is created at 'link', where it would
+        have been extracted to. With 'keep' the duplicate is left in place.
+        """
+        message = f"{os.path.basename(file_path)} ({archive_type.upper()}) is identical to an archive already extracted"
+        if DUPLICATE_ACTION == 'link':
+            try:
+                os.symlink(existing, link, target_is_directory=os.path.isdir(existing))
+                message += f", linked as {os.path.basename(link)}"
+            except OSError as e:
+                # Windows only allows symlinks with Developer Mode or as administrator
+                print(f"Could not link {link} to {existing}: {e}")
+        if keep:
+            self.remember(file_path, 'duplicate, kept')
+        else:
+            os.remove(file_path)
+        print(f"{message}: {existing}")
+        self.signals.file_extracted.emit(f"{message} at {existing}")
+
+    def remember(self, file_path, status, depth=0):
+        """
+        Record a downloaded file that stays in the watch folder, so the next
+        startup scan skips it. Files inside extractions are never scanned.
+        """
+        if self.index and depth == 0:
+            self.index.record(file_path, status)
+
+    def queue_nested(self, extracted_path, nested: NestedExtraction, depth):
+        """
+        Feeds archives found in an extraction back into the worker pool.
+        Nested archives are recognized by extension only, so a large
+        extraction does not mean sniffing every file in it.
+        """
+        if depth > nested.max_depth:
+            return
+        if os.path.isdir(extracted_path):
+            paths = (os.path.join(root, name) for root, _, names in os.walk(extracted_path) for name in names)
+        else:
+            paths = [extracted_path]   # Output of a single compressed file
+
+        for path in paths:
+            if not _type_from_extension(os.path.basename(path)):
+                continue
+            if not nested.reserve(path):
+                print(f"Not extracting nested archive {path}: size limit of the download reached")
+                continue
+            if self.scheduler:
+                self.scheduler.submit(path, nested=nested, depth=depth)
+            else:
+                self.process_file(path, nested, depth)
 
 # ------------------------------------------------------------------
 # Background Thread (Watchdog)
@@ -181,11 +1406,34 @@ class MonitorThread(threading.Thread):
 
     def run(self):
         event_handler = ArchiveHandler(self.signals)
+        scheduler = ExtractionScheduler(event_handler.process_file)
+        event_handler.scheduler = scheduler
+        event_handler.detector = CompletionDetector(scheduler.submit)
+        event_handler.journal = StagingJournal(self.folder)
+        event_handler.index = ProcessedIndex()
+        scheduler.start()
+        event_handler.detector.start()
+
+        # Finish or discard what a previous run was extracting when it stopped. Archives
+        # in the watch folder itself are picked up again by the initial scan below.
+        for archive in event_handler.journal.recover():
+            if os.path.normpath(os.path.dirname(archive)) != os.path.normpath(self.folder):
+                scheduler.submit(archive)
 
-        # Initial scan
+        # Initial scan, the backlog is extracted by the worker pool. Files examined by
+        # an earlier run are skipped unless they changed; scandir() returns size and
+        # mtime with the listing, so no file has to be opened or sniffed for that.
+        known = event_handler.index.load()
+        present = []
         for entry in os.scandir(self.folder):
-            if entry.is_file():
-                event_handler.process_file(entry.path)
+            if not entry.is_file():
+                continue
+            present.append(entry.path)
+            st = entry.stat()
+            if known.get(entry.path) == (st.st_size, st.st_mtime_ns, entry.inode()):
+                continue
+            event_handler.enqueue(entry.path)
+        event_handler.index.prune(present)
 
         self.observer = Observer()
         self.observer.schedule(event_handler, self.folder, recursive=False)
@@ -204,6 +1452,9 @@ class MonitorThread(threading.Thread):
         # Stop gracefully
         self.observer.stop()
         self.observer.join()
+        event_handler.detector.stop()
+        scheduler.stop()
+        event_handler.index.close()
         print("Monitor thread stopped.")
 
     def stop(self):
@@ -231,7 +1482,17 @@ class ArchiveWindow(QtWidgets.QWidget):
 
         self.resize(343, 562)
         self.listWidget = QtWidgets.QListWidget(self)
-        self.listWidget.setGeometry(20, 30, 301, 471)
+        self.listWidget.setGeometry(20, 30, 301, 421)
+
+        # Progress of running extractions, hidden while idle
+        self.progressLabel = QtWidgets.QLabel(self)
+        self.progressLabel.setGeometry(20, 458, 301, 20)
+        self.progressBar = QtWidgets.QProgressBar(self)
+        self.progressBar.setGeometry(20, 482, 301, 20)
+        self.progressBar.setRange(0, 1000)
+        self.progressLabel.hide()
+        self.progressBar.hide()
+        self.active_extractions = {}  # archive name -> (done, total, MB/s, ETA)
 
         self.closeButton = QtWidgets.QPushButton(self)
         self.closeButton.setText("Close Window")
@@ -273,6 +1534,40 @@ class ArchiveWindow(QtWidgets.QWidget):
         """
         self.listWidget.addItem(text)
 
+    def update_progress(self, name: str, done: float, total: float, mbps: float, eta: float):
+        """
+        Shows the progress of the most recently updated extraction, and how
+        many others are running.
+        """
+        # Re-inserted, so the most recent update is the last entry
+        self.active_extractions.pop(name, None)
+        self.active_extractions[name] = (done, total, mbps, eta)
+        self.show_progress()
+
+    def finish_progress(self, name: str):
+        """
+        An extraction ended, successful or not.
+        """
+        self.active_extractions.pop(name, None)
+        self.show_progress()
+
+    def show_progress(self):
+        if not self.active_extractions:
+            self.progressLabel.hide()
+            self.progressBar.hide()
+            return
+
+        name, (done, total, mbps, eta) = next(reversed(self.active_extractions.items()))
+        text = f"{name}: {done / (1024 * 1024):.0f}/{total / (1024 * 1024):.0f} MB, {mbps:.1f} MB/s"
+        if eta >= 0:
+            text += f", ETA {int(eta) // 60}:{int(eta) % 60:02d}"
+        if len(self.active_extractions) > 1:
+            text += f" (+{len(self.active_extractions) - 1} more)"
+        self.progressLabel.setText(text)
+        self.progressBar.setValue(int(done / total * 1000) if total > 0 else 0)
+        self.progressLabel.show()
+        self.progressBar.show()
+
     def closeEvent(self, event):
         """
         Override the X button to hide the window instead of quitting.
@@ -299,6 +1594,8 @@ class DeCompressApp(QtWidgets.QApplication):
 
         # Connect the extracted-file signal
         self.signals.file_extracted.connect(self.window.add_extracted_file)
+        self.signals.extraction_progress.connect(self.window.update_progress)
+        self.signals.extraction_finished.connect(self.window.finish_progress)
 
         # Start the monitor thread
         self.monitor_thread = None
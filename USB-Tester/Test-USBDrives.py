@@ -4,12 +4,59 @@ USB Storage Tester v2.0
 Main entry point for the application
 """
 
+import sys
+import argparse
+
 from src.usb_tester import USBStorageTester
+from src.report_manager import ReportManager
+
+def parse_threshold(value):
+    """Parse a KIND=FRACTION threshold override"""
+    kind, _, amount = value.partition('=')
+    if kind not in ('speed', 'latency', 'errors'):
+        raise argparse.ArgumentTypeError(f"unknown threshold kind '{kind}' (use speed, latency or errors)")
+    try:
+        return kind, float(amount)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid threshold value '{amount}'")
+
+def parse_args():
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description="USB Storage Tester")
+    parser.add_argument('--profile', action='store_true',
+                        help="profile each test phase (cProfile + tracemalloc) and add the results to reports")
+    parser.add_argument('--compare', nargs='+', metavar='REPORT',
+                        help="compare JSON reports against the first one and exit with 1 on regression")
+    parser.add_argument('--baseline', action='store_true',
+                        help="with --compare, compare each report against the stored baseline for its model")
+    parser.add_argument('--save-baseline', metavar='REPORT',
+                        help="store a JSON report as the baseline for its drive model")
+    parser.add_argument('--threshold', action='append', type=parse_threshold, default=[], metavar='KIND=FRACTION',
+                        help="override a regression threshold, e.g. speed=0.05 or errors=0")
+    parser.add_argument('--output', metavar='FILE',
+                        help="with --compare, also write the comparison as JSON")
+    return parser.parse_args()
+
+def run_report_commands(args):
+    """Run the non-interactive report commands, returns the exit code"""
+    report_manager = ReportManager()
+    if args.save_baseline and not report_manager.save_baseline(args.save_baseline):
+        return 2
+    if args.compare:
+        result = report_manager.compare_reports(args.compare, use_baseline=args.baseline,
+                                                thresholds=dict(args.threshold), output_file=args.output)
+        if result is None:
+            return 2
+        return 0 if result['verdict'] == 'PASS' else 1
+    return 0
 
 def main():
     """Main entry point"""
+    args = parse_args()
+    if args.compare or args.save_baseline:
+        sys.exit(run_report_commands(args))
     try:
-        tester = USBStorageTester()
+        tester = USBStorageTester(profile=args.profile)
         tester.run()
     except KeyboardInterrupt:
         print("\n\nApplication terminated by user.")
@@ -17,4 +64,4 @@ def main():
         print(f"Fatal error: {e}")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,213 @@
+"""Alignment and cluster-boundary probing for USB Storage Tester"""
+
+import os
+import time
+import struct
+from .metrics import median
+
+# Linux FIEMAP ioctl: struct fiemap header and one struct fiemap_extent
+FS_IOC_FIEMAP = 0xC020660B
+FIEMAP_FLAG_SYNC = 0x1
+FIEMAP_HEADER = struct.Struct('=QQIIII')
+FIEMAP_EXTENT = struct.Struct('=QQQ16xI12x')
+# Unknown, delayed, encoded, not block aligned or inline extents have no usable physical offset
+FIEMAP_EXTENT_UNUSABLE = 0x2 | 0x4 | 0x8 | 0x100 | 0x200
+
+# Windows FSCTL_GET_RETRIEVAL_POINTERS: extent count and starting VCN, then (next VCN, LCN) pairs
+FSCTL_GET_RETRIEVAL_POINTERS = 0x90073
+RETRIEVAL_HEADER = struct.Struct('<I4xq')
+RETRIEVAL_EXTENT = struct.Struct('<qq')
+
+# Runs asked for at once, a freshly allocated probe file has one or a few
+MAX_EXTENTS = 32
+
+
+def file_start_on_volume(f, length, cluster_size, filesystem=None):
+    """Byte offset of the file's first byte from the start of its partition, None if unknown
+
+    Only a file whose first length bytes lie in one contiguous run has a
+    single offset. On Windows the cluster numbers count from the volume
+    start only on NTFS, FAT and exFAT count them from their data area.
+    """
+    try:
+        if os.name == 'nt':
+            if (filesystem or '').upper() != 'NTFS':
+                return None
+            runs = _retrieval_pointers(f, cluster_size)
+        else:
+            runs = _fiemap(f, length)
+    except (OSError, ImportError, ValueError):
+        return None
+
+    # Merge runs that continue each other on the disk, the file must be one run up to length
+    start = None
+    for logical, physical, run_length in runs:
+        if start is None:
+            if logical != 0:
+                return None
+            start = physical
+        elif physical != start + logical:
+            return None
+        if logical + run_length >= length:
+            return start
+    return None
+
+
+def _fiemap(f, length):
+    """Linux: (logical, physical, length) runs of the file, physical from the partition start"""
+    import fcntl
+
+    request = bytearray(FIEMAP_HEADER.size + FIEMAP_EXTENT.size * MAX_EXTENTS)
+    FIEMAP_HEADER.pack_into(request, 0, 0, length, FIEMAP_FLAG_SYNC, 0, MAX_EXTENTS, 0)
+    fcntl.ioctl(f.fileno(), FS_IOC_FIEMAP, request)
+    mapped = FIEMAP_HEADER.unpack_from(request)[3]
+
+    runs = []
+    for index in range(mapped):
+        logical, physical, run_length, flags = FIEMAP_EXTENT.unpack_from(
+            request, FIEMAP_HEADER.size + index * FIEMAP_EXTENT.size)
+        if flags & FIEMAP_EXTENT_UNUSABLE:
+            raise ValueError(f"extent at {logical} has no physical offset")
+        runs.append((logical, physical, run_length))
+    return runs
+
+
+def _retrieval_pointers(f, cluster_size):
+    """Windows: (logical, physical, length) runs of the file, physical from the volume start"""
+    import ctypes
+    import msvcrt
+    from ctypes import wintypes
+
+    ERROR_MORE_DATA = 234
+
+    kernel32 = ctypes.WinDLL('kernel32', use_last_error=True)
+    output = ctypes.create_string_buffer(RETRIEVAL_HEADER.size + RETRIEVAL_EXTENT.size * MAX_EXTENTS)
+    starting_vcn = ctypes.c_longlong(0)
+    returned = wintypes.DWORD()
+    # ERROR_MORE_DATA still fills the buffer, the first runs are all the probe needs
+    if not kernel32.DeviceIoControl(wintypes.HANDLE(msvcrt.get_osfhandle(f.fileno())), FSCTL_GET_RETRIEVAL_POINTERS,
+                                    ctypes.byref(starting_vcn), ctypes.sizeof(starting_vcn), output, len(output),
+                                    ctypes.byref(returned), None) and ctypes.get_last_error() != ERROR_MORE_DATA:
+        raise ctypes.WinError(ctypes.get_last_error())
+
+    count, vcn = RETRIEVAL_HEADER.unpack_from(output)
+    runs = []
+    for index in range(min(count, MAX_EXTENTS)):
+        next_vcn, lcn = RETRIEVAL_EXTENT.unpack_from(output, RETRIEVAL_HEADER.size + index * RETRIEVAL_EXTENT.size)
+        if lcn < 0:
+            raise ValueError("file has a sparse or compressed run")
+        runs.append((vcn * cluster_size, lcn * cluster_size, (next_vcn - vcn) * cluster_size))
+        vcn = next_vcn
+    return runs
+
+
+class AlignmentProbe:
+    """Times small synced writes on and off power-of-two boundaries inside a probe file
+
+    A write that straddles a flash page or erase-block boundary makes the
+    controller program (or read-modify-write) two units instead of one, so
+    it takes measurably longer than the same write placed inside a unit.
+    Straddling and inside writes are interleaved so drift affects both alike.
+    base is the device offset of the file's first byte, boundaries are placed
+    on the device grid with it; at 0 they are only file-relative.
+    """
+
+    def __init__(self, f, file_size, write_size=4096, samples=16, stop_check=None, on_sample=None, base=0):
+        self.f = f
+        self.file_size = file_size
+        self.base = base
+        self.write_size = write_size
+        self.samples = samples
+        self.stop_check = stop_check
+        self.on_sample = on_sample
+        self._payload = os.urandom(max(write_size, 1024 * 1024))
+
+    def _timed_write(self, offset, size):
+        """Write size bytes at offset and wait until the device acknowledged them"""
+        data = memoryview(self._payload)[:size]
+        start_time = time.perf_counter()
+        self.f.seek(offset)
+        self.f.write(data)
+        self.f.flush()
+        os.fsync(self.f.fileno())
+        elapsed = time.perf_counter() - start_time
+        if self.on_sample:
+            self.on_sample(size, elapsed)
+        return elapsed
+
+    def _boundaries(self, unit):
+        """Up to self.samples unit boundaries spread across the file, repeated when there are fewer"""
+        first = (-self.base) % unit
+        boundaries = list(range(first + unit, self.file_size - unit + 1, unit))
+        if not boundaries:
+            return []
+        step = max(1, len(boundaries) // self.samples)
+        picked = boundaries[::step][:self.samples]
+        return (picked * (self.samples // len(picked) + 1))[:self.samples]
+
+    def probe_unit(self, unit):
+        """Latency of writes straddling unit boundaries vs. writes centred inside a unit"""
+        half = self.write_size // 2
+        straddle, inside = [], []
+
+        for boundary in self._boundaries(unit):
+            if self.stop_check and self.stop_check():
+                break
+            # The midpoint of a unit is a boundary of every smaller unit, so both
+            # positions cross the same smaller boundaries and only this one differs
+            straddle.append(self._timed_write(boundary - half, self.write_size))
+            inside.append(self._timed_write(boundary - unit // 2 - half, self.write_size))
+
+        if not straddle:
+            return None
+        straddle_median = median(straddle)
+        inside_median = median(inside)
+        return {
+            'unit': unit,
+            'straddle_ms': straddle_median * 1000,
+            'inside_ms': inside_median * 1000,
+            'penalty': straddle_median / inside_median if inside_median else 0
+        }
+
+    def probe_shift(self, cluster_size, shift, count=None):
+        """Throughput of cluster-sized writes at cluster-aligned offsets vs. offsets moved by shift"""
+        count = count or self.samples
+        first = (-self.base) % cluster_size
+        positions = [first + index * cluster_size for index in range(1, (self.file_size - first) // cluster_size - 1)]
+        if not positions:
+            return None
+        step = max(1, len(positions) // count)
+        positions = positions[::step][:count]
+
+        aligned_time = shifted_time = 0.0
+        written = 0
+        for offset in positions:
+            if self.stop_check and self.stop_check():
+                break
+            aligned_time += self._timed_write(offset, cluster_size)
+            shifted_time += self._timed_write(offset + shift, cluster_size)
+            written += 1
+
+        total = written * cluster_size / (1024 * 1024)
+        aligned_mbps = total / aligned_time if aligned_time else 0
+        shifted_mbps = total / shifted_time if shifted_time else 0
+        return {
+            'cluster_size': cluster_size,
+            'shift': shift,
+            'aligned_mbps': aligned_mbps,
+            'shifted_mbps': shifted_mbps,
+            'cost': 1 - shifted_mbps / aligned_mbps if aligned_mbps else 0
+        }
+
+
+def guess_unit(unit_results, penalty_ratio, min_unit=None, max_unit=None):
+    """Largest unit in range whose boundaries carry a write penalty, None if none does
+
+    Midpoints of larger units are boundaries of the real unit as well, so
+    both positions pay the same penalty and it cancels out above the real size.
+    """
+    flagged = [result['unit'] for result in unit_results
+               if result['penalty'] >= penalty_ratio
+               and (min_unit is None or result['unit'] >= min_unit)
+               and (max_unit is None or result['unit'] <= max_unit)]
+    return max(flagged) if flagged else None
@@ -0,0 +1,68 @@
+"""Bad block tracking for USB Storage Tester"""
+
+import bisect
+
+
+class BadBlockMap:
+    """Interval map of failing byte ranges, merging adjacent bad blocks"""
+
+    def __init__(self):
+        # Sorted, non-overlapping, non-adjacent [start, end) ranges
+        self._starts = []
+        self._ends = []
+
+    def add(self, offset, length):
+        """Record a failing range, coalescing it with any touching ranges"""
+        if length <= 0:
+            return
+        start, end = offset, offset + length
+
+        # First range whose end reaches the new start, last range whose start reaches the new end
+        lo = bisect.bisect_left(self._ends, start)
+        hi = bisect.bisect_right(self._starts, end)
+
+        if lo < hi:
+            start = min(start, self._starts[lo])
+            end = max(end, self._ends[hi - 1])
+
+        self._starts[lo:hi] = [start]
+        self._ends[lo:hi] = [end]
+
+    def ranges(self):
+        """Return the coalesced ranges as (offset, length) tuples"""
+        return [(start, end - start) for start, end in zip(self._starts, self._ends)]
+
+    def total_bytes(self):
+        """Total number of bytes covered by bad ranges"""
+        return sum(end - start for start, end in zip(self._starts, self._ends))
+
+    def to_dict(self, block_size=None):
+        """Serialize the map for JSON reports"""
+        regions = []
+        for offset, length in self.ranges():
+            region = {'offset': offset, 'length': length}
+            if block_size:
+                region['first_block'] = offset // block_size
+                region['block_count'] = -(-length // block_size)
+            regions.append(region)
+
+        return {
+            'region_count': len(regions),
+            'total_bad_bytes': self.total_bytes(),
+            'block_size': block_size,
+            'regions': regions
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """Rebuild a map from its serialized form"""
+        bad_map = cls()
+        for region in (data or {}).get('regions', []):
+            bad_map.add(region['offset'], region['length'])
+        return bad_map
+
+    def __len__(self):
+        return len(self._starts)
+
+    def __bool__(self):
+        return bool(self._starts)
@@ -0,0 +1,64 @@
+"""Cooperative cancellation for USB Storage Tester"""
+
+import signal
+import threading
+from contextlib import contextmanager
+
+
+class CancelToken:
+    """Thread-safe cancellation flag shared by the I/O loops"""
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._callbacks = []
+        self.reason = None
+
+    def cancel(self, reason="requested"):
+        """Request cancellation, callbacks run only on the first request"""
+        if self._event.is_set():
+            return
+        self.reason = reason
+        self._event.set()
+        for callback in list(self._callbacks):
+            callback(reason)
+
+    def is_set(self):
+        """True once cancellation was requested"""
+        return self._event.is_set()
+
+    def reset(self):
+        """Clear the flag before the next test"""
+        self._event.clear()
+        self.reason = None
+
+    def on_cancel(self, callback):
+        """Register callback(reason) to run when cancellation is requested"""
+        self._callbacks.append(callback)
+
+
+@contextmanager
+def signal_handlers(token, signals=(signal.SIGINT, signal.SIGTERM)):
+    """Route SIGINT/SIGTERM into the token, a second signal interrupts immediately"""
+    # Signal handlers can only be installed from the main thread
+    if threading.current_thread() is not threading.main_thread():
+        yield token
+        return
+
+    def handler(signum, frame):
+        if token.is_set():
+            raise KeyboardInterrupt
+        token.cancel(signal.Signals(signum).name)
+        print(f"\n{signal.Signals(signum).name} received - stopping after the current chunk "
+              f"(press Ctrl+C again to abort immediately)")
+
+    previous = {}
+    for signum in signals:
+        try:
+            previous[signum] = signal.signal(signum, handler)
+        except (ValueError, OSError):
+            pass  # Not supported on this platform
+    try:
+        yield token
+    finally:
+        for signum, old_handler in previous.items():
+            signal.signal(signum, old_handler)
@@ -12,6 +12,64 @@ DEFAULT_BLOCK_SIZE_MB = 100
 SPEED_TEST_BLOCK_SIZE_MB = 10
 SPEED_TEST_ITERATIONS = 5
 MAX_CONCURRENT_OPERATIONS = 4
+BAD_REGION_RETEST_PASSES = 3  # Rewrite/re-read passes per bad region when retesting
+DATASET_BLOCK_SIZE_MB = 1     # Block size of the shared dataset used by comprehensive tests
+PATTERN_CACHE_MB = 64         # Upper bound for cached pattern buffers
+
+# Retention / read-disturb soak
+SOAK_DEFAULT_PASSES = 10
+SOAK_DATASET_SIZE_MB = 1024   # Capped at half of the free space
+
+# Sustained-write throttle detection
+SUSTAINED_WRITE_DEFAULT_MIN = 15
+SUSTAINED_WINDOW_SEC = 5          # Rolling throughput window
+SUSTAINED_BASELINE_WINDOWS = 6    # First windows that define the unthrottled speed
+SUSTAINED_FILE_MAX_GB = 8         # The test file is rewritten from the start once full
+THROTTLE_DROP = 0.3               # Drop below the baseline that counts as throttling
+
+# Trace replay
+TRACE_REPLAY_WORKERS = 4          # Operations in flight, like the recording application's queue depth
+TRACE_LATE_MS = 10                # Timed replay: operations issued later than this count as late
+TRACE_MAX_OP_MB = 64              # Largest single operation accepted from a trace
+
+# Host resource accounting (needs psutil)
+RESOURCE_SAMPLE_SEC = 1.0         # Sample interval, doubled whenever the sample cap is reached
+RESOURCE_MAX_SAMPLES = 3600
+
+# Durability (fsync) benchmark
+DURABILITY_WRITE_SIZES_KB = [4, 64, 1024]
+DURABILITY_ITERATIONS = 50
+FLUSH_MIN_PLAUSIBLE_MS = 0.25    # A real flush over USB needs at least a command round trip
+FLUSH_MAX_PLAUSIBLE_MBPS = 500   # Flushes implying more bandwidth than this are suspicious
+
+# Live telemetry (OpenMetrics), both disabled by default
+METRICS_HTTP_PORT = None          # e.g. 9877 to serve http://127.0.0.1:9877/metrics
+METRICS_TEXTFILE = None           # e.g. "/var/lib/node_exporter/usb_tester.prom"
+METRICS_TEXTFILE_INTERVAL_SEC = 5
+
+# Cancellation (Ctrl+C / SIGTERM)
+CANCEL_CHUNK_SIZE_MB = 4      # Largest single write between cancellation checks
+CANCEL_DEADLINE_SEC = 10      # A partial report is written at most this long after cancelling
+
+# Report comparison (regression gate)
+REGRESSION_THRESHOLDS = {
+    'speed': 0.10,    # Largest allowed relative drop in throughput
+    'latency': 0.25,  # Largest allowed relative rise in latency
+    'errors': 0       # Largest allowed absolute rise in error counts
+}
+
+# Alignment probe
+ALIGNMENT_PROBE_SIZE_MB = 64
+ALIGNMENT_UNITS_KB = [4, 8, 16, 32, 64, 128, 256, 512, 1024, 2048, 4096, 8192]
+ALIGNMENT_SAMPLES = 16           # Boundary writes per unit size
+ALIGNMENT_PENALTY_RATIO = 1.25   # Straddling writes this much slower mark a real boundary
+PAGE_SIZE_MAX_KB = 64            # Larger units are treated as erase blocks
+
+# Drive fingerprints (counterfeit detection)
+FINGERPRINT_HISTORY = 20              # Runs kept per model/firmware for typical values
+FINGERPRINT_SPEED_TOLERANCE = 0.5     # Flag speeds / cache size below half of the typical value
+CACHE_CLIFF_RATIO = 0.5               # Write cache is exhausted when throughput drops below this share
+COUNTERFEIT_CAPACITY_RATIO = 0.9      # Real capacity below this share of the reported size is counterfeit
 
 # File management
 DELETE_TEMP_FILES = False  # Set to True to auto-delete temp files after tests
@@ -22,16 +80,26 @@ BASE_DIR = Path(__file__).parent.parent
 LOGS_DIR = BASE_DIR / "usb_test_logs"
 REPORTS_DIR = BASE_DIR / "test_reports"
 TEMP_DIR = BASE_DIR / "temp_test_files"
+BASELINES_DIR = BASE_DIR / "baselines"  # Created when the first baseline is saved
+FINGERPRINTS_FILE = BASE_DIR / "drive_fingerprints.json"
+
 
-# Ensure directories exist
-for directory in [LOGS_DIR, REPORTS_DIR, TEMP_DIR]:
-    directory.mkdir(exist_ok=True)
+def ensure_dir(directory):
+    """Create a runtime directory on first use instead of at import time"""
+    directory.mkdir(parents=True, exist_ok=True)
+    return directory
 
-# Test patterns
+# Test patterns: the period each pattern repeats, None for generated patterns
 TEST_PATTERNS = {
     'zeros': b'\x00',
     'ones': b'\xFF',
     'alternating': b'\xAA',
-    'random': None,  # Generated dynamically
-    'incremental': None  # Generated dynamically
-}
\ No newline at end of file
+    'random': None,  # Fresh random data on every request
+    'incremental': bytes(range(256)),
+    'checkerboard': b'\xAA\x55',
+    'walking_ones': bytes(1 << bit for bit in range(8)),
+    'walking_zeros': bytes(0xFF ^ (1 << bit) for bit in range(8)),
+    'address_in_data': None  # Each 8-byte word holds its own offset
+}
+INTEGRITY_PATTERNS = ['zeros', 'ones', 'alternating', 'random', 'incremental',
+                      'checkerboard', 'walking_ones', 'walking_zeros', 'address_in_data']
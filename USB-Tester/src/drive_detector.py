@@ -2,19 +2,23 @@
 
 import os
 import sys
-import psutil
-import subprocess
+import functools
 from pathlib import Path
 
-try:
-    import wmi
-    import win32api  # type: ignore[import]
-    import win32file  # type: ignore[import]
-    WMI_AVAILABLE = True
-except ImportError:
-    WMI_AVAILABLE = False
-
 from .logger import Logger
+from .fingerprints import FingerprintStore
+
+@functools.lru_cache(maxsize=None)
+def _windows_modules():
+    """Import WMI and pywin32 on first use, None off Windows or when they are not installed"""
+    if sys.platform != "win32":
+        return None
+    try:
+        import wmi
+        import win32file  # type: ignore[import]
+    except ImportError:
+        return None
+    return wmi, win32file
 
 class DriveDetector:
     """USB drive detection and information gathering"""
@@ -22,13 +26,14 @@ class DriveDetector:
     def __init__(self, logger=None):
         self.logger = logger or Logger()
         self.drives = []
+        self.fingerprints = FingerprintStore(logger=self.logger)
     
     def scan_usb_drives(self):
         """Scan for USB storage devices"""
         self.logger.info("Scanning for USB storage devices...")
         self.drives = []
         
-        if sys.platform == "win32" and WMI_AVAILABLE:
+        if _windows_modules():
             self._scan_windows_drives()
         else:
             self._scan_cross_platform_drives()
@@ -38,11 +43,18 @@ class DriveDetector:
         else:
             self.logger.warning("No USB drives detected")
         
+        # Flag suspicious sticks before any long test is started on them
+        for drive in self.drives:
+            drive['fingerprint_warnings'] = self.fingerprints.check(drive)
+            for warning in drive['fingerprint_warnings']:
+                self.logger.warning(f"{drive['label']}: {warning}")
+        
         return self.drives
     
     def _scan_windows_drives(self):
         """Scan drives on Windows using WMI"""
         try:
+            wmi, _ = _windows_modules()
             c = wmi.WMI()
             
             # Get USB storage devices
@@ -59,6 +71,7 @@ class DriveDetector:
     def _scan_cross_platform_drives(self):
         """Scan drives using cross-platform method"""
         try:
+            import psutil
             partitions = psutil.disk_partitions()
             
             for partition in partitions:
@@ -79,7 +92,9 @@ class DriveDetector:
                 'size': int(disk.Size) if disk.Size else 0,
                 'model': disk.Model or 'Unknown',
                 'serial': disk.SerialNumber or 'Unknown',
+                'firmware': disk.FirmwareRevision or 'Unknown',
                 'interface': disk.InterfaceType or 'USB',
+                'device': f"PhysicalDrive{disk.Index}" if disk.Index is not None else None,
                 'vendor': 'Unknown',
                 'product': 'Unknown'
             }
@@ -103,27 +118,53 @@ class DriveDetector:
     def _get_cross_platform_drive_info(self, partition):
         """Get drive information using cross-platform method"""
         try:
+            import psutil
             usage = psutil.disk_usage(partition.mountpoint)
+            device = self._sysfs_device_info(partition.device)
             
             return {
                 'path': partition.mountpoint,
                 'label': partition.device,
+                'device': partition.device,
                 'size': usage.total,
-                'model': 'Unknown',
-                'serial': 'Unknown',
+                'model': device.get('model', 'Unknown'),
+                'serial': device.get('serial', 'Unknown'),
+                'firmware': device.get('rev', 'Unknown'),
                 'interface': 'USB',
-                'vendor': 'Unknown',
-                'product': 'Unknown'
+                'vendor': device.get('vendor', 'Unknown'),
+                'product': device.get('model', 'Unknown')
             }
             
         except Exception as e:
             self.logger.error(f"Error getting drive info for {partition.device}: {e}")
             return None
     
+    def _sysfs_device_info(self, device):
+        """Model, vendor, firmware revision and serial of a block device from sysfs (Linux only)"""
+        info = {}
+        block = Path('/sys/class/block') / Path(device).name
+        if not block.exists():
+            return info
+        
+        # Partitions have no device/ directory, the whole disk is their parent
+        disk = block.resolve()
+        if (disk / 'partition').exists():
+            disk = disk.parent
+        
+        for name in ('model', 'vendor', 'rev', 'serial'):
+            try:
+                value = (disk / 'device' / name).read_text(encoding='utf-8', errors='replace').strip()
+            except OSError:
+                continue
+            if value:
+                info[name] = value
+        return info
+    
     def _is_removable_drive(self, partition):
         """Check if partition is a removable drive"""
         try:
             if sys.platform == "win32":
+                _, win32file = _windows_modules()
                 drive_type = win32file.GetDriveType(partition.mountpoint)
                 return drive_type == win32file.DRIVE_REMOVABLE
             else:
@@ -133,16 +174,58 @@ class DriveDetector:
         except:
             return False
     
+    def get_cluster_size(self, drive_path):
+        """Filesystem allocation unit of a drive in bytes, None if it cannot be determined"""
+        try:
+            if sys.platform == "win32":
+                import ctypes
+                sectors_per_cluster = ctypes.c_ulong()
+                bytes_per_sector = ctypes.c_ulong()
+                free_clusters = ctypes.c_ulong()
+                total_clusters = ctypes.c_ulong()
+                root = os.path.splitdrive(drive_path)[0] + '\\'
+                if ctypes.windll.kernel32.GetDiskFreeSpaceW(ctypes.c_wchar_p(root), ctypes.byref(sectors_per_cluster),
+                                                            ctypes.byref(bytes_per_sector), ctypes.byref(free_clusters),
+                                                            ctypes.byref(total_clusters)):
+                    return sectors_per_cluster.value * bytes_per_sector.value
+                return None
+            return os.statvfs(drive_path).f_bsize
+        except Exception as e:
+            self.logger.debug(f"Could not determine cluster size of {drive_path}: {e}")
+            return None
+    
+    def get_partition_offset(self, drive):
+        """Byte offset of the drive's partition from the start of the device, None if unknown"""
+        try:
+            if _windows_modules():
+                wmi, _ = _windows_modules()
+                c = wmi.WMI()
+                for logical_disk in c.Win32_LogicalDisk(DeviceID=drive['path'].rstrip('\\')):
+                    for partition in logical_disk.associators("Win32_LogicalDiskToPartition"):
+                        return int(partition.StartingOffset)
+                return None
+            
+            # Linux reports the partition start in 512-byte sectors
+            start = Path('/sys/class/block') / Path(drive.get('device') or drive['label']).name / 'start'
+            if start.exists():
+                return int(start.read_text().strip()) * 512
+            return None
+        except Exception as e:
+            self.logger.debug(f"Could not determine partition offset of {drive['path']}: {e}")
+            return None
+    
     def get_drive_filesystem(self, drive_path):
         """Get the filesystem type of a drive"""
         try:
-            if sys.platform == "win32" and WMI_AVAILABLE:
+            if _windows_modules():
+                wmi, _ = _windows_modules()
                 c = wmi.WMI()
                 for logical_disk in c.Win32_LogicalDisk():
                     if logical_disk.DeviceID == drive_path.rstrip('\\'):
                         return logical_disk.FileSystem
             else:
                 # For cross-platform, try to get filesystem info
+                import psutil
                 partitions = psutil.disk_partitions()
                 for partition in partitions:
                     if partition.mountpoint == drive_path:
@@ -164,6 +247,7 @@ class DriveDetector:
             self.logger.info(f"Formatting drive {drive_path} with {filesystem} filesystem...")
             
             if sys.platform == "win32":
+                import subprocess
                 drive_letter = drive_path.rstrip('\\:')
                 if not drive_letter.endswith(':'):
                     drive_letter += ':'
@@ -222,7 +306,10 @@ class DriveDetector:
             print(f"   Size: {size_gb:.2f} GB")
             print(f"   Model: {drive['model']}")
             print(f"   Serial: {drive['serial']}")
+            print(f"   Firmware: {drive.get('firmware', 'Unknown')}")
             print(f"   Interface: {drive['interface']}")
+            for warning in drive.get('fingerprint_warnings', []):
+                print(f"   ⚠️  Suspicious: {warning}")
         
         print(f"\n{'='*80}")
     
@@ -0,0 +1,217 @@
+"""Known-good drive fingerprints for USB Storage Tester"""
+
+import os
+import json
+from datetime import datetime
+from .metrics import median
+from .config import (FINGERPRINTS_FILE, FINGERPRINT_HISTORY, FINGERPRINT_SPEED_TOLERANCE,
+                     CACHE_CLIFF_RATIO, COUNTERFEIT_CAPACITY_RATIO)
+
+# Speed metrics kept per fingerprint, taken from the speed test results
+SPEED_METRICS = {
+    'sequential_write': 'sequential_write_avg',
+    'sequential_read': 'sequential_read_avg',
+    'random_write': 'random_write_avg',
+    'random_read': 'random_read_avg'
+}
+
+
+def fingerprint_key(drive):
+    """Store key for a drive, None when the model is not known"""
+    model = drive.get('model') or 'Unknown'
+    if model == 'Unknown':
+        return None
+    return f"{model}|{drive.get('firmware') or 'Unknown'}"
+
+
+def detect_cache_cliff(samples, interval=1.0, ratio=CACHE_CLIFF_RATIO):
+    """Bytes written before throughput falls to ratio of its initial plateau, None if it never does
+
+    Two consecutive samples below the threshold are required so a single
+    stall does not count as a cliff.
+    """
+    if len(samples) < 4:
+        return None
+
+    plateau = median(sample['mbps'] for sample in samples[:3])
+    written_mb = 0.0
+    for current, following in zip(samples, samples[1:]):
+        if current['mbps'] < plateau * ratio and following['mbps'] < plateau * ratio:
+            return int(written_mb * 1024 * 1024)
+        written_mb += current['mbps'] * interval
+    return None
+
+
+def bad_regions(capacity_results):
+    """Bad regions found by a capacity test, empty when it found none"""
+    bad_block_map = capacity_results.get('bad_block_map') if capacity_results else None
+    return (bad_block_map or {}).get('regions') or []
+
+
+def real_capacity(capacity_results):
+    """Approximate usable drive capacity in bytes, None when the run cannot tell
+
+    Only a 'full' capacity run fills the drive, a fast run tests at most a
+    small file and a bad block in it says nothing about the capacity. The
+    first bad offset is inside the test file, so the space used before the
+    test is added to place it on the drive.
+    """
+    regions = bad_regions(capacity_results)
+    if not regions or capacity_results.get('capacity_mode') != 'full':
+        return None
+    return capacity_results.get('used_before_test', 0) + regions[0]['offset']
+
+
+class FingerprintStore:
+    """Per model and firmware record of verified capacity, speeds and cache-cliff position
+
+    The store is a small JSON file that is re-read on every call, so several
+    testers (or instances) can share it without holding state.
+    """
+
+    def __init__(self, path=FINGERPRINTS_FILE, logger=None):
+        self.path = path
+        self.logger = logger
+
+    def load(self):
+        """All fingerprints keyed by 'model|firmware'"""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f).get('fingerprints', {})
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            if self.logger:
+                self.logger.warning(f"Could not read fingerprint store {self.path}: {e}")
+            return {}
+
+    def save(self, fingerprints):
+        """Write the store next to its target and rename it into place"""
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': 1, 'fingerprints': fingerprints}, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def get(self, drive):
+        """Fingerprint for a drive, None if its model and firmware were never recorded"""
+        key = fingerprint_key(drive)
+        return self.load().get(key) if key else None
+
+    def check(self, drive):
+        """Warnings for a newly detected drive, based only on what it reports"""
+        fingerprint = self.get(drive)
+        if not fingerprint:
+            return []
+
+        warnings = []
+        size = drive.get('size') or 0
+        known_sizes = fingerprint['reported_sizes']
+
+        if fingerprint['counterfeit_runs']:
+            real = fingerprint['min_real_capacity'] / (1024**3)
+            warnings.append(f"{fingerprint['counterfeit_runs']} earlier drive(s) with this model/firmware "
+                            f"were counterfeit (real capacity {real:.2f} GB)")
+
+        if known_sizes and size > max(known_sizes) * 1.01:
+            warnings.append(f"reports {size / (1024**3):.2f} GB, known drives of this model/firmware "
+                            f"report at most {max(known_sizes) / (1024**3):.2f} GB")
+
+        return warnings
+
+    def compare(self, drive, all_results):
+        """Warnings for a finished run compared with the typical values of its model"""
+        fingerprint = self.get(drive) or {}
+        tests = all_results.get('tests', {})
+        speed = tests.get('speed_test') or {}
+
+        warnings = []
+        for name, result_key in SPEED_METRICS.items():
+            history = fingerprint.get('speeds', {}).get(name)
+            if history and speed.get(result_key) is not None:
+                typical = median(history)
+                if speed[result_key] < typical * (1 - FINGERPRINT_SPEED_TOLERANCE):
+                    warnings.append(f"{name.replace('_', ' ')} {speed[result_key]:.2f} MB/s is far below "
+                                    f"the typical {typical:.2f} MB/s for this model")
+
+        cliff = self._cache_cliff(all_results)
+        history = fingerprint.get('cache_cliff_bytes')
+        if cliff is not None and history:
+            typical = median(history)
+            if cliff < typical * (1 - FINGERPRINT_SPEED_TOLERANCE):
+                warnings.append(f"write cache runs out after {cliff / (1024**2):.0f} MB, "
+                                f"typical for this model is {typical / (1024**2):.0f} MB")
+
+        capacity = real_capacity(tests.get('capacity_test'))
+        if capacity is not None and capacity < (drive.get('size') or 0) * COUNTERFEIT_CAPACITY_RATIO:
+            warnings.append(f"only about {capacity / (1024**3):.2f} GB usable before the first bad region")
+
+        return warnings
+
+    def record(self, drive, all_results):
+        """Add a completed run to the fingerprint of its model and firmware"""
+        key = fingerprint_key(drive)
+        if not key:
+            return None
+
+        fingerprints = self.load()
+        fingerprint = fingerprints.setdefault(key, {
+            'model': drive.get('model'),
+            'firmware': drive.get('firmware') or 'Unknown',
+            'runs': 0,
+            'genuine_runs': 0,
+            'counterfeit_runs': 0,
+            'reported_sizes': [],
+            'max_verified_capacity': None,
+            'min_real_capacity': None,
+            'speeds': {},
+            'cache_cliff_bytes': []
+        })
+        tests = all_results.get('tests', {})
+        size = drive.get('size') or 0
+
+        fingerprint['runs'] += 1
+        fingerprint['updated'] = datetime.now().isoformat()
+
+        capacity = tests.get('capacity_test')
+        real = real_capacity(capacity)
+        if real is not None and real < size * COUNTERFEIT_CAPACITY_RATIO:
+            # Counterfeit sizes are not what genuine drives of this model report
+            fingerprint['counterfeit_runs'] += 1
+            previous = fingerprint['min_real_capacity']
+            fingerprint['min_real_capacity'] = real if previous is None else min(previous, real)
+        else:
+            fingerprint['genuine_runs'] += 1
+            if size and size not in fingerprint['reported_sizes']:
+                fingerprint['reported_sizes'].append(size)
+            # A fast run verifies a small file, only a full run shows what the drive holds
+            if capacity and capacity.get('capacity_mode') == 'full' and not bad_regions(capacity):
+                verified = capacity.get('total_size_tested', 0)
+                fingerprint['max_verified_capacity'] = max(fingerprint['max_verified_capacity'] or 0, verified)
+
+            speed = tests.get('speed_test')
+            if speed:
+                for name, result_key in SPEED_METRICS.items():
+                    if speed.get(result_key):
+                        history = fingerprint['speeds'].setdefault(name, [])
+                        history.append(speed[result_key])
+                        del history[:-FINGERPRINT_HISTORY]
+
+            cliff = self._cache_cliff(all_results)
+            if cliff is not None:
+                fingerprint['cache_cliff_bytes'].append(cliff)
+                del fingerprint['cache_cliff_bytes'][:-FINGERPRINT_HISTORY]
+
+        try:
+            self.save(fingerprints)
+        except OSError as e:
+            if self.logger:
+                self.logger.warning(f"Could not update fingerprint store {self.path}: {e}")
+            return None
+        return fingerprint
+
+    @staticmethod
+    def _cache_cliff(all_results):
+        series = (all_results.get('dataset') or {}).get('timing', {}).get('write_series')
+        if not series:
+            return None
+        return detect_cache_cliff(series['samples'], series.get('interval_sec', 1.0))
@@ -6,20 +6,26 @@ from datetime import datetime
 from pathlib import Path
 from colorama import Fore, Style, init
 
-from .config import LOGS_DIR
+from .config import LOGS_DIR, ensure_dir
 
-# Initialize colorama
-init(autoreset=True)
+_colorama_initialized = False
+
+def _init_colorama():
+    """Initialize colorama once, when the first logger is created rather than at import"""
+    global _colorama_initialized
+    if not _colorama_initialized:
+        init(autoreset=True)
+        _colorama_initialized = True
 
 class Logger:
     """Enhanced logging with colors and file output"""
     
     def __init__(self, log_file=None):
+        _init_colorama()
         self.log_file = log_file
         if log_file:
-            self.log_path = LOGS_DIR / log_file
             # Ensure log directory exists
-            self.log_path.parent.mkdir(exist_ok=True)
+            self.log_path = ensure_dir(LOGS_DIR) / log_file
     
     def _write_to_file(self, message):
         """Write message to log file"""
@@ -22,11 +22,16 @@ class Menu:
         print(f"{Fore.CYAN}5.{Style.RESET_ALL} 💾 Run full capacity test only")
         print(f"{Fore.CYAN}6.{Style.RESET_ALL} 🔍 Run comprehensive test fast")
         print(f"{Fore.CYAN}7.{Style.RESET_ALL} 🔍 Run comprehensive test detailed")
-        print(f"{Fore.CYAN}8.{Style.RESET_ALL} 📋 View test logs")
-        print(f"{Fore.CYAN}9.{Style.RESET_ALL} 📄 View test reports")
-        print(f"{Fore.CYAN}10.{Style.RESET_ALL} 🚪 Exit")
+        print(f"{Fore.CYAN}8.{Style.RESET_ALL} 🔒 Run durability (fsync) benchmark")
+        print(f"{Fore.CYAN}9.{Style.RESET_ALL} 🔁 Run retention soak")
+        print(f"{Fore.CYAN}10.{Style.RESET_ALL} 📐 Run alignment probe")
+        print(f"{Fore.CYAN}11.{Style.RESET_ALL} 🌡️  Run sustained write (throttle detection)")
+        print(f"{Fore.CYAN}12.{Style.RESET_ALL} 🎞️  Replay recorded I/O trace")
+        print(f"{Fore.CYAN}13.{Style.RESET_ALL} 📋 View test logs")
+        print(f"{Fore.CYAN}14.{Style.RESET_ALL} 📄 View test reports")
+        print(f"{Fore.CYAN}15.{Style.RESET_ALL} 🚪 Exit")
     
-    def get_user_choice(self, max_choice=10):
+    def get_user_choice(self, max_choice=15):
         """Get and validate user choice"""
         try:
             choice = input(f"\nEnter your choice (1-{max_choice}): ").strip()
@@ -43,7 +48,8 @@ class Menu:
         print(f"\n{Fore.YELLOW}Select a drive to test:{Style.RESET_ALL}")
         for i, drive in enumerate(drives, 1):
             size_gb = drive['size'] / (1024**3) if drive['size'] > 0 else 0
-            print(f"{Fore.CYAN}{i}.{Style.RESET_ALL} {drive['label']} ({size_gb:.2f} GB) - {drive['path']}")
+            suspicious = f" {Fore.RED}[SUSPICIOUS]{Style.RESET_ALL}" if drive.get('fingerprint_warnings') else ""
+            print(f"{Fore.CYAN}{i}.{Style.RESET_ALL} {drive['label']} ({size_gb:.2f} GB) - {drive['path']}{suspicious}")
         
         try:
             choice = int(input(f"\nEnter drive number (1-{len(drives)}): "))
@@ -68,6 +74,47 @@ class Menu:
         confirmation = input(f"\nType 'YES' to confirm: ").strip().upper()
         return confirmation == 'YES'
     
+    def confirm_bad_region_retest(self, region_count):
+        """Ask whether to retest bad regions before the drive is restored"""
+        answer = input(f"\n{Fore.YELLOW}Retest {region_count} bad region(s) before restoring the drive? (y/N): {Style.RESET_ALL}").strip().lower()
+        return answer in ('y', 'yes')
+    
+    def get_soak_limits(self, default_passes):
+        """Ask for the soak length, returns (passes, hours)"""
+        answer = input(f"\nNumber of passes, or hours with an 'h' suffix (default {default_passes}): ").strip().lower()
+        try:
+            if not answer:
+                return default_passes, None
+            if answer.endswith('h'):
+                return None, float(answer[:-1])
+            return int(answer), None
+        except ValueError:
+            self.logger.error("Invalid input, using the default")
+            return default_passes, None
+    
+    def get_sustained_minutes(self, default_minutes):
+        """Ask for the sustained write duration in minutes"""
+        answer = input(f"\nDuration in minutes (default {default_minutes}): ").strip()
+        try:
+            return float(answer) if answer else default_minutes
+        except ValueError:
+            self.logger.error("Invalid input, using the default")
+            return default_minutes
+    
+    def get_trace_replay_options(self, default_workers):
+        """Ask for the trace file, replay mode and worker count, returns (path, timed, workers)"""
+        trace_path = input("\nTrace file (CSV or binary): ").strip().strip('"')
+        if not trace_path:
+            return None, False, default_workers
+        timed = input("Replay at the recorded timing instead of as fast as possible? (y/N): ").strip().lower() in ('y', 'yes')
+        answer = input(f"Number of workers (default {default_workers}): ").strip()
+        try:
+            workers = int(answer) if answer else default_workers
+        except ValueError:
+            self.logger.error("Invalid input, using the default")
+            workers = default_workers
+        return trace_path, timed, max(1, workers)
+    
     def pause(self, message="Press Enter to continue..."):
         """Pause execution and wait for user input"""
         input(f"\n{message}")
\ No newline at end of file
@@ -0,0 +1,159 @@
+"""Lightweight timing metrics for USB Storage Tester"""
+
+import math
+
+
+def median(values):
+    """Median of a non-empty sequence, without importing statistics at startup"""
+    ordered = sorted(values)
+    middle = len(ordered) // 2
+    return ordered[middle] if len(ordered) % 2 else (ordered[middle - 1] + ordered[middle]) / 2
+
+
+def percentile(values, pct):
+    """Exact percentile of a non-empty sequence, linearly interpolated between samples"""
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+class ThroughputSeries:
+    """Throughput time series, aggregated into fixed intervals to keep memory flat"""
+
+    def __init__(self, interval=1.0):
+        self.interval = interval
+        self.samples = []  # (elapsed_sec, MB/s)
+        self.total_bytes = 0
+        self.total_time = 0.0
+        self._window_bytes = 0
+        self._window_time = 0.0
+
+    def add(self, nbytes, elapsed):
+        """Account one I/O of nbytes that took elapsed seconds"""
+        self.total_bytes += nbytes
+        self.total_time += elapsed
+        self._window_bytes += nbytes
+        self._window_time += elapsed
+        if self._window_time >= self.interval:
+            self._flush_window()
+
+    def finish(self):
+        """Flush the last partial interval"""
+        if self._window_time > 0:
+            self._flush_window()
+
+    def _flush_window(self):
+        mbps = self._window_bytes / self._window_time / (1024 * 1024)
+        self.samples.append((round(self.total_time, 3), mbps))
+        self._window_bytes = 0
+        self._window_time = 0.0
+
+    def average(self):
+        """Average MB/s over everything added so far"""
+        if self.total_time <= 0:
+            return 0
+        return self.total_bytes / self.total_time / (1024 * 1024)
+
+    def to_dict(self):
+        """Serialize for JSON reports"""
+        return {
+            'interval_sec': self.interval,
+            'total_bytes': self.total_bytes,
+            'total_time_sec': self.total_time,
+            'average_mbps': self.average(),
+            'samples': [{'t': t, 'mbps': mbps} for t, mbps in self.samples]
+        }
+
+
+class LatencyHistogram:
+    """Log2-bucketed latency histogram in microseconds"""
+
+    BUCKET_COUNT = 32  # 1 us .. ~35 minutes
+
+    def __init__(self):
+        self.buckets = [0] * self.BUCKET_COUNT
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def add(self, seconds):
+        """Record one latency sample"""
+        micros = seconds * 1_000_000
+        index = 0 if micros < 1 else min(int(math.log2(micros)) + 1, self.BUCKET_COUNT - 1)
+        self.buckets[index] += 1
+        self.count += 1
+        self.total += seconds
+        if self.min is None or seconds < self.min:
+            self.min = seconds
+        if self.max is None or seconds > self.max:
+            self.max = seconds
+
+    @classmethod
+    def from_dict(cls, data):
+        """Rebuild a histogram from its to_dict() form, e.g. read back from a JSON report"""
+        histogram = cls()
+        for bucket in data.get('buckets', []):
+            index = round(math.log2(bucket['le_ms'] * 1000))
+            histogram.buckets[index] += bucket['count']
+        histogram.count = data.get('count', sum(histogram.buckets))
+        histogram.total = data.get('mean_ms', 0) / 1000 * histogram.count
+        histogram.min = data.get('min_ms', 0) / 1000
+        histogram.max = data.get('max_ms', 0) / 1000
+        return histogram
+
+    def merge(self, other):
+        """Add all samples of another histogram"""
+        for index, count in enumerate(other.buckets):
+            self.buckets[index] += count
+        self.count += other.count
+        self.total += other.total
+        if other.min is not None and (self.min is None or other.min < self.min):
+            self.min = other.min
+        if other.max is not None and (self.max is None or other.max > self.max):
+            self.max = other.max
+
+    @staticmethod
+    def bucket_upper_bound(index):
+        """Upper bound of a bucket in seconds"""
+        return (2 ** index) / 1_000_000
+
+    def percentile(self, pct):
+        """Approximate percentile in seconds, interpolated linearly inside the matching bucket
+
+        Bucket bounds double, so returning a bound would turn a sample moving
+        into the next bucket into a 2x change.
+        """
+        if not self.count:
+            return 0
+        target = self.count * pct / 100
+        running = 0
+        for index, bucket in enumerate(self.buckets):
+            if bucket and running + bucket >= target:
+                lower = self.bucket_upper_bound(index - 1) if index else 0.0
+                upper = self.bucket_upper_bound(index)
+                value = lower + (upper - lower) * (target - running) / bucket
+                return min(max(value, self.min), self.max)
+            running += bucket
+        return self.max
+
+    def mean(self):
+        """Mean latency in seconds"""
+        return self.total / self.count if self.count else 0
+
+    def to_dict(self):
+        """Serialize for JSON reports, latencies in milliseconds"""
+        return {
+            'count': self.count,
+            'mean_ms': self.mean() * 1000,
+            'min_ms': (self.min or 0) * 1000,
+            'max_ms': (self.max or 0) * 1000,
+            'p50_ms': self.percentile(50) * 1000,
+            'p99_ms': self.percentile(99) * 1000,
+            'buckets': [
+                {'le_ms': self.bucket_upper_bound(i) * 1000, 'count': n}
+                for i, n in enumerate(self.buckets) if n
+            ]
+        }
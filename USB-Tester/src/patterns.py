@@ -0,0 +1,74 @@
+"""Cached test pattern buffers for USB Storage Tester"""
+
+import os
+import sys
+import threading
+from array import array
+from collections import OrderedDict
+from .config import TEST_PATTERNS, PATTERN_CACHE_MB
+
+
+def _tile(period, size):
+    """Repeat a short period until it covers size bytes"""
+    return (period * -(-size // len(period)))[:size]
+
+
+def _address_in_data(size):
+    """Every 8-byte word holds its own byte offset, little-endian, so misplaced data is self-identifying"""
+    words = array('Q', range(0, size + 7, 8))
+    if sys.byteorder == 'big':
+        words.byteswap()
+    return words.tobytes()[:size]
+
+
+class PatternGenerator:
+    """Builds each pattern once and hands out zero-copy memoryview slices
+
+    Buffers are kept in a small LRU bounded by PATTERN_CACHE_MB. A request
+    larger than the cached buffer rebuilds it at the new size; shorter
+    requests are served as a slice of the cached buffer.
+    """
+
+    def __init__(self, max_bytes=PATTERN_CACHE_MB * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._cache = OrderedDict()  # pattern name -> bytes
+        self._cached_bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, pattern_name, size):
+        """memoryview of size bytes of the pattern, 'random' is fresh on every call"""
+        if pattern_name not in TEST_PATTERNS or pattern_name == 'random':
+            return memoryview(os.urandom(size))
+
+        with self._lock:
+            buffer = self._cache.get(pattern_name)
+            if buffer is not None and len(buffer) >= size:
+                self._cache.move_to_end(pattern_name)
+                return memoryview(buffer)[:size]
+
+        buffer = self._build(pattern_name, size)
+
+        with self._lock:
+            previous = self._cache.pop(pattern_name, None)
+            if previous is not None:
+                self._cached_bytes -= len(previous)
+            if len(buffer) <= self.max_bytes:
+                self._cache[pattern_name] = buffer
+                self._cached_bytes += len(buffer)
+                while self._cached_bytes > self.max_bytes:
+                    _, evicted = self._cache.popitem(last=False)
+                    self._cached_bytes -= len(evicted)
+
+        return memoryview(buffer)
+
+    def clear(self):
+        """Drop all cached buffers"""
+        with self._lock:
+            self._cache.clear()
+            self._cached_bytes = 0
+
+    @staticmethod
+    def _build(pattern_name, size):
+        if pattern_name == 'address_in_data':
+            return _address_in_data(size)
+        return _tile(TEST_PATTERNS[pattern_name], size)
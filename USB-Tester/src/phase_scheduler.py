@@ -0,0 +1,242 @@
+"""Single-write phase scheduler for comprehensive tests"""
+
+import time
+import random
+import shutil
+from pathlib import Path
+from datetime import datetime
+from .config import DATASET_BLOCK_SIZE_MB, INTEGRITY_PATTERNS
+from .progress_bar import ProgressBar
+from .bad_block_map import BadBlockMap
+from .dataset import VerifiableDataset
+from .metrics import ThroughputSeries, LatencyHistogram
+
+
+class PhaseScheduler:
+    """Runs the speed, integrity and capacity phases on one shared dataset write
+
+    The drive is written exactly once. The speed phase takes its sequential
+    numbers from that write and from the verify read, the integrity phase
+    checks the pattern blocks inside the dataset, and the capacity phase
+    reuses the same verify pass for its bad-block map.
+    """
+
+    # Fraction of free space and absolute cap per capacity mode
+    CAPACITY_MODES = {
+        'fast': (0.1, 1024 * 1024 * 1024),
+        'full': (0.9, None)
+    }
+
+    def __init__(self, runner):
+        self.runner = runner
+        self.logger = runner.logger
+        self.phase = None
+        self.dataset = None
+        self.tests = {'speed_test': None, 'integrity_test': None, 'capacity_test': None}
+        self.timing = None
+        self.per_pattern = None
+        self.bad_blocks = None
+        self.metrics = None
+        self.capacity_mode = None
+        self.used_before_test = 0
+
+    def run(self, drive, capacity_mode='fast'):
+        """Run all phases and return results in the per-test report layout"""
+        fraction, cap = self.CAPACITY_MODES[capacity_mode]
+        total, used, free = shutil.disk_usage(drive['path'])
+        self.capacity_mode = capacity_mode
+        self.used_before_test = used
+        test_size = free * fraction
+        if cap:
+            test_size = min(test_size, cap)
+
+        block_size = DATASET_BLOCK_SIZE_MB * 1024 * 1024
+        test_file = Path(drive['path']) / f"dataset_test_{datetime.now().strftime('%Y%m%d_%H%M%S')}.tmp"
+        dataset = VerifiableDataset(test_file, test_size, block_size, INTEGRITY_PATTERNS,
+                                    self.runner._generate_test_pattern)
+
+        # Kept on the scheduler so a cancelled run can snapshot partial results
+        tests = self.tests
+        timing = {
+            'write_series': ThroughputSeries(),
+            'read_series': ThroughputSeries(),
+            'write_latency': LatencyHistogram(),
+            'read_latency': LatencyHistogram()
+        }
+        self.dataset = dataset
+        self.timing = timing
+        self.metrics = self.runner._telemetry(drive, 'dataset_write')
+
+        try:
+            self.phase = 'write'
+            self.logger.info("=== PHASE 1: SHARED DATASET WRITE ===")
+            self.logger.info(f"Writing {dataset.block_count} blocks ({test_size / (1024*1024):.1f} MB) once for all phases...")
+            with self.runner.profiler.phase('dataset_write'):
+                write_time = self._write_phase(dataset, timing)
+            if self.runner.stop_requested or not dataset.blocks_written:
+                return tests, self._dataset_info(dataset, timing)
+
+            self.phase = 'random_access'
+            self.metrics.set_phase('random_access')
+            self.logger.info("=== PHASE 2: RANDOM ACCESS ON SHARED DATASET ===")
+            with self.runner.profiler.phase('random_access'):
+                random_results = self._random_access_phase(dataset)
+                access_time = self.runner._test_access_time(test_file)
+
+            self.phase = 'verify'
+            self.metrics.set_phase('dataset_verify')
+            self.logger.info("=== PHASE 3: SHARED VERIFY PASS ===")
+            bad_blocks = BadBlockMap()
+            with self.runner.profiler.phase('dataset_verify'):
+                per_pattern, read_time = self._verify_phase(dataset, timing, bad_blocks)
+            if self.runner.stop_requested:
+                return tests, self._dataset_info(dataset, timing)
+
+            # Device speeds from the per-block I/O times, pattern generation and hashing excluded
+            write_speed = timing['write_series'].total_bytes / write_time / (1024 * 1024) if write_time else 0
+            read_bytes = timing['read_series'].total_bytes
+            read_speed = read_bytes / read_time / (1024 * 1024) if read_time else 0
+
+            tests['speed_test'] = {
+                'sequential_write_avg': write_speed,
+                'sequential_read_avg': read_speed,
+                'random_write_avg': random_results['write'],
+                'random_read_avg': random_results['read'],
+                'access_time_avg': access_time
+            }
+            tests['integrity_test'] = self._integrity_results(per_pattern)
+            verified = sum(counts['passed'] for counts in per_pattern.values())
+            tests['capacity_test'] = self._capacity_results(dataset, bad_blocks, verified, write_speed, read_speed)
+
+            self.runner._display_speed_results(tests['speed_test'])
+            self.runner._display_integrity_results(tests['integrity_test'])
+            self.runner._display_capacity_results(tests['capacity_test'])
+
+            self.phase = 'complete'
+            return tests, self._dataset_info(dataset, timing)
+
+        except Exception as e:
+            self.logger.error(f"Shared dataset pipeline failed: {e}")
+            return tests, self._dataset_info(dataset, timing)
+        finally:
+            self.runner._cleanup_temp_file(test_file, "Shared dataset file")
+
+    def _write_phase(self, dataset, timing):
+        """Write the dataset once, returns the time spent in write calls plus the final flush"""
+        progress = ProgressBar(dataset.block_count, "Writing Shared Dataset")
+
+        def on_block(index, nbytes, elapsed):
+            timing['write_series'].add(nbytes, elapsed)
+            timing['write_latency'].add(elapsed)
+            self.metrics.record_write(nbytes, elapsed)
+            progress.update(index + 1)
+
+        flush_time = dataset.write(lambda: self.runner.stop_requested, on_block)
+        timing['write_series'].finish()
+        progress.complete()
+        return timing['write_series'].total_time + flush_time
+
+    def _random_access_phase(self, dataset, operations=10):
+        """Random block rewrites and reads inside the dataset, content stays verifiable"""
+        write_times = []
+        read_times = []
+
+        with open(dataset.path, 'r+b') as f:
+            for _ in range(operations):
+                write_times.append(dataset.rewrite_block(f, random.randrange(dataset.blocks_written)))
+
+            for _ in range(operations):
+                index = random.randrange(dataset.blocks_written)
+                start_time = time.perf_counter()
+                f.seek(index * dataset.block_size)
+                f.read(dataset.block_size)
+                read_times.append(time.perf_counter() - start_time)
+
+        avg_write_time = sum(write_times) / len(write_times)
+        avg_read_time = sum(read_times) / len(read_times)
+        return {
+            'write': dataset.block_size / avg_write_time / (1024 * 1024) if avg_write_time else 0,
+            'read': dataset.block_size / avg_read_time / (1024 * 1024) if avg_read_time else 0
+        }
+
+    def _verify_phase(self, dataset, timing, bad_blocks):
+        """Read everything back once, returns per-pattern counts and the time spent in read calls"""
+        progress = ProgressBar(dataset.blocks_written, "Verifying Shared Dataset")
+        per_pattern = {name: {'passed': 0, 'failed': 0} for name in dataset.patterns}
+        self.per_pattern = per_pattern
+        self.bad_blocks = bad_blocks
+
+        def on_block(index, nbytes, elapsed, ok):
+            timing['read_series'].add(nbytes, elapsed)
+            timing['read_latency'].add(elapsed)
+            self.metrics.record_read(nbytes, elapsed)
+            if not ok:
+                self.metrics.record_error()
+            per_pattern[dataset.pattern_for(index)]['passed' if ok else 'failed'] += 1
+            progress.update(index + 1)
+
+        dataset.verify(lambda: self.runner.stop_requested, on_block, bad_blocks)
+        timing['read_series'].finish()
+        progress.complete()
+        return per_pattern, timing['read_series'].total_time
+
+    def _integrity_results(self, per_pattern):
+        """Integrity results from the pattern blocks of the shared dataset, counted in blocks instead of files"""
+        results = {
+            'patterns_tested': len(per_pattern),
+            'blocks_tested': sum(p['passed'] + p['failed'] for p in per_pattern.values()),
+            'verification_passed': sum(p['passed'] for p in per_pattern.values()),
+            'verification_failed': sum(p['failed'] for p in per_pattern.values()),
+            'per_pattern': per_pattern,
+            'errors': []
+        }
+        for name, counts in per_pattern.items():
+            if counts['failed']:
+                results['errors'].append(f"{counts['failed']} '{name}' block(s) failed verification")
+        return results
+
+    def _capacity_results(self, dataset, bad_blocks, verified, write_speed, read_speed):
+        """Capacity results from the shared verify pass"""
+        block_size = dataset.block_size
+        results = {
+            'total_size_tested': dataset.size,
+            'capacity_mode': self.capacity_mode,
+            'used_before_test': self.used_before_test,
+            'test_file': str(dataset.path),
+            'block_size': block_size,
+            'blocks_written': dataset.blocks_written,
+            'blocks_verified': verified,
+            'write_speed': write_speed,
+            'verify_speed': read_speed,
+            'bad_block_map': bad_blocks.to_dict(block_size),
+            'errors': []
+        }
+        for offset, length in bad_blocks.ranges():
+            error_msg = (f"Verification failed at blocks {offset // block_size}-{(offset + length) // block_size - 1} "
+                         f"({length / (1024*1024):.1f} MB at offset {offset})")
+            results['errors'].append(error_msg)
+            self.logger.error(error_msg)
+        return results
+
+    def snapshot(self):
+        """Results gathered so far, safe to call from another thread while a phase runs"""
+        if self.dataset is None:
+            return dict(self.tests), None
+
+        per_pattern = {name: dict(counts) for name, counts in (self.per_pattern or {}).items()}
+        info = self._dataset_info(self.dataset, self.timing)
+        info['verification_status'] = {
+            'phase': self.phase,
+            'blocks_written': self.dataset.blocks_written,
+            'blocks_verified': sum(c['passed'] for c in per_pattern.values()),
+            'blocks_failed': sum(c['failed'] for c in per_pattern.values()),
+            'per_pattern': per_pattern,
+            'bad_block_map': self.bad_blocks.to_dict(self.dataset.block_size) if self.bad_blocks is not None else None
+        }
+        return dict(self.tests), info
+
+    def _dataset_info(self, dataset, timing):
+        """Dataset metadata and shared timing for the report"""
+        info = dataset.to_dict()
+        info['timing'] = {name: metric.to_dict() for name, metric in timing.items()}
+        return info
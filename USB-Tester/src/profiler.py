@@ -0,0 +1,139 @@
+"""Per-phase CPU and allocation profiling for USB Storage Tester"""
+
+import time
+from contextlib import contextmanager
+
+# Built-in functions that stand for each cost category in cProfile output
+PATTERN_FUNCTIONS = ('getrandbits', 'posix.urandom', 'nt.urandom', 'to_bytes', '_generate_test_pattern', 'block_data')
+HASH_FUNCTIONS = ('_hashlib.', "of '_hashlib.HASH' objects")
+SYSCALL_FUNCTIONS = ("of '_io.BufferedWriter' objects", "of '_io.BufferedReader' objects",
+                     "of '_io.BufferedRandom' objects", "of '_io.FileIO' objects",
+                     'posix.fsync', 'posix.fdatasync', 'posix.posix_fadvise', 'nt.fsync', 'io.open')
+PROGRESS_FUNCTIONS = ("of '_io.TextIOWrapper' objects",)
+
+
+def _categorize(filename, funcname):
+    """Map a pstats entry to one of the reported cost categories"""
+    if filename.endswith('progress_bar.py') or any(name in funcname for name in PROGRESS_FUNCTIONS):
+        return 'progress_rendering'
+    if any(name in funcname for name in PATTERN_FUNCTIONS) or filename.endswith('patterns.py'):
+        return 'pattern_generation'
+    if any(name in funcname for name in HASH_FUNCTIONS):
+        return 'hashing'
+    if any(name in funcname for name in SYSCALL_FUNCTIONS):
+        return 'syscalls'
+    return 'other'
+
+
+class PhaseProfiler:
+    """Wraps test phases with cProfile and tracemalloc when profiling is enabled"""
+
+    TOP_FUNCTIONS = 10
+    TOP_ALLOCATIONS = 5
+
+    def __init__(self, enabled=False, logger=None):
+        self.enabled = enabled
+        self.logger = logger
+        self.phases = []
+        self._active = False
+
+    def reset(self):
+        """Forget phases from the previous run"""
+        self.phases = []
+
+    @contextmanager
+    def phase(self, name):
+        """Profile the enclosed block as one phase, nested phases are folded into the outer one"""
+        if not self.enabled or self._active:
+            yield
+            return
+
+        import cProfile
+        import tracemalloc
+
+        self._active = True
+        started_tracing = not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        snapshot_before = tracemalloc.take_snapshot()
+        memory_before = tracemalloc.get_traced_memory()[0]
+
+        profile = cProfile.Profile()
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            wall_time = time.perf_counter() - wall_start
+            cpu_time = time.process_time() - cpu_start
+
+            current, peak = tracemalloc.get_traced_memory()
+            snapshot_after = tracemalloc.take_snapshot()
+            if started_tracing:
+                tracemalloc.stop()
+            self._active = False
+
+            result = self._summarize(name, profile, wall_time, cpu_time)
+            result['memory'] = {
+                'net_bytes': current - memory_before,
+                'peak_bytes': peak,
+                'top_allocations': [
+                    {'location': str(stat.traceback[0]), 'size_diff': stat.size_diff, 'count_diff': stat.count_diff}
+                    for stat in snapshot_after.compare_to(snapshot_before, 'lineno')[:self.TOP_ALLOCATIONS]
+                ]
+            }
+            self.phases.append(result)
+            if self.logger:
+                self.logger.info(self._format_summary(result))
+
+    def _summarize(self, name, profile, wall_time, cpu_time):
+        """CPU/wall split and per-category time from a finished profile"""
+        import pstats
+
+        stats = pstats.Stats(profile)
+        categories = {'pattern_generation': 0.0, 'hashing': 0.0, 'syscalls': 0.0, 'progress_rendering': 0.0, 'other': 0.0}
+        functions = []
+
+        direct = {key: _categorize(key[0], key[2]) for key in stats.stats}
+
+        for key, (cc, nc, tottime, cumtime, callers) in stats.stats.items():
+            filename, lineno, funcname = key
+            category = direct[key]
+            # Helpers such as generator expressions inherit the category of their caller
+            if category == 'other' and callers:
+                caller_categories = {direct.get(caller, 'other') for caller in callers}
+                if len(caller_categories) == 1:
+                    category = caller_categories.pop()
+            categories[category] += tottime
+            functions.append({
+                'function': funcname if filename == '~' else f"{filename}:{lineno}({funcname})",
+                'calls': nc,
+                'tottime': tottime,
+                'cumtime': cumtime
+            })
+
+        profiled_total = sum(categories.values()) or 1
+        functions.sort(key=lambda entry: entry['tottime'], reverse=True)
+
+        return {
+            'phase': name,
+            'wall_time_sec': wall_time,
+            'cpu_time_sec': cpu_time,
+            'cpu_utilization': cpu_time / wall_time if wall_time else 0,
+            'time_by_category_sec': categories,
+            'share_by_category': {key: value / profiled_total for key, value in categories.items()},
+            'top_functions': functions[:self.TOP_FUNCTIONS]
+        }
+
+    def _format_summary(self, result):
+        shares = ', '.join(f"{key} {value * 100:.0f}%" for key, value in result['share_by_category'].items() if value >= 0.01)
+        return (f"Profile [{result['phase']}]: wall {result['wall_time_sec']:.2f}s, cpu {result['cpu_time_sec']:.2f}s "
+                f"({result['cpu_utilization'] * 100:.0f}%), peak alloc {result['memory']['peak_bytes'] / (1024*1024):.1f} MB - {shares}")
+
+    def results(self):
+        """Profile section for reports, None when profiling is off"""
+        if not self.enabled:
+            return None
+        return {'phases': list(self.phases)}
@@ -0,0 +1,190 @@
+"""Report comparison and regression detection for USB Storage Tester"""
+
+import re
+import json
+from .config import REGRESSION_THRESHOLDS, BASELINES_DIR
+from .metrics import LatencyHistogram
+
+# (metric, path inside the JSON report, threshold kind, unit)
+# Kind decides the direction: speeds must not drop, latencies and errors must not rise.
+COMPARED_METRICS = [
+    ('sequential_write', ('tests', 'speed_test', 'sequential_write_avg'), 'speed', 'MB/s'),
+    ('sequential_read', ('tests', 'speed_test', 'sequential_read_avg'), 'speed', 'MB/s'),
+    ('random_write', ('tests', 'speed_test', 'random_write_avg'), 'speed', 'MB/s'),
+    ('random_read', ('tests', 'speed_test', 'random_read_avg'), 'speed', 'MB/s'),
+    ('access_time', ('tests', 'speed_test', 'access_time_avg'), 'latency', 'ms'),
+    ('capacity_write', ('tests', 'capacity_test', 'write_speed'), 'speed', 'MB/s'),
+    ('capacity_verify', ('tests', 'capacity_test', 'verify_speed'), 'speed', 'MB/s'),
+    ('write_latency_p99', ('dataset', 'timing', 'write_latency', 'p99_ms'), 'latency', 'ms'),
+    ('read_latency_p99', ('dataset', 'timing', 'read_latency', 'p99_ms'), 'latency', 'ms'),
+    ('soak_write', ('tests', 'soak_test', 'write_speed'), 'speed', 'MB/s'),
+    ('trace_replay_throughput', ('tests', 'trace_replay', 'total_mbps'), 'speed', 'MB/s'),
+    ('trace_replay_p99', ('tests', 'trace_replay', 'latency', 'all', 'p99_ms'), 'latency', 'ms'),
+    ('integrity_failures', ('tests', 'integrity_test', 'verification_failed'), 'errors', 'blocks'),
+    ('bad_bytes', ('tests', 'capacity_test', 'bad_block_map', 'total_bad_bytes'), 'errors', 'bytes'),
+    ('soak_bit_errors', ('tests', 'soak_test', 'total_bit_errors'), 'errors', 'bits'),
+]
+
+# Percentiles recomputed from the histogram buckets, so reports written before the
+# percentiles were interpolated compare on the same footing
+HISTOGRAM_PERCENTILES = {'p50_ms': 50, 'p99_ms': 99}
+
+
+def _lookup(report, path):
+    """Value at path, None when any part is missing"""
+    value = report
+    for key in path:
+        if not isinstance(value, dict) or value.get(key) is None:
+            return None
+        if key in HISTOGRAM_PERCENTILES and value.get('buckets'):
+            return LatencyHistogram.from_dict(value).percentile(HISTOGRAM_PERCENTILES[key]) * 1000
+        value = value[key]
+    return value if isinstance(value, (int, float)) else None
+
+
+def _baseline_name(model):
+    """File-system safe baseline name for a drive model"""
+    return re.sub(r'[^A-Za-z0-9._-]+', '_', str(model or 'Unknown')).strip('_') or 'Unknown'
+
+
+class ReportComparator:
+    """Aligns metrics of JSON reports and applies relative regression thresholds"""
+
+    def __init__(self, thresholds=None):
+        self.thresholds = dict(REGRESSION_THRESHOLDS)
+        if thresholds:
+            self.thresholds.update(thresholds)
+
+    @staticmethod
+    def load_report(report_file):
+        """Load a JSON report"""
+        with open(report_file, 'r', encoding='utf-8') as f:
+            report = json.load(f)
+        report['_source'] = str(report_file)
+        return report
+
+    @staticmethod
+    def extract_metrics(report):
+        """Comparable metrics present in a report"""
+        metrics = {}
+        for name, path, kind, unit in COMPARED_METRICS:
+            value = _lookup(report, path)
+            if value is not None:
+                metrics[name] = value
+        return metrics
+
+    def compare(self, reference, candidate):
+        """Compare a candidate report against a reference report"""
+        reference_metrics = self.extract_metrics(reference)
+        candidate_metrics = self.extract_metrics(candidate)
+        rows = []
+        missing = []
+
+        for name, path, kind, unit in COMPARED_METRICS:
+            if name not in reference_metrics:
+                continue
+            if name not in candidate_metrics:
+                missing.append(name)
+                rows.append({
+                    'metric': name,
+                    'kind': kind,
+                    'unit': unit,
+                    'reference': reference_metrics[name],
+                    'value': None,
+                    'delta': None,
+                    'delta_pct': None,
+                    'threshold': self.thresholds[kind],
+                    'status': 'MISSING'
+                })
+                continue
+            before = reference_metrics[name]
+            after = candidate_metrics[name]
+            threshold = self.thresholds[kind]
+            delta = after - before
+            delta_pct = delta / before if before else None
+
+            if kind == 'errors':
+                # Error counts are usually zero, so the allowance is absolute
+                regressed = delta > threshold
+            elif not before:
+                regressed = False
+            elif kind == 'speed':
+                regressed = delta_pct < -threshold
+            else:
+                regressed = delta_pct > threshold
+
+            rows.append({
+                'metric': name,
+                'kind': kind,
+                'unit': unit,
+                'reference': before,
+                'value': after,
+                'delta': delta,
+                'delta_pct': delta_pct,
+                'threshold': threshold,
+                'status': 'REGRESSION' if regressed else 'OK'
+            })
+
+        warnings = []
+        for label, report in (('reference', reference), ('candidate', candidate)):
+            if report.get('status') == 'partial':
+                warnings.append(f"{label} report is partial (cancelled: {report.get('cancel_reason')})")
+        if reference.get('drive_info', {}).get('model') != candidate.get('drive_info', {}).get('model'):
+            warnings.append("reports are for different drive models")
+        if missing:
+            warnings.append(f"candidate is missing {len(missing)} metric(s) of the reference: {', '.join(missing)}")
+        if len(rows) == len(missing):
+            warnings.append("no metrics in common")
+
+        regressions = [row for row in rows if row['status'] == 'REGRESSION']
+        return {
+            'reference': self._describe(reference),
+            'candidate': self._describe(candidate),
+            'metrics': rows,
+            'regressions': len(regressions),
+            'warnings': warnings,
+            'verdict': 'PASS' if len(rows) > len(missing) and not regressions else 'FAIL'
+        }
+
+    def compare_all(self, reports, reference=None):
+        """Compare every report against reference, or against the first report when none is given"""
+        if reference is None:
+            reference, reports = reports[0], reports[1:]
+        comparisons = [self.compare(reference, report) for report in reports]
+        return {
+            'thresholds': dict(self.thresholds),
+            'comparisons': comparisons,
+            'verdict': 'PASS' if comparisons and all(c['verdict'] == 'PASS' for c in comparisons) else 'FAIL'
+        }
+
+    @staticmethod
+    def baseline_file(model):
+        """Path of the stored baseline for a drive model"""
+        return BASELINES_DIR / f"{_baseline_name(model)}.json"
+
+    def load_baseline(self, model):
+        """Stored baseline report for a model, None if there is none"""
+        baseline_file = self.baseline_file(model)
+        if not baseline_file.exists():
+            return None
+        return self.load_report(baseline_file)
+
+    def save_baseline(self, report):
+        """Store a report as the baseline for its drive model"""
+        baseline_file = self.baseline_file(report.get('drive_info', {}).get('model'))
+        BASELINES_DIR.mkdir(exist_ok=True)
+        with open(baseline_file, 'w', encoding='utf-8') as f:
+            json.dump({key: value for key, value in report.items() if key != '_source'}, f, indent=2, default=str)
+        return baseline_file
+
+    @staticmethod
+    def _describe(report):
+        drive_info = report.get('drive_info', {})
+        return {
+            'source': report.get('_source'),
+            'drive': drive_info.get('label'),
+            'model': drive_info.get('model'),
+            'serial': drive_info.get('serial'),
+            'test_type': report.get('test_type'),
+            'timestamp': report.get('timestamp')
+        }
@@ -6,7 +6,8 @@ import csv
 from pathlib import Path
 from datetime import datetime
 from .logger import Logger
-from .config import LOGS_DIR, REPORTS_DIR
+from .config import LOGS_DIR, REPORTS_DIR, ensure_dir
+from .report_compare import ReportComparator
 
 class ReportManager:
     """Report generation and management"""
@@ -116,12 +117,91 @@ class ReportManager:
         except Exception as e:
             self.logger.error(f"Error reading report file: {e}")
     
+    def compare_reports(self, report_files, use_baseline=False, thresholds=None, output_file=None):
+        """Compare JSON reports against the first one or against the stored model baselines"""
+        comparator = ReportComparator(thresholds)
+        try:
+            reports = [comparator.load_report(report_file) for report_file in report_files]
+        except (OSError, json.JSONDecodeError) as e:
+            self.logger.error(f"Error reading report: {e}")
+            return None
+
+        if use_baseline:
+            comparisons = []
+            for report in reports:
+                model = report.get('drive_info', {}).get('model')
+                baseline = comparator.load_baseline(model)
+                if baseline is None:
+                    self.logger.error(f"No baseline stored for model {model}")
+                    return None
+                comparisons.extend(comparator.compare_all([report], reference=baseline)['comparisons'])
+            result = {
+                'thresholds': dict(comparator.thresholds),
+                'comparisons': comparisons,
+                'verdict': 'PASS' if all(c['verdict'] == 'PASS' for c in comparisons) else 'FAIL'
+            }
+        else:
+            if len(reports) < 2:
+                self.logger.error("At least two reports are needed for a comparison")
+                return None
+            result = comparator.compare_all(reports)
+
+        self._display_comparison(result)
+
+        if output_file:
+            with open(output_file, 'w', encoding='utf-8') as f:
+                json.dump(result, f, indent=2, default=str)
+            self.logger.info(f"Comparison written to {output_file}")
+
+        if result['verdict'] == 'PASS':
+            self.logger.success("Regression check passed")
+        else:
+            self.logger.error("Regression check failed")
+        return result
+
+    def save_baseline(self, report_file):
+        """Store a JSON report as the baseline for its drive model"""
+        comparator = ReportComparator()
+        try:
+            report = comparator.load_report(report_file)
+            baseline_file = comparator.save_baseline(report)
+        except (OSError, json.JSONDecodeError) as e:
+            self.logger.error(f"Error saving baseline: {e}")
+            return None
+        self.logger.success(f"Baseline for {report.get('drive_info', {}).get('model')} saved: {baseline_file}")
+        return baseline_file
+
+    def _display_comparison(self, result):
+        """Display metric deltas and the verdict of a report comparison"""
+        for comparison in result['comparisons']:
+            reference = comparison['reference']
+            candidate = comparison['candidate']
+            print(f"\n{'='*60}")
+            print(f"{'REPORT COMPARISON':^60}")
+            print(f"{'='*60}")
+            print(f"Reference: {Path(reference['source']).name} ({reference['model']}, {reference['timestamp']})")
+            print(f"Candidate: {Path(candidate['source']).name} ({candidate['model']}, {candidate['timestamp']})")
+            print(f"{'-'*60}")
+            print(f"{'Metric':<20}{'Reference':>14}{'Value':>14}{'Delta':>10}  Status")
+            for row in comparison['metrics']:
+                if row['value'] is None:
+                    print(f"{row['metric']:<20}{row['reference']:>14.2f}{'-':>14}{'-':>10}  {row['status']}")
+                    continue
+                delta = f"{row['delta_pct'] * 100:+.1f}%" if row['delta_pct'] is not None else f"{row['delta']:+.0f}"
+                print(f"{row['metric']:<20}{row['reference']:>14.2f}{row['value']:>14.2f}{delta:>10}  {row['status']}")
+            for warning in comparison['warnings']:
+                print(f"Warning: {warning}")
+            print(f"Verdict: {comparison['verdict']} ({comparison['regressions']} regression(s))")
+        print(f"{'='*60}")
+        print(f"Overall verdict: {result['verdict']}")
+
     def generate_comprehensive_report(self, test_results):
         """Generate comprehensive test report in multiple formats"""
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         drive_name = test_results['drive_info']['label'].replace(' ', '_')
         
         # Generate JSON report
+        ensure_dir(REPORTS_DIR)
         json_file = REPORTS_DIR / f"test_report_{drive_name}_{timestamp}.json"
         with open(json_file, 'w', encoding='utf-8') as f:
             json.dump(test_results, f, indent=2, default=str)
@@ -157,10 +237,13 @@ class ReportManager:
             f.write("-"*40 + "\n")
             f.write(f"Test Type: {test_results['test_type']}\n")
             f.write(f"Timestamp: {test_results['timestamp']}\n")
+            if test_results.get('status') == 'partial':
+                f.write(f"Status: PARTIAL (cancelled: {test_results.get('cancel_reason')})\n")
             f.write(f"Drive: {drive_info['label']}\n")
             f.write(f"Path: {drive_info['path']}\n")
             f.write(f"Size: {drive_info['size'] / (1024**3):.2f} GB\n")
             f.write(f"Model: {drive_info['model']}\n")
+            f.write(f"Firmware: {drive_info.get('firmware', 'Unknown')}\n")
             f.write(f"Serial: {drive_info['serial']}\n\n")
             
             # Speed Test Results
@@ -180,7 +263,10 @@ class ReportManager:
                 f.write("DATA INTEGRITY TEST RESULTS\n")
                 f.write("-"*40 + "\n")
                 f.write(f"Patterns Tested:      {integrity['patterns_tested']}\n")
-                f.write(f"Files Created:        {integrity['files_created']}\n")
+                if 'files_created' in integrity:
+                    f.write(f"Files Created:        {integrity['files_created']}\n")
+                else:
+                    f.write(f"Blocks Tested:        {integrity['blocks_tested']}\n")
                 f.write(f"Verification Passed:  {integrity['verification_passed']}\n")
                 f.write(f"Verification Failed:  {integrity['verification_failed']}\n")
                 if integrity['errors']:
@@ -201,8 +287,142 @@ class ReportManager:
                 f.write(f"Verify Speed:     {capacity['verify_speed']:.2f} MB/s\n")
                 if capacity['errors']:
                     f.write(f"Errors: {len(capacity['errors'])}\n")
+                bad_map = capacity.get('bad_block_map')
+                if bad_map and bad_map['regions']:
+                    f.write(f"Bad Regions: {bad_map['region_count']} ({bad_map['total_bad_bytes'] / (1024*1024):.1f} MB)\n")
+                    retest_results = capacity.get('bad_region_retest', {})
+                    retest = {r['offset']: r for r in retest_results.get('regions', [])}
+                    if retest and not retest_results.get('cache_bypassed', True):
+                        f.write("  Retest read back through the OS cache - 'transient' is unreliable\n")
+                    for region in bad_map['regions']:
+                        line = (f"  - blocks {region['first_block']}-{region['first_block'] + region['block_count'] - 1} "
+                                f"(offset {region['offset']}, {region['length']} bytes)")
+                        if region['offset'] in retest:
+                            line += f" [{retest[region['offset']]['classification']}]"
+                        f.write(line + "\n")
+                f.write("\n")
+            
+            # Retention Soak Results
+            if 'soak_test' in tests and tests['soak_test']:
+                soak = tests['soak_test']
+                f.write("RETENTION SOAK RESULTS\n")
+                f.write("-"*40 + "\n")
+                f.write(f"Dataset Size:     {soak['dataset']['blocks_written'] * soak['dataset']['block_size'] / (1024*1024):.1f} MB\n")
+                f.write(f"Write Speed:      {soak['write_speed']:.2f} MB/s\n")
+                f.write(f"Passes Completed: {soak['passes_completed']}\n")
+                f.write(f"Total Bit Errors: {soak['total_bit_errors']}\n")
+                f.write("Per Pass:\n")
+                for soak_pass in soak['passes']:
+                    f.write(f"  - pass {soak_pass['pass']} ({soak_pass['started']}): {soak_pass['read_speed']:.2f} MB/s, "
+                            f"{soak_pass['blocks_failed']} failed block(s), {soak_pass['bit_errors']} bit error(s)\n")
+                f.write("\n")
+            
+            # Sustained Write Results
+            if 'sustained_write' in tests and tests['sustained_write']:
+                sustained = tests['sustained_write']
+                throttle = sustained.get('throttle') or {}
+                f.write("SUSTAINED WRITE RESULTS\n")
+                f.write("-"*40 + "\n")
+                f.write(f"Duration:         {sustained['duration_sec'] / 60:.1f} min\n")
+                f.write(f"Data Written:     {sustained['bytes_written'] / (1024**3):.2f} GB\n")
+                f.write(f"Average Speed:    {sustained['average_mbps']:.2f} MB/s\n")
+                if throttle.get('baseline_mbps') is not None:
+                    f.write(f"Baseline Speed:   {throttle['baseline_mbps']:.2f} MB/s\n")
+                f.write(f"Temperature Sensors: drive {sustained['sensors']['device'] or 'n/a'}, host {sustained['sensors']['host'] or 'n/a'}\n")
+                f.write(f"Throttling Events: {len(throttle.get('events', []))}\n")
+                for event in throttle.get('events', []):
+                    recovery = f"recovered at {event['recovery_sec'] / 60:.1f} min" if event['recovery_sec'] is not None else "no recovery"
+                    f.write(f"  - at {event['onset_sec'] / 60:.1f} min ({event['onset_bytes'] / (1024**3):.2f} GB): "
+                            f"down to {event['min_mbps']:.2f} MB/s, {recovery} [{event['likely_cause']}]\n")
+                f.write("\n")
+            
+            # Trace Replay Results
+            if 'trace_replay' in tests and tests['trace_replay'] and 'completed' in tests['trace_replay']:
+                replay = tests['trace_replay']
+                f.write("TRACE REPLAY RESULTS\n")
+                f.write("-"*40 + "\n")
+                f.write(f"Trace:            {replay['trace']}\n")
+                f.write(f"Mode:             {replay['mode']}, {replay['workers']} worker(s)\n")
+                f.write(f"Operations:       {replay['completed']} of {replay['operations']}\n")
+                f.write(f"OS Cache:         {'bypassed' if replay['cache_bypassed'] else 'NOT bypassed, reads may come from RAM'}\n")
+                f.write(f"Duration:         {replay['elapsed_sec']:.2f} s (recorded {replay['recorded_duration_sec']:.2f} s)\n")
+                f.write(f"Throughput:       {replay['total_mbps']:.2f} MB/s, {replay['iops']:.0f} IOPS\n")
+                f.write(f"  Read:           {replay['read_mbps']:.2f} MB/s ({replay['bytes_read'] / (1024*1024):.1f} MB)\n")
+                f.write(f"  Write:          {replay['write_mbps']:.2f} MB/s ({replay['bytes_written'] / (1024*1024):.1f} MB)\n")
+                if replay['offsets_folded']:
+                    f.write(f"Offsets Folded:   trace spans {replay['trace_span'] / (1024**3):.2f} GB, "
+                            f"file {replay['file_size'] / (1024**3):.2f} GB\n")
+                for op, latency in replay['latency'].items():
+                    f.write(f"{op.capitalize() + ' Latency:':<18}p50 {latency['p50_ms']:.2f} ms, p90 {latency['p90_ms']:.2f} ms, "
+                            f"p99 {latency['p99_ms']:.2f} ms, p99.9 {latency['p999_ms']:.2f} ms ({latency['count']} ops)\n")
+                if replay['lag']:
+                    f.write(f"Schedule Lag:     p50 {replay['lag']['p50_ms']:.2f} ms, p99 {replay['lag']['p99_ms']:.2f} ms, "
+                            f"max {replay['lag']['max_ms']:.2f} ms\n")
+                    f.write(f"Late Operations:  {replay['late_ops']} (> {replay['late_threshold_ms']} ms)\n")
                 f.write("\n")
             
+            # Shared Dataset Timing
+            dataset = test_results.get('dataset')
+            if dataset and dataset.get('blocks_written'):
+                timing = dataset['timing']
+                f.write("SHARED DATASET\n")
+                f.write("-"*40 + "\n")
+                f.write(f"Blocks Written:   {dataset['blocks_written']} x {dataset['block_size'] / (1024*1024):.0f} MB (written once for all phases)\n")
+                f.write(f"Write Latency:    p50 {timing['write_latency']['p50_ms']:.2f} ms, p99 {timing['write_latency']['p99_ms']:.2f} ms\n")
+                f.write(f"Read Latency:     p50 {timing['read_latency']['p50_ms']:.2f} ms, p99 {timing['read_latency']['p99_ms']:.2f} ms\n\n")
+            
+            # Host resources
+            resources = test_results.get('resources')
+            if resources and resources['samples']:
+                summary = resources['summary']
+                disk = resources['disk'] if resources['disk_scope'] == 'device' else 'all disks (drive not matched)'
+
+                def usage(key, unit, precision=1):
+                    stats = summary.get(key)
+                    if not stats:
+                        return "n/a"
+                    return f"avg {stats['avg']:.{precision}f}{unit}, max {stats['max']:.{precision}f}{unit}"
+
+                f.write("HOST RESOURCES\n")
+                f.write("-"*40 + "\n")
+                f.write(f"Samples:          {len(resources['samples'])} every {resources['interval_sec']:g} s\n")
+                f.write(f"Tester CPU:       {usage('process_cpu_pct', '%', 0)} (of one core, {resources['cpu_count']} cores)\n")
+                f.write(f"System CPU:       {usage('system_cpu_pct', '%', 0)}\n")
+                f.write(f"I/O Wait:         {usage('iowait_pct', '%', 0)}\n")
+                f.write(f"Tester RSS:       {usage('rss_mb', ' MB')}\n")
+                f.write(f"System Memory:    {usage('system_memory_pct', '%', 0)}\n")
+                f.write(f"Disk:             {disk}\n")
+                f.write(f"  Read:           {usage('disk_read_mbps', ' MB/s', 2)}\n")
+                f.write(f"  Write:          {usage('disk_write_mbps', ' MB/s', 2)}\n")
+                f.write(f"  Busy:           {usage('disk_busy_pct', '%', 0)}\n\n")
+            
+            # Profiling
+            profile = test_results.get('profile')
+            if profile and profile['phases']:
+                f.write("PROFILE\n")
+                f.write("-"*40 + "\n")
+                for phase in profile['phases']:
+                    f.write(f"Phase: {phase['phase']}\n")
+                    f.write(f"  Wall Time:      {phase['wall_time_sec']:.2f} s\n")
+                    f.write(f"  CPU Time:       {phase['cpu_time_sec']:.2f} s ({phase['cpu_utilization'] * 100:.0f}% of wall)\n")
+                    f.write(f"  Peak Allocated: {phase['memory']['peak_bytes'] / (1024*1024):.1f} MB\n")
+                    for category, share in phase['share_by_category'].items():
+                        f.write(f"  {category + ':':<20}{phase['time_by_category_sec'][category]:.3f} s ({share * 100:.1f}%)\n")
+                    f.write("  Top Functions:\n")
+                    for entry in phase['top_functions'][:5]:
+                        f.write(f"    - {entry['function']}: {entry['tottime']:.3f} s in {entry['calls']} call(s)\n")
+                f.write("\n")
+            
+            # Partial run progress
+            status = (dataset or {}).get('verification_status')
+            if test_results.get('status') == 'partial' and status:
+                f.write("PARTIAL RUN PROGRESS\n")
+                f.write("-"*40 + "\n")
+                f.write(f"Stopped In Phase: {status['phase']}\n")
+                f.write(f"Blocks Written:   {status['blocks_written']}\n")
+                f.write(f"Blocks Verified:  {status['blocks_verified']}\n")
+                f.write(f"Blocks Failed:    {status['blocks_failed']}\n\n")
+            
             # Summary
             f.write("TEST SUMMARY\n")
             f.write("-"*40 + "\n")
@@ -220,6 +440,35 @@ class ReportManager:
                     overall_status = "FAIL"
                     issues.append("Capacity test errors detected")
             
+            if 'soak_test' in tests and tests['soak_test']:
+                if tests['soak_test']['total_bit_errors'] or any(p['blocks_failed'] for p in tests['soak_test']['passes']):
+                    overall_status = "FAIL"
+                    issues.append("Bit errors detected during retention soak")
+            
+            if 'sustained_write' in tests and tests['sustained_write']:
+                if (tests['sustained_write'].get('throttle') or {}).get('events'):
+                    issues.append("Throughput throttling detected during sustained write")
+            
+            if 'trace_replay' in tests and tests['trace_replay']:
+                replay = tests['trace_replay']
+                if replay.get('lag') and replay['late_ops'] > replay['completed'] * 0.01:
+                    issues.append(f"Drive fell behind the recorded schedule ({replay['late_ops']} late operations)")
+            
+            if test_results.get('status') == 'partial':
+                if status and status['blocks_failed']:
+                    overall_status = "FAIL"
+                    issues.append("Verification failures detected before cancellation")
+                elif overall_status == "PASS":
+                    overall_status = "INCOMPLETE"
+                issues.append("Test was cancelled before completion")
+            
+            fingerprint_warnings = drive_info.get('fingerprint_warnings', []) + (test_results.get('fingerprint') or {}).get('warnings', [])
+            for warning in fingerprint_warnings:
+                issues.append(f"Fingerprint: {warning}")
+            
+            for warning in (test_results.get('resources') or {}).get('warnings', []):
+                issues.append(f"Host: {warning}")
+            
             f.write(f"Overall Status: {overall_status}\n")
             if issues:
                 f.write("Issues Found:\n")
@@ -275,7 +524,7 @@ class ReportManager:
                 integrity = tests['integrity_test']
                 row.extend([
                     integrity['patterns_tested'],
-                    integrity['files_created'],
+                    integrity.get('files_created', ''),
                     integrity['verification_passed'],
                     integrity['verification_failed']
                 ])
@@ -301,6 +550,11 @@ class ReportManager:
             if 'capacity_test' in tests and tests['capacity_test']:
                 if tests['capacity_test']['errors']:
                     overall_status = "FAIL"
+            if 'soak_test' in tests and tests['soak_test']:
+                if any(p['blocks_failed'] for p in tests['soak_test']['passes']):
+                    overall_status = "FAIL"
+            if test_results.get('status') == 'partial' and overall_status == "PASS":
+                overall_status = "INCOMPLETE"
             
             row.append(overall_status)
             
@@ -0,0 +1,179 @@
+"""Host resource accounting during test runs for USB Storage Tester"""
+
+import time
+import threading
+from pathlib import Path
+
+
+class ResourceMonitor:
+    """Samples process/system CPU, RSS and disk counters of the drive in a background thread
+
+    Samples are kept at `interval` resolution until `max_samples` is reached,
+    then neighbouring samples are merged and the interval doubles, so a
+    multi-day soak stores as much as a short run.
+    """
+
+    def __init__(self, drive, interval=1.0, max_samples=3600, logger=None):
+        self.drive = drive
+        self.interval = interval
+        self.max_samples = max_samples
+        self.logger = logger
+        self.samples = []
+        self.disk = None
+        self._psutil = None
+        self._process = None
+        self._last = None
+        self._start_time = None
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Start sampling, does nothing when psutil is unavailable"""
+        try:
+            import psutil
+        except ImportError:
+            if self.logger:
+                self.logger.warning("psutil not available - host resources are not recorded")
+            return self
+
+        self._psutil = psutil
+        self._process = psutil.Process()
+        self.disk = self._find_disk()
+        # Prime the CPU counters, the first cpu_percent() call always returns 0
+        self._process.cpu_percent(None)
+        psutil.cpu_percent(None)
+        self._start_time = time.perf_counter()
+        self._last = (self._start_time, self._disk_counters())
+
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop sampling and return the results"""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=self.interval * 2)
+            self._thread = None
+        return self.results()
+
+    def _find_disk(self):
+        """Name of the drive in psutil's per-disk counters, None to fall back to system totals"""
+        counters = self._psutil.disk_io_counters(perdisk=True) or {}
+        device = self.drive.get('device')
+        if not device:
+            return None
+
+        name = Path(device).name
+        if name in counters:
+            return name
+        # Some platforms only count whole disks, not partitions
+        block = Path('/sys/class/block') / name
+        if (block / 'partition').exists():
+            parent = block.resolve().parent.name
+            if parent in counters:
+                return parent
+        return None
+
+    def _disk_counters(self):
+        if self.disk:
+            return (self._psutil.disk_io_counters(perdisk=True) or {}).get(self.disk)
+        return self._psutil.disk_io_counters()
+
+    def _run(self):
+        while not self._stop_event.wait(self.interval):
+            try:
+                self._sample()
+            except Exception as e:
+                if self.logger:
+                    self.logger.debug(f"Resource sample failed: {e}")
+
+    def _sample(self):
+        now = time.perf_counter()
+        counters = self._disk_counters()
+        last_time, last_counters = self._last
+        elapsed = now - last_time
+        self._last = (now, counters)
+
+        sample = {
+            't': now - self._start_time,
+            'process_cpu_pct': self._process.cpu_percent(None),
+            'system_cpu_pct': self._psutil.cpu_percent(None),
+            'iowait_pct': getattr(self._psutil.cpu_times_percent(None), 'iowait', None),
+            'rss_mb': self._process.memory_info().rss / (1024 * 1024),
+            'system_memory_pct': self._psutil.virtual_memory().percent,
+            'disk_read_mbps': None,
+            'disk_write_mbps': None,
+            'disk_busy_pct': None
+        }
+        if counters and last_counters and elapsed > 0:
+            sample['disk_read_mbps'] = (counters.read_bytes - last_counters.read_bytes) / elapsed / (1024 * 1024)
+            sample['disk_write_mbps'] = (counters.write_bytes - last_counters.write_bytes) / elapsed / (1024 * 1024)
+            if hasattr(counters, 'busy_time'):
+                sample['disk_busy_pct'] = min(100.0, (counters.busy_time - last_counters.busy_time) / (elapsed * 10))
+
+        with self._lock:
+            self.samples.append(sample)
+            if len(self.samples) > self.max_samples:
+                self.samples = [self._merge(a, b) for a, b in zip(self.samples[::2], self.samples[1::2])]
+                self.interval *= 2
+
+    @staticmethod
+    def _merge(first, second):
+        """Average two neighbouring samples, keeping the later timestamp"""
+        merged = {'t': second['t']}
+        for key in first:
+            if key == 't':
+                continue
+            values = [value for value in (first[key], second[key]) if value is not None]
+            merged[key] = sum(values) / len(values) if values else None
+        merged['rss_mb'] = max(first['rss_mb'], second['rss_mb'])
+        return merged
+
+    def results(self):
+        """Samples, summary and host-side warnings, None when nothing was sampled"""
+        with self._lock:
+            samples = list(self.samples)
+        if self._psutil is None:
+            return None
+
+        def column(key):
+            return [sample[key] for sample in samples if sample[key] is not None]
+
+        def stats(key):
+            values = column(key)
+            if not values:
+                return None
+            return {'avg': sum(values) / len(values), 'max': max(values)}
+
+        summary = {key: stats(key) for key in ('process_cpu_pct', 'system_cpu_pct', 'iowait_pct', 'rss_mb',
+                                               'system_memory_pct', 'disk_read_mbps', 'disk_write_mbps', 'disk_busy_pct')}
+        return {
+            'interval_sec': self.interval,
+            'disk': self.disk,
+            'disk_scope': 'device' if self.disk else 'system',
+            'cpu_count': self._psutil.cpu_count(),
+            'summary': summary,
+            'warnings': self._warnings(summary),
+            'samples': samples
+        }
+
+    def _warnings(self, summary):
+        """Host-side conditions that may have limited the measured drive performance"""
+        warnings = []
+        process_cpu = summary['process_cpu_pct']
+        if process_cpu and process_cpu['avg'] >= 90:
+            warnings.append(f"Tester used {process_cpu['avg']:.0f}% CPU on average - results may be CPU-bound")
+        system_cpu = summary['system_cpu_pct']
+        if system_cpu and process_cpu:
+            # Process CPU is per core, system CPU is across all cores
+            others = system_cpu['avg'] - process_cpu['avg'] / (self._psutil.cpu_count() or 1)
+            if others >= 50:
+                warnings.append(f"Other processes kept the host {others:.0f}% busy - noisy neighbours likely")
+        memory = summary['system_memory_pct']
+        if memory and memory['max'] >= 95:
+            warnings.append(f"System memory reached {memory['max']:.0f}% - page cache pressure may skew results")
+        if not self.disk:
+            warnings.append("Disk counters are system-wide, the drive could not be matched to a disk")
+        return warnings
@@ -0,0 +1,199 @@
+"""Live OpenMetrics telemetry for USB Storage Tester"""
+
+import os
+import threading
+from .metrics import LatencyHistogram
+
+OPENMETRICS_CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+
+
+class DriveTelemetry:
+    """Live counters for one drive, updated from the I/O loops
+
+    Updates are plain attribute writes so they cost nothing measurable next to
+    the I/O itself. All formatting happens on the exporter side at scrape time.
+    """
+
+    SMOOTHING = 0.2  # Weight of the newest sample in the current MB/s estimate
+
+    def __init__(self, drive):
+        self.path = drive['path']
+        self.label = drive.get('label', 'Unknown')
+        self.phase = 'idle'
+        self.bytes_written = 0
+        self.bytes_read = 0
+        self.errors = 0
+        self.current_mbps = 0.0
+        self.write_latency = LatencyHistogram()
+        self.read_latency = LatencyHistogram()
+
+    def set_phase(self, phase):
+        """Name of the test phase currently running"""
+        self.phase = phase
+
+    def record_write(self, nbytes, elapsed):
+        """Account one completed write"""
+        self.bytes_written += nbytes
+        self.write_latency.add(elapsed)
+        self._update_rate(nbytes, elapsed)
+
+    def record_read(self, nbytes, elapsed):
+        """Account one completed read"""
+        self.bytes_read += nbytes
+        self.read_latency.add(elapsed)
+        self._update_rate(nbytes, elapsed)
+
+    def record_error(self, count=1):
+        """Account verification or I/O errors"""
+        self.errors += count
+
+    def _update_rate(self, nbytes, elapsed):
+        if elapsed > 0:
+            mbps = nbytes / elapsed / (1024 * 1024)
+            self.current_mbps += self.SMOOTHING * (mbps - self.current_mbps)
+
+
+class TelemetryRegistry:
+    """All drives seen in this session, rendered as one OpenMetrics exposition"""
+
+    def __init__(self):
+        self._drives = {}
+        self._lock = threading.Lock()
+
+    def drive(self, drive):
+        """Telemetry object for a drive, created on first use"""
+        with self._lock:
+            if drive['path'] not in self._drives:
+                self._drives[drive['path']] = DriveTelemetry(drive)
+            return self._drives[drive['path']]
+
+    def render(self):
+        """Render the current values in OpenMetrics text format"""
+        with self._lock:
+            drives = list(self._drives.values())
+
+        lines = []
+
+        def family(name, metric_type, help_text, samples):
+            lines.append(f"# TYPE {name} {metric_type}")
+            lines.append(f"# HELP {name} {help_text}")
+            lines.extend(samples)
+
+        def labels(t, **extra):
+            pairs = {'drive': t.path, 'label': t.label}
+            pairs.update(extra)
+            return ','.join(f'{key}="{_escape(value)}"' for key, value in pairs.items())
+
+        family('usbtester_bytes_written', 'counter', 'Bytes written to the drive under test.',
+               [f"usbtester_bytes_written_total{{{labels(t)}}} {t.bytes_written}" for t in drives])
+        family('usbtester_bytes_read', 'counter', 'Bytes read from the drive under test.',
+               [f"usbtester_bytes_read_total{{{labels(t)}}} {t.bytes_read}" for t in drives])
+        family('usbtester_throughput_mbps', 'gauge', 'Smoothed current throughput in MB/s.',
+               [f"usbtester_throughput_mbps{{{labels(t)}}} {t.current_mbps:.3f}" for t in drives])
+        family('usbtester_errors', 'counter', 'Verification and I/O errors.',
+               [f"usbtester_errors_total{{{labels(t)}}} {t.errors}" for t in drives])
+        family('usbtester_phase', 'info', 'Test phase currently running.',
+               [f"usbtester_phase_info{{{labels(t, phase=t.phase)}}} 1" for t in drives])
+
+        histogram_samples = []
+        for t in drives:
+            for op, histogram in (('write', t.write_latency), ('read', t.read_latency)):
+                histogram_samples.extend(_histogram_samples('usbtester_io_latency_seconds', labels(t, op=op), histogram))
+        family('usbtester_io_latency_seconds', 'histogram', 'Latency of individual block I/O.', histogram_samples)
+
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value):
+    """Escape a label value for the exposition format"""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _histogram_samples(name, label_text, histogram):
+    """Cumulative bucket, count and sum samples for a LatencyHistogram"""
+    samples = []
+    running = 0
+    buckets = list(histogram.buckets)
+    for index, count in enumerate(buckets):
+        running += count
+        samples.append(f'{name}_bucket{{{label_text},le="{histogram.bucket_upper_bound(index):.6g}"}} {running}')
+    samples.append(f'{name}_bucket{{{label_text},le="+Inf"}} {running}')
+    samples.append(f"{name}_count{{{label_text}}} {running}")
+    samples.append(f"{name}_sum{{{label_text}}} {histogram.total:.6f}")
+    return samples
+
+
+class TelemetryExporter:
+    """Serves the registry over local HTTP and/or writes it to a textfile atomically"""
+
+    def __init__(self, registry, logger, http_port=None, textfile=None, interval=5):
+        self.registry = registry
+        self.logger = logger
+        self.http_port = http_port
+        self.textfile = textfile
+        self.interval = interval
+        self._server = None
+        self._stop_event = threading.Event()
+
+    def start(self):
+        """Start the configured exporters in daemon threads"""
+        if self.http_port:
+            self._start_http()
+        if self.textfile:
+            thread = threading.Thread(target=self._textfile_loop, daemon=True)
+            thread.start()
+            self.logger.info(f"Writing OpenMetrics textfile to {self.textfile}")
+
+    def stop(self):
+        """Stop exporting, writing the textfile one last time"""
+        self._stop_event.set()
+        if self._server:
+            self._server.shutdown()
+            self._server = None
+        if self.textfile:
+            self.write_textfile()
+
+    def write_textfile(self):
+        """Write the exposition next to the target and rename it into place"""
+        tmp_path = f"{self.textfile}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(self.registry.render())
+        os.replace(tmp_path, self.textfile)
+
+    def _textfile_loop(self):
+        while not self._stop_event.wait(self.interval):
+            try:
+                self.write_textfile()
+            except OSError as e:
+                self.logger.warning(f"Could not write metrics textfile: {e}")
+
+    def _start_http(self):
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        registry = self.registry
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.rstrip('/') not in ('', '/metrics'):
+                    self.send_error(404)
+                    return
+                body = registry.render().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', OPENMETRICS_CONTENT_TYPE)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # Keep scrapes out of the console
+
+        try:
+            self._server = ThreadingHTTPServer(('127.0.0.1', self.http_port), MetricsHandler)
+        except OSError as e:
+            self.logger.warning(f"Could not start metrics endpoint on port {self.http_port}: {e}")
+            return
+
+        thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        thread.start()
+        self.logger.info(f"Serving OpenMetrics at http://127.0.0.1:{self.http_port}/metrics")
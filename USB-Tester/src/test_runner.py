@@ -2,35 +2,168 @@
 
 import os
 import time
+import functools
 import threading
 import hashlib
 import random
 import shutil
+import struct
 from pathlib import Path
 from datetime import datetime
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
 from .logger import Logger
-from .config import TEMP_DIR, LOGS_DIR, DEFAULT_BLOCK_SIZE_MB, SPEED_TEST_BLOCK_SIZE_MB, SPEED_TEST_ITERATIONS, MAX_CONCURRENT_OPERATIONS, TEST_PATTERNS, DELETE_TEMP_FILES
+from .config import TEMP_DIR, LOGS_DIR, DEFAULT_BLOCK_SIZE_MB, SPEED_TEST_BLOCK_SIZE_MB, SPEED_TEST_ITERATIONS, MAX_CONCURRENT_OPERATIONS, DELETE_TEMP_FILES, BAD_REGION_RETEST_PASSES, INTEGRITY_PATTERNS, CANCEL_CHUNK_SIZE_MB, CANCEL_DEADLINE_SEC, DURABILITY_WRITE_SIZES_KB, DURABILITY_ITERATIONS, FLUSH_MIN_PLAUSIBLE_MS, FLUSH_MAX_PLAUSIBLE_MBPS, DATASET_BLOCK_SIZE_MB, SOAK_DEFAULT_PASSES, SOAK_DATASET_SIZE_MB, ALIGNMENT_PROBE_SIZE_MB, ALIGNMENT_UNITS_KB, ALIGNMENT_SAMPLES, ALIGNMENT_PENALTY_RATIO, PAGE_SIZE_MAX_KB, SUSTAINED_WRITE_DEFAULT_MIN, SUSTAINED_WINDOW_SEC, SUSTAINED_BASELINE_WINDOWS, SUSTAINED_FILE_MAX_GB, THROTTLE_DROP, RESOURCE_SAMPLE_SEC, RESOURCE_MAX_SAMPLES, TRACE_REPLAY_WORKERS, TRACE_LATE_MS, TRACE_MAX_OP_MB
 from .progress_bar import ProgressBar
 from .report_manager import ReportManager
 from .drive_detector import DriveDetector
+from .bad_block_map import BadBlockMap
+from .phase_scheduler import PhaseScheduler
+from .dataset import VerifiableDataset
+from .cancellation import CancelToken, signal_handlers
+from .metrics import LatencyHistogram, ThroughputSeries, median, percentile
+from .telemetry import TelemetryRegistry
+from .profiler import PhaseProfiler
+from .patterns import PatternGenerator
+from .fingerprints import fingerprint_key
+from .alignment_probe import AlignmentProbe, guess_unit, file_start_on_volume
+from .thermal import ThrottleDetector, find_temperature_sensors, read_temperature
+from .resource_monitor import ResourceMonitor
+from .trace_replay import TraceReplayer, load_trace
+from .uncached_read import region_digests, cached_region_digests, drop_cached
+
+def _profiled(phase_name):
+    """Profile a TestRunner method as one phase when profiling is enabled"""
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            with self.profiler.phase(phase_name):
+                return method(self, *args, **kwargs)
+        return wrapper
+    return decorator
 
 class TestRunner:
     """Test execution engine with real testing functionality"""
     
-    def __init__(self, logger=None):
+    def __init__(self, logger=None, profile=False):
         # Create logger with timestamped log file
         log_filename = f"test_session_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log"
         self.logger = logger or Logger(log_filename)
         self.current_test = None
         self.test_results = {}
-        self.stop_requested = False
+        self.cancel_token = CancelToken()
+        self.cancel_token.on_cancel(self._on_cancel)
         self.report_manager = ReportManager(self.logger)
         self.drive_detector = DriveDetector(self.logger)
+        self.telemetry = TelemetryRegistry()
+        self.profiler = PhaseProfiler(enabled=profile, logger=self.logger)
+        self.patterns = PatternGenerator()
+        self._active_telemetry = None
+        self._resource_monitor = None
+        
+        # Partial report state for cancelled runs
+        self._partial_source = None
+        self._partial_lock = threading.Lock()
+        self._partial_flushed = False
+        self._deadline_timer = None
+    
+    @property
+    def stop_requested(self):
+        """True once the current test was asked to stop"""
+        return self.cancel_token.is_set()
+    
+    @stop_requested.setter
+    def stop_requested(self, value):
+        if value:
+            self.cancel_token.cancel()
+        else:
+            self.cancel_token.reset()
+    
+    @contextmanager
+    def cancellable(self):
+        """Run a test with SIGINT/SIGTERM routed to cooperative cancellation"""
+        self.cancel_token.reset()
+        self._partial_flushed = False
+        self.profiler.reset()
+        try:
+            with signal_handlers(self.cancel_token):
+                yield self.cancel_token
+        finally:
+            if self._deadline_timer:
+                self._deadline_timer.cancel()
+                self._deadline_timer = None
+            if self._active_telemetry:
+                self._active_telemetry.set_phase('idle')
+                self._active_telemetry = None
+            self._stop_resource_monitor()
+    
+    def _telemetry(self, drive, phase):
+        """Live telemetry for a drive, switched to the given phase"""
+        metrics = self.telemetry.drive(drive)
+        metrics.set_phase(phase)
+        self._active_telemetry = metrics
+        return metrics
     
+    def _start_resource_monitor(self, drive):
+        """Sample host CPU, memory and drive I/O counters until the run's report is written"""
+        self._stop_resource_monitor()
+        self._resource_monitor = ResourceMonitor(drive, RESOURCE_SAMPLE_SEC, RESOURCE_MAX_SAMPLES, self.logger).start()
+    
+    def _stop_resource_monitor(self, all_results=None):
+        """Stop sampling and store the accounting in the run results"""
+        monitor, self._resource_monitor = self._resource_monitor, None
+        if monitor:
+            resources = monitor.stop()
+            if all_results is not None:
+                all_results['resources'] = resources
+                for warning in (resources or {}).get('warnings', []):
+                    self.logger.warning(f"Host: {warning}")
+    
+    def _on_cancel(self, reason):
+        """Start the deadline that guarantees a partial report even if I/O is stuck"""
+        self.logger.warning(f"Cancellation requested ({reason}) - finishing current chunk")
+        self._deadline_timer = threading.Timer(CANCEL_DEADLINE_SEC, self._flush_partial_on_deadline)
+        self._deadline_timer.daemon = True
+        self._deadline_timer.start()
+    
+    def _flush_partial_on_deadline(self):
+        """Deadline expired before the test loop reached a checkpoint"""
+        source = self._partial_source
+        if source and not self._partial_flushed:
+            self.logger.warning(f"Test did not stop within {CANCEL_DEADLINE_SEC}s - writing partial report from live data")
+            self._flush_partial_report(source())
+    
+    def _flush_partial_report(self, all_results):
+        """Write a report marked partial, at most once per cancelled run"""
+        with self._partial_lock:
+            if self._partial_flushed:
+                return None
+            self._partial_flushed = True
+        
+        all_results['status'] = 'partial'
+        all_results['cancel_reason'] = self.cancel_token.reason
+        monitor = self._resource_monitor
+        if monitor and 'resources' not in all_results:
+            all_results['resources'] = monitor.results()
+        report_file = self.report_manager.generate_comprehensive_report(all_results)
+        self.logger.warning(f"Partial report generated: {report_file}")
+        return report_file
+    
+    def _write_chunked(self, f, data):
+        """Write data in cancellation-sized chunks, returns the number of bytes written"""
+        view = memoryview(data)
+        chunk_size = CANCEL_CHUNK_SIZE_MB * 1024 * 1024
+        written = 0
+        while written < len(view):
+            if self.stop_requested:
+                break
+            written += f.write(view[written:written + chunk_size])
+        return written
+    
+    @_profiled('speed_test')
     def run_speed_test(self, drive):
         """Run comprehensive speed test"""
         self.logger.info(f"Starting speed test on {drive['label']} ({drive['path']})")
+        self._telemetry(drive, 'speed_test')
         
         results = {
             'sequential_write': [],
@@ -108,9 +241,11 @@ class TestRunner:
             # Cleanup
             self._cleanup_temp_file(test_file, "Speed test file")
     
+    @_profiled('integrity_test')
     def run_data_integrity_test(self, drive):
         """Run comprehensive data integrity test"""
         self.logger.info(f"Starting data integrity test on {drive['label']} ({drive['path']})")
+        self._telemetry(drive, 'integrity_test')
         
         # Write directly to USB drive for real integrity testing
         test_dir = Path(drive['path']) / f"integrity_test_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
@@ -125,7 +260,7 @@ class TestRunner:
         }
         
         try:
-            patterns = ['zeros', 'ones', 'alternating', 'random', 'incremental']
+            patterns = INTEGRITY_PATTERNS
             total_tests = len(patterns) * 3  # 3 files per pattern
             
             progress = ProgressBar(total_tests, "Data Integrity Test")
@@ -200,9 +335,11 @@ class TestRunner:
             # Cleanup
             self._cleanup_temp_directory(test_dir, "Integrity test files")
     
+    @_profiled('fast_capacity_verify')
     def run_fast_capacity_verify(self, drive):
         """Run fast capacity verification"""
         self.logger.info(f"Starting fast capacity verify on {drive['label']} ({drive['path']})")
+        metrics = self._telemetry(drive, 'capacity_write')
         
         try:
             # Get drive capacity
@@ -220,12 +357,15 @@ class TestRunner:
             
             results = {
                 'total_size_tested': test_size,
+                'test_file': str(test_file),
+                'block_size': block_size,
                 'blocks_written': 0,
                 'blocks_verified': 0,
                 'write_speed': 0,
                 'verify_speed': 0,
                 'errors': []
             }
+            bad_blocks = BadBlockMap()
             
             # Write phase
             progress = ProgressBar(blocks_to_write, "Writing Test Data")
@@ -239,8 +379,10 @@ class TestRunner:
                     if self.stop_requested:
                         break
                     
+                    block_start = time.perf_counter()
                     f.write(test_data)
                     f.flush()
+                    metrics.record_write(block_size, time.perf_counter() - block_start)
                     results['blocks_written'] += 1
                     progress.update(i + 1)
             
@@ -249,6 +391,7 @@ class TestRunner:
             results['write_speed'] = (results['blocks_written'] * block_size) / write_time / (1024 * 1024)  # MB/s
             
             # Verify phase
+            metrics.set_phase('capacity_verify')
             progress = ProgressBar(blocks_to_write, "Verifying Test Data")
             start_time = time.time()
             
@@ -257,15 +400,15 @@ class TestRunner:
                     if self.stop_requested:
                         break
                     
+                    block_start = time.perf_counter()
                     block_data = f.read(block_size)
-                    if len(block_data) == block_size:
-                        block_hash = hashlib.sha256(block_data).hexdigest()
-                        if block_hash == original_hash:
-                            results['blocks_verified'] += 1
-                        else:
-                            error_msg = f"Verification failed at block {i}"
-                            results['errors'].append(error_msg)
-                            self.logger.error(error_msg)
+                    metrics.record_read(len(block_data), time.perf_counter() - block_start)
+                    if len(block_data) == block_size and hashlib.sha256(block_data).hexdigest() == original_hash:
+                        results['blocks_verified'] += 1
+                    else:
+                        bad_blocks.add(i * block_size, block_size)
+                        metrics.record_error()
+                        self.logger.debug(f"Verification failed at block {i}")
                     
                     progress.update(i + 1)
             
@@ -273,6 +416,14 @@ class TestRunner:
             verify_time = time.time() - start_time
             results['verify_speed'] = (results['blocks_verified'] * block_size) / verify_time / (1024 * 1024)  # MB/s
             
+            # One error per coalesced bad region instead of one per block
+            results['bad_block_map'] = bad_blocks.to_dict(block_size)
+            for offset, length in bad_blocks.ranges():
+                error_msg = (f"Verification failed at blocks {offset // block_size}-{(offset + length) // block_size - 1} "
+                             f"({length / (1024*1024):.1f} MB at offset {offset})")
+                results['errors'].append(error_msg)
+                self.logger.error(error_msg)
+            
             # Display results
             self._display_capacity_results(results)
             
@@ -288,9 +439,733 @@ class TestRunner:
             if 'test_file' in locals():
                 self._cleanup_temp_file(test_file, "Capacity test file")
     
+    @_profiled('bad_region_retest')
+    def run_bad_region_retest(self, drive, capacity_results, passes=BAD_REGION_RETEST_PASSES):
+        """Re-write and re-read only the bad regions of a capacity verify whose test file is still on the drive"""
+        if not capacity_results or not capacity_results.get('bad_block_map', {}).get('regions'):
+            self.logger.warning("No bad regions recorded - run a fast capacity verify first")
+            return None
+
+        test_file = Path(capacity_results['test_file'])
+        if not test_file.exists():
+            self.logger.warning(f"Capacity test file no longer exists: {test_file}")
+            return None
+
+        bad_blocks = BadBlockMap.from_dict(capacity_results['bad_block_map'])
+        block_size = capacity_results['block_size']
+        regions = bad_blocks.ranges()
+        self.logger.info(f"Retesting {len(regions)} bad region(s) on {drive['label']} ({drive['path']}), {passes} passes each")
+        self._telemetry(drive, 'bad_region_retest')
+
+        results = {
+            'passes': passes,
+            'regions': [],
+            'transient': 0,
+            'permanent': 0,
+            'incomplete': 0,
+            'cache_bypassed': True
+        }
+
+        try:
+            progress = ProgressBar(len(regions) * passes, "Retesting Bad Regions")
+            step = 0
+
+            with open(test_file, 'r+b') as f:
+                # Regions not reached before a cancellation are listed as incomplete too
+                for offset, length in regions:
+                    failed_passes = 0
+                    completed_passes = 0
+                    for _ in range(passes):
+                        if self.stop_requested:
+                            break
+                        intact, cache_bypassed = self._retest_region(f, offset, length, block_size)
+                        completed_passes += 1
+                        if not intact:
+                            failed_passes += 1
+                        if not cache_bypassed:
+                            results['cache_bypassed'] = False
+                        step += 1
+                        progress.update(step)
+
+                    # A region cut short by cancellation proves neither
+                    if completed_passes < passes:
+                        classification = 'incomplete'
+                    else:
+                        classification = 'permanent' if failed_passes == passes else 'transient'
+                    results[classification] += 1
+                    results['regions'].append({
+                        'offset': offset,
+                        'length': length,
+                        'completed_passes': completed_passes,
+                        'failed_passes': failed_passes,
+                        'classification': classification
+                    })
+
+            progress.complete()
+
+            if not results['cache_bypassed']:
+                self.logger.warning("Read-back could not bypass the OS cache on this system - "
+                                    "'transient' regions may still be permanent")
+            capacity_results['bad_region_retest'] = results
+            self._display_retest_results(results)
+
+            self.logger.success("Bad region retest completed")
+            return results
+
+        except Exception as e:
+            self.logger.error(f"Bad region retest failed: {e}")
+            return None
+
+    def _retest_region(self, f, offset, length, block_size):
+        """Rewrite a region with fresh data and verify it, returns (intact, cache_bypassed)
+
+        Without cache bypass the read-back may come from the OS cache, so a
+        region that fails on the device can still read back intact.
+        """
+        expected = []
+
+        f.seek(offset)
+        for block_offset in range(0, length, block_size):
+            block_data = os.urandom(min(block_size, length - block_offset))
+            expected.append(hashlib.sha256(block_data).digest())
+            f.write(block_data)
+        f.flush()
+        os.fsync(f.fileno())
+
+        actual = region_digests(f.name, offset, length, block_size)
+        cache_bypassed = actual is not None
+        if not cache_bypassed:
+            actual = cached_region_digests(f, offset, length, block_size)
+        return actual == expected, cache_bypassed
+
+    @_profiled('durability')
+    def run_durability_test(self, drive):
+        """Measure fsync/fdatasync latency after small writes and check flushes are real"""
+        self.logger.info(f"Starting durability benchmark on {drive['label']} ({drive['path']})")
+        self._telemetry(drive, 'durability')
+
+        test_file = Path(drive['path']) / f"durability_test_{datetime.now().strftime('%Y%m%d_%H%M%S')}.tmp"
+        methods = [('fsync', os.fsync)]
+        if hasattr(os, 'fdatasync'):
+            methods.append(('fdatasync', os.fdatasync))
+
+        results = {
+            'iterations': DURABILITY_ITERATIONS,
+            'latency': {},
+            'sequence_check': None,
+            'warnings': []
+        }
+
+        try:
+            progress = ProgressBar(len(methods) * len(DURABILITY_WRITE_SIZES_KB) * DURABILITY_ITERATIONS, "Durability Benchmark")
+            step = 0
+            medians = {}
+
+            with open(test_file, 'wb') as f:
+                fd = f.fileno()
+                for method_name, flush in methods:
+                    results['latency'][method_name] = {}
+                    for size_kb in DURABILITY_WRITE_SIZES_KB:
+                        payload = os.urandom(size_kb * 1024)
+                        histogram = LatencyHistogram()
+                        samples = []
+
+                        for _ in range(DURABILITY_ITERATIONS):
+                            if self.stop_requested:
+                                break
+                            f.seek(0)
+                            f.write(payload)
+                            f.flush()  # Hand data to the OS, only the flush itself is timed
+
+                            start_time = time.perf_counter()
+                            flush(fd)
+                            elapsed = time.perf_counter() - start_time
+
+                            histogram.add(elapsed)
+                            samples.append(elapsed)
+                            step += 1
+                            progress.update(step)
+
+                        if samples:
+                            medians[(method_name, size_kb)] = median(samples)
+                            latency = histogram.to_dict()
+                            # Exact percentiles from the samples instead of the histogram's bucket bounds
+                            latency['p50_ms'] = medians[(method_name, size_kb)] * 1000
+                            latency['p99_ms'] = percentile(samples, 99) * 1000
+                            results['latency'][method_name][f"{size_kb}KB"] = latency
+
+            progress.complete()
+
+            results['sequence_check'] = self._check_flush_sequence(test_file)
+            results['warnings'] = self._flush_plausibility_warnings(medians)
+            if not results['sequence_check']['passed']:
+                results['warnings'].append("Sequential write-then-flush records did not read back in order")
+            results['suspicious_flush'] = bool(results['warnings'])
+
+            self._display_durability_results(results)
+
+            self.logger.success("Durability benchmark completed")
+            return results
+
+        except Exception as e:
+            self.logger.error(f"Durability benchmark failed: {e}")
+            return None
+        finally:
+            self._cleanup_temp_file(test_file, "Durability test file")
+
+    def _check_flush_sequence(self, test_file, records=64):
+        """Append numbered records with a flush after each and read them back in order"""
+        record = struct.Struct('<8sQ')
+        with open(test_file, 'wb') as f:
+            for seq in range(records):
+                if self.stop_requested:
+                    break
+                f.write(record.pack(b'USBTSEQ\x00', seq).ljust(512, b'\x00'))
+                f.flush()
+                os.fsync(f.fileno())
+
+        with open(test_file, 'rb') as f:
+            if hasattr(os, 'posix_fadvise'):
+                os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_DONTNEED)
+            data = f.read()
+
+        out_of_order = 0
+        for seq in range(len(data) // 512):
+            magic, value = record.unpack_from(data, seq * 512)
+            if magic != b'USBTSEQ\x00' or value != seq:
+                out_of_order += 1
+
+        return {
+            'records': len(data) // 512,
+            'out_of_order': out_of_order,
+            'passed': out_of_order == 0
+        }
+
+    def _flush_plausibility_warnings(self, medians):
+        """Flag flushes that complete faster than the data could have reached the device"""
+        warnings = []
+
+        for (method_name, size_kb), typical in medians.items():
+            # Even a bus running at FLUSH_MAX_PLAUSIBLE_MBPS needs this long to move the data
+            min_plausible = max(FLUSH_MIN_PLAUSIBLE_MS / 1000, size_kb / 1024 / FLUSH_MAX_PLAUSIBLE_MBPS)
+            if typical < min_plausible:
+                warnings.append(f"{method_name} after {size_kb} KB writes acknowledged in {typical * 1000:.3f} ms "
+                                f"(expected at least {min_plausible * 1000:.3f} ms)")
+
+        # A real flush has to take longer when there is much more dirty data behind it
+        for method_name in {name for name, _ in medians}:
+            sizes = sorted(size for name, size in medians if name == method_name)
+            if len(sizes) >= 2 and sizes[-1] >= sizes[0] * 64:
+                small = medians[(method_name, sizes[0])]
+                large = medians[(method_name, sizes[-1])]
+                if large <= small * 1.1:
+                    warnings.append(f"{method_name} latency does not grow with dirty data "
+                                    f"({sizes[0]} KB: {small * 1000:.3f} ms, {sizes[-1]} KB: {large * 1000:.3f} ms)")
+
+        return warnings
+
+    @_profiled('alignment')
+    def run_alignment_probe(self, drive):
+        """Guess page and erase-block size from boundary write latency and check partition alignment"""
+        self.logger.info(f"Starting alignment probe on {drive['label']} ({drive['path']})")
+        metrics = self._telemetry(drive, 'alignment')
+
+        test_file = Path(drive['path']) / f"alignment_probe_{datetime.now().strftime('%Y%m%d_%H%M%S')}.tmp"
+        probe_size = ALIGNMENT_PROBE_SIZE_MB * 1024 * 1024
+        cluster_size = self.drive_detector.get_cluster_size(drive['path']) or 4096
+        partition_offset = self.drive_detector.get_partition_offset(drive)
+        units = [size_kb * 1024 for size_kb in ALIGNMENT_UNITS_KB if size_kb * 1024 * 2 <= probe_size]
+
+        results = {
+            'cluster_size': cluster_size,
+            'partition_offset': partition_offset,
+            'file_device_offset': None,
+            'offsets': 'file-relative',
+            'probe_size': probe_size,
+            'units': [],
+            'page_size_guess': None,
+            'erase_block_guess': None,
+            'partition_alignment': None,
+            'cluster_shift': None,
+            'costs_throughput': False,
+            'warnings': []
+        }
+
+        try:
+            total, used, free = shutil.disk_usage(drive['path'])
+            if free < probe_size * 2:
+                self.logger.error("Not enough free space for the alignment probe")
+                return None
+
+            # Allocate the whole probe file first so the probe only overwrites existing blocks
+            with open(test_file, 'wb') as f:
+                self._write_chunked(f, self._generate_test_pattern('zeros', probe_size))
+                f.flush()
+                os.fsync(f.fileno())
+
+            progress = ProgressBar(len(units) + 1, "Alignment Probe")
+            with open(test_file, 'r+b') as f:
+                # Boundaries are only the drive's when the file's place on the device is known
+                file_start = file_start_on_volume(f, probe_size, cluster_size,
+                                                  self.drive_detector.get_drive_filesystem(drive['path']))
+                if file_start is not None and partition_offset is not None:
+                    results['file_device_offset'] = partition_offset + file_start
+                    results['offsets'] = 'device'
+                else:
+                    self.logger.warning("Probe file position on the device is unknown, offsets are file-relative")
+                probe = AlignmentProbe(f, probe_size, samples=ALIGNMENT_SAMPLES,
+                                       stop_check=lambda: self.stop_requested, on_sample=metrics.record_write,
+                                       base=results['file_device_offset'] or 0)
+
+                for step, unit in enumerate(units, 1):
+                    if self.stop_requested:
+                        break
+                    unit_result = probe.probe_unit(unit)
+                    if unit_result:
+                        results['units'].append(unit_result)
+                    progress.update(step)
+
+                page_size = guess_unit(results['units'], ALIGNMENT_PENALTY_RATIO, max_unit=PAGE_SIZE_MAX_KB * 1024)
+                erase_block = guess_unit(results['units'], ALIGNMENT_PENALTY_RATIO, min_unit=PAGE_SIZE_MAX_KB * 2048)
+                results['page_size_guess'] = page_size
+                results['erase_block_guess'] = erase_block
+
+                # Move cluster writes off the device grid by the partition's own misalignment, or by
+                # the classic 63-sector DOS offset when it is aligned to see what misalignment would cost
+                grid = page_size or 4096
+                shift = (partition_offset or 0) % grid or (63 * 512) % grid
+                if not self.stop_requested:
+                    results['cluster_shift'] = probe.probe_shift(cluster_size, shift)
+                progress.update(len(units) + 1)
+
+            progress.complete()
+
+            results['partition_alignment'] = self._partition_alignment(partition_offset, page_size, erase_block)
+            results['warnings'], results['costs_throughput'] = self._alignment_warnings(results)
+
+            self._display_alignment_results(results)
+
+            self.logger.success("Alignment probe completed")
+            return results
+
+        except Exception as e:
+            self.logger.error(f"Alignment probe failed: {e}")
+            return None
+        finally:
+            self._cleanup_temp_file(test_file, "Alignment probe file")
+
+    def _partition_alignment(self, partition_offset, page_size, erase_block):
+        """Which device units the partition start is aligned to, None if the offset is unknown"""
+        if partition_offset is None:
+            return None
+        return {
+            'offset': partition_offset,
+            'aligned_to_page': partition_offset % page_size == 0 if page_size else None,
+            'aligned_to_erase_block': partition_offset % erase_block == 0 if erase_block else None,
+            'aligned_to_1mib': partition_offset % (1024 * 1024) == 0
+        }
+
+    def _alignment_warnings(self, results):
+        """Explain where alignment costs throughput, returns (warnings, partition misalignment costs throughput)"""
+        warnings = []
+        costs_throughput = False
+        alignment = results['partition_alignment']
+        shift = results['cluster_shift']
+        cost = shift['cost'] if shift else 0
+
+        if alignment:
+            # Judge against the largest unit we know of, 1 MiB is the usual partitioning grid
+            unit = results['erase_block_guess'] or results['page_size_guess'] or 1024 * 1024
+            if alignment['offset'] % unit:
+                if cost >= ALIGNMENT_PENALTY_RATIO - 1:
+                    costs_throughput = True
+                    warnings.append(f"Partition starts at {alignment['offset']} bytes, not a multiple of "
+                                    f"{unit // 1024} KB: misaligned cluster writes are {cost * 100:.0f}% slower on this drive, "
+                                    f"realigning the partition would recover that throughput")
+                else:
+                    warnings.append(f"Partition starts at {alignment['offset']} bytes, not a multiple of "
+                                    f"{unit // 1024} KB, but misaligned writes cost only {cost * 100:.0f}% here")
+        elif cost >= ALIGNMENT_PENALTY_RATIO - 1:
+            warnings.append(f"Partition offset unknown; misaligned cluster writes would be {cost * 100:.0f}% slower")
+
+        if results['offsets'] != 'device':
+            warnings.append("Probe offsets are file-relative, the file's position on the device is unknown: "
+                            "page and erase-block guesses only hold if the file starts on a unit boundary")
+
+        page_size = results['page_size_guess']
+        if page_size and results['cluster_size'] < page_size:
+            warnings.append(f"Cluster size {results['cluster_size'] // 1024} KB is smaller than the "
+                            f"{page_size // 1024} KB page, small writes cause read-modify-write cycles")
+        return warnings, costs_throughput
+
+    def run_retention_soak(self, drive, passes=None, hours=None):
+        """Write a verifiable dataset once, then re-read and verify it for N passes or T hours"""
+        passes = passes or (None if hours else SOAK_DEFAULT_PASSES)
+        limit = f"{passes} passes" if passes else f"{hours:g} hours"
+        self.logger.info(f"Starting retention soak on {drive['label']} ({drive['path']}) for {limit}")
+
+        total, used, free = shutil.disk_usage(drive['path'])
+        test_size = min(free * 0.5, SOAK_DATASET_SIZE_MB * 1024 * 1024)
+        test_file = Path(drive['path']) / f"soak_test_{datetime.now().strftime('%Y%m%d_%H%M%S')}.tmp"
+        block_size = DATASET_BLOCK_SIZE_MB * 1024 * 1024
+        dataset = VerifiableDataset(test_file, test_size, block_size, INTEGRITY_PATTERNS, self._generate_test_pattern)
+
+        results = {
+            'dataset': dataset.to_dict(),
+            'pass_limit': passes,
+            'hour_limit': hours,
+            'passes_completed': 0,
+            'write_speed': 0,
+            'passes': [],
+            'total_bit_errors': 0,
+            'bad_block_map': None
+        }
+        all_results = {
+            'drive_info': drive,
+            'test_type': 'retention_soak',
+            'timestamp': datetime.now().isoformat(),
+            'status': 'complete',
+            'tests': {'soak_test': results}
+        }
+        self._partial_source = lambda: all_results
+        metrics = self._telemetry(drive, 'soak_write')
+        self._start_resource_monitor(drive)
+        # Device speeds from the per-block I/O times, pattern generation and hashing excluded
+        write_series = ThroughputSeries()
+        read_series = None
+
+        def on_write(index, nbytes, elapsed):
+            write_series.add(nbytes, elapsed)
+            metrics.record_write(nbytes, elapsed)
+            progress.update(index + 1)
+
+        def on_read(index, nbytes, elapsed, ok):
+            read_series.add(nbytes, elapsed)
+            metrics.record_read(nbytes, elapsed)
+            if not ok:
+                metrics.record_error()
+            progress.update(index + 1)
+
+        try:
+            # Single write, every pass re-reads the same data
+            progress = ProgressBar(dataset.block_count, "Writing Soak Dataset")
+            with self.profiler.phase('soak_write'):
+                flush_time = dataset.write(lambda: self.stop_requested, on_write)
+            write_time = write_series.total_time + flush_time
+            progress.complete()
+            results['dataset'] = dataset.to_dict()
+            results['write_speed'] = write_series.total_bytes / write_time / (1024 * 1024) if write_time else 0
+
+            bad_blocks = BadBlockMap()
+            metrics.set_phase('soak_verify')
+            deadline = time.time() + hours * 3600 if hours else None
+            pass_number = 0
+
+            with self.profiler.phase('soak_verify'):
+                while not self.stop_requested:
+                    if passes and pass_number >= passes:
+                        break
+                    if deadline and time.time() >= deadline:
+                        break
+                    pass_number += 1
+
+                    pass_bad_blocks = BadBlockMap()
+                    progress = ProgressBar(dataset.blocks_written, f"Soak Pass {pass_number}")
+                    started = datetime.now().isoformat()
+                    read_series = ThroughputSeries()
+                    start_time = time.perf_counter()
+                    summary = dataset.verify(lambda: self.stop_requested, on_read,
+                                             pass_bad_blocks, count_bit_errors=True)
+                    elapsed = time.perf_counter() - start_time
+                    progress.complete()
+
+                    for offset, length in pass_bad_blocks.ranges():
+                        bad_blocks.add(offset, length)
+
+                    pass_result = {
+                        'pass': pass_number,
+                        'started': started,
+                        'duration_sec': elapsed,
+                        'read_speed': read_series.average(),
+                        'blocks_verified': summary['verified'],
+                        'blocks_failed': summary['failed'],
+                        'bit_errors': summary['bit_errors']
+                    }
+                    results['passes'].append(pass_result)
+                    results['total_bit_errors'] += summary['bit_errors']
+                    results['bad_block_map'] = bad_blocks.to_dict(block_size)
+                    if not self.stop_requested:
+                        results['passes_completed'] = pass_number
+
+                    if summary['failed']:
+                        self.logger.error(f"Soak pass {pass_number}: {summary['failed']} block(s) failed, "
+                                          f"{summary['bit_errors']} bit error(s)")
+                    else:
+                        self.logger.info(f"Soak pass {pass_number}: {pass_result['read_speed']:.2f} MB/s, no errors")
+
+            self._stop_resource_monitor(all_results)
+            self._display_soak_results(results)
+            all_results['profile'] = self.profiler.results()
+
+            if self.stop_requested:
+                self._flush_partial_report(all_results)
+            else:
+                report_file = self.report_manager.generate_comprehensive_report(all_results)
+                self.logger.success(f"Soak report generated: {report_file}")
+
+            self.logger.success("Retention soak completed")
+            return results
+
+        except Exception as e:
+            self.logger.error(f"Retention soak failed: {e}")
+            return None
+        finally:
+            self._partial_source = None
+            self._stop_resource_monitor()
+            self._cleanup_temp_file(test_file, "Soak test file")
+
+    @_profiled('sustained_write')
+    def run_sustained_write(self, drive, minutes=None):
+        """Stream writes for a fixed time, tracking rolling throughput, throttling and temperature"""
+        minutes = minutes or SUSTAINED_WRITE_DEFAULT_MIN
+        self.logger.info(f"Starting sustained write on {drive['label']} ({drive['path']}) for {minutes:g} minutes")
+
+        total, used, free = shutil.disk_usage(drive['path'])
+        chunk_size = CANCEL_CHUNK_SIZE_MB * 1024 * 1024
+        # The file is rewritten from the start once full, so the run length does not depend on free space
+        file_size = int(min(free * 0.5, SUSTAINED_FILE_MAX_GB * 1024**3)) // chunk_size * chunk_size
+        test_file = Path(drive['path']) / f"sustained_write_{datetime.now().strftime('%Y%m%d_%H%M%S')}.tmp"
+        sensors = find_temperature_sensors(drive)
+        detector = ThrottleDetector(SUSTAINED_BASELINE_WINDOWS, THROTTLE_DROP)
+
+        results = {
+            'duration_limit_sec': minutes * 60,
+            'duration_sec': 0,
+            'file_size': file_size,
+            'bytes_written': 0,
+            'average_mbps': 0,
+            'window_sec': SUSTAINED_WINDOW_SEC,
+            'sensors': {name: str(path) if path else None for name, path in sensors.items()},
+            'windows': [],
+            'throttle': None
+        }
+        all_results = {
+            'drive_info': drive,
+            'test_type': 'sustained_write',
+            'timestamp': datetime.now().isoformat(),
+            'status': 'complete',
+            'tests': {'sustained_write': results}
+        }
+        self._partial_source = lambda: all_results
+        metrics = self._telemetry(drive, 'sustained_write')
+
+        if file_size < chunk_size:
+            self.logger.error("Not enough free space for the sustained write test")
+            self._partial_source = None
+            return None
+
+        self._start_resource_monitor(drive)
+        try:
+            # A few distinct random chunks keep compressing controllers honest without regenerating data
+            chunks = [os.urandom(chunk_size) for _ in range(4)]
+            progress = ProgressBar(int(minutes * 60), "Sustained Write")
+            offset = 0
+            window_bytes = 0
+            start_time = window_start = time.perf_counter()
+
+            with open(test_file, 'wb') as f:
+                while not self.stop_requested:
+                    now = time.perf_counter()
+                    if now - start_time >= minutes * 60:
+                        break
+                    if offset >= file_size:
+                        f.seek(0)
+                        offset = 0
+
+                    write_start = time.perf_counter()
+                    f.write(chunks[(offset // chunk_size) % len(chunks)])
+                    f.flush()
+                    os.fsync(f.fileno())
+                    elapsed = time.perf_counter() - write_start
+
+                    offset += chunk_size
+                    window_bytes += chunk_size
+                    results['bytes_written'] += chunk_size
+                    metrics.record_write(chunk_size, elapsed)
+
+                    now = time.perf_counter()
+                    if now - window_start >= SUSTAINED_WINDOW_SEC:
+                        window = {
+                            't': now - start_time,
+                            'mbps': window_bytes / (now - window_start) / (1024 * 1024),
+                            'device_c': read_temperature(sensors['device']),
+                            'host_c': read_temperature(sensors['host'])
+                        }
+                        results['windows'].append(window)
+                        was_throttled = detector.throttled
+                        detector.add(window['t'], window['mbps'], results['bytes_written'],
+                                     window['device_c'] if window['device_c'] is not None else window['host_c'])
+                        if detector.throttled and not was_throttled:
+                            self.logger.warning(f"Throttling after {window['t'] / 60:.1f} min: "
+                                                f"{window['mbps']:.2f} MB/s vs. baseline {detector.baseline:.2f} MB/s")
+                        elif was_throttled and not detector.throttled:
+                            self.logger.info(f"Throughput recovered after {window['t'] / 60:.1f} min")
+                        window_bytes = 0
+                        window_start = now
+                        progress.update(min(int(window['t']), int(minutes * 60)))
+
+            progress.complete()
+            results['duration_sec'] = time.perf_counter() - start_time
+            results['average_mbps'] = results['bytes_written'] / results['duration_sec'] / (1024 * 1024) if results['duration_sec'] else 0
+            results['throttle'] = detector.to_dict()
+            for event in results['throttle']['events']:
+                event['likely_cause'] = self._throttle_cause(event, results['windows'])
+
+            self._stop_resource_monitor(all_results)
+            self._display_sustained_results(results)
+            all_results['profile'] = self.profiler.results()
+
+            if self.stop_requested:
+                self._flush_partial_report(all_results)
+            else:
+                report_file = self.report_manager.generate_comprehensive_report(all_results)
+                self.logger.success(f"Sustained write report generated: {report_file}")
+
+            self.logger.success("Sustained write test completed")
+            return results
+
+        except Exception as e:
+            self.logger.error(f"Sustained write test failed: {e}")
+            return None
+        finally:
+            self._partial_source = None
+            self._stop_resource_monitor()
+            self._cleanup_temp_file(test_file, "Sustained write file")
+
+    def _throttle_cause(self, event, windows):
+        """Best guess whether a slowdown is thermal or an exhausted write cache"""
+        temperatures = [w['device_c'] if w['device_c'] is not None else w['host_c'] for w in windows]
+        temperatures = [t for t in temperatures if t is not None]
+        if event['recovery_sec'] is not None:
+            return 'thermal'  # Caches do not refill while writing continues
+        if temperatures and event['onset_temperature_c'] is not None and event['onset_temperature_c'] - temperatures[0] >= 5:
+            return 'thermal'
+        return 'thermal or write cache exhausted'
+
+    def run_trace_replay(self, drive, trace_path, timed=False, workers=None):
+        """Replay a recorded I/O trace as fast as possible or at its recorded timing"""
+        workers = workers or TRACE_REPLAY_WORKERS
+        mode = 'timed' if timed else 'asap'
+        self.logger.info(f"Starting trace replay of {trace_path} on {drive['label']} ({drive['path']}), "
+                         f"{mode}, {workers} worker(s)")
+
+        try:
+            ops = load_trace(trace_path)
+        except (OSError, ValueError) as e:
+            self.logger.error(f"Could not load trace: {e}")
+            return None
+
+        largest = max(op.size for op in ops)
+        if largest > TRACE_MAX_OP_MB * 1024 * 1024:
+            self.logger.error(f"Trace contains a {largest / (1024 * 1024):.0f} MB operation, "
+                              f"the limit is {TRACE_MAX_OP_MB} MB")
+            return None
+
+        chunk_size = CANCEL_CHUNK_SIZE_MB * 1024 * 1024
+        span = max(op.offset + op.size for op in ops)
+        total, used, free = shutil.disk_usage(drive['path'])
+        # Whole chunks, at least one operation long; offsets beyond it are folded into the file
+        file_size = -(-min(span, int(free * 0.5)) // chunk_size) * chunk_size
+        file_size = max(file_size, -(-largest // chunk_size) * chunk_size, chunk_size)
+        if file_size > free:
+            self.logger.error("Not enough free space for the trace replay file")
+            return None
+        if file_size < span:
+            self.logger.warning(f"Trace spans {span / (1024**3):.2f} GB, offsets are folded into "
+                                f"{file_size / (1024**3):.2f} GB")
+
+        test_file = Path(drive['path']) / f"trace_replay_{datetime.now().strftime('%Y%m%d_%H%M%S')}.tmp"
+        results = {
+            'trace': str(trace_path),
+            'file_size': file_size,
+            'trace_span': span,
+            'offsets_folded': file_size < span
+        }
+        all_results = {
+            'drive_info': drive,
+            'test_type': 'trace_replay',
+            'timestamp': datetime.now().isoformat(),
+            'status': 'complete',
+            'tests': {'trace_replay': results}
+        }
+        metrics = self._telemetry(drive, 'trace_prepare')
+
+        try:
+            # Allocate the file with real data so replayed reads hit written blocks
+            chunk = self._generate_test_pattern('address_in_data', chunk_size)
+            progress = ProgressBar(file_size // chunk_size, "Preparing Trace File")
+            with self.profiler.phase('trace_prepare'), open(test_file, 'wb') as f:
+                for index in range(file_size // chunk_size):
+                    if self.stop_requested:
+                        return None
+                    f.write(chunk)
+                    progress.update(index + 1)
+                f.flush()
+                os.fsync(f.fileno())
+            progress.complete()
+            # Otherwise replayed reads of the freshly written file come from RAM
+            results['cache_bypassed'] = drop_cached(test_file)
+            if not results['cache_bypassed']:
+                self.logger.warning("Could not evict the trace file from the OS cache, reads may be served from RAM")
+
+            replayer = TraceReplayer(test_file, file_size, ops, self._generate_test_pattern('address_in_data', largest),
+                                     workers=workers, timed=timed, late_ms=TRACE_LATE_MS,
+                                     stop_check=lambda: self.stop_requested, on_op=self._trace_op_recorder(metrics))
+            self._partial_source = lambda: dict(all_results, tests={'trace_replay': {**results, **replayer.results()}})
+            metrics.set_phase('trace_replay')
+            self._start_resource_monitor(drive)
+
+            progress = ProgressBar(len(ops), "Replaying Trace")
+            with self.profiler.phase('trace_replay'):
+                results.update(replayer.run(on_progress=progress.update))
+            progress.complete()
+
+            self._stop_resource_monitor(all_results)
+            self._display_trace_replay_results(results)
+            all_results['profile'] = self.profiler.results()
+
+            if self.stop_requested:
+                self._flush_partial_report(all_results)
+            else:
+                report_file = self.report_manager.generate_comprehensive_report(all_results)
+                self.logger.success(f"Trace replay report generated: {report_file}")
+
+            self.logger.success("Trace replay completed")
+            return results
+
+        except Exception as e:
+            self.logger.error(f"Trace replay failed: {e}")
+            return None
+        finally:
+            self._partial_source = None
+            self._stop_resource_monitor()
+            self._cleanup_temp_file(test_file, "Trace replay file")
+
+    @staticmethod
+    def _trace_op_recorder(metrics):
+        """Feed replayed operations into live telemetry"""
+        def record(op, nbytes, elapsed):
+            if op == 'read':
+                metrics.record_read(nbytes, elapsed)
+            elif op == 'write':
+                metrics.record_write(nbytes, elapsed)
+        return record
+
+    @_profiled('full_capacity_test')
     def run_full_capacity_test(self, drive):
         """Run full capacity test"""
         self.logger.info(f"Starting full capacity test on {drive['label']} ({drive['path']})")
+        metrics = self._telemetry(drive, 'full_capacity_write')
         
         try:
             # Get available space
@@ -326,8 +1201,11 @@ class TestRunner:
                     
                     # Generate unique data for each block
                     test_data = os.urandom(block_size)
-                    f.write(test_data)
+                    block_start = time.perf_counter()
+                    if self._write_chunked(f, test_data) < block_size:
+                        break
                     f.flush()
+                    metrics.record_write(block_size, time.perf_counter() - block_start)
                     results['blocks_written'] += 1
                     
                     progress.update(i + 1, f"Block {i+1}/{blocks_to_write}")
@@ -354,75 +1232,44 @@ class TestRunner:
     def run_comprehensive_test_fast(self, drive):
         """Run comprehensive test (fast)"""
         self.logger.info(f"Starting comprehensive test (fast) on {drive['label']} ({drive['path']})")
-        
-        all_results = {
-            'drive_info': drive,
-            'test_type': 'comprehensive_fast',
-            'timestamp': datetime.now().isoformat(),
-            'tests': {}
-        }
-        
-        # Initialize results variables
-        speed_results = None
-        integrity_results = None
-        capacity_results = None
-        
-        # Run all tests
-        self.logger.info("=== PHASE 1: SPEED TEST ===")
-        speed_results = self.run_speed_test(drive)
-        all_results['tests']['speed_test'] = speed_results
-        
-        if not self.stop_requested and speed_results:
-            self.logger.info("=== PHASE 2: DATA INTEGRITY TEST ===")
-            integrity_results = self.run_data_integrity_test(drive)
-            all_results['tests']['integrity_test'] = integrity_results
-        
-        if not self.stop_requested and integrity_results:
-            self.logger.info("=== PHASE 3: CAPACITY VERIFICATION ===")
-            capacity_results = self.run_fast_capacity_verify(drive)
-            all_results['tests']['capacity_test'] = capacity_results
-        
-        # Generate comprehensive report
-        if not self.stop_requested:
-            report_file = self.report_manager.generate_comprehensive_report(all_results)
-            self.logger.success(f"Comprehensive report generated: {report_file}")
-            
-            # Format drive to restore initial state after comprehensive test
-            self._format_drive_after_test(drive)
-        
+        all_results = self._run_comprehensive_test(drive, 'comprehensive_fast', 'fast')
         self.logger.success("Comprehensive test (fast) completed")
         return all_results
     
     def run_comprehensive_test_detailed(self, drive):
         """Run comprehensive test (detailed)"""
         self.logger.info(f"Starting comprehensive test (detailed) on {drive['label']} ({drive['path']})")
-        
+        all_results = self._run_comprehensive_test(drive, 'comprehensive_detailed', 'full')
+        self.logger.success("Comprehensive test (detailed) completed")
+        return all_results
+    
+    def _run_comprehensive_test(self, drive, test_type, capacity_mode):
+        """Run all phases on a single shared dataset write and generate the report"""
         all_results = {
             'drive_info': drive,
-            'test_type': 'comprehensive_detailed',
+            'test_type': test_type,
             'timestamp': datetime.now().isoformat(),
+            'status': 'complete',
             'tests': {}
         }
         
-        # Initialize results variables
-        speed_results = None
-        integrity_results = None
-        capacity_results = None
-        
-        # Run all tests
-        self.logger.info("=== PHASE 1: SPEED TEST ===")
-        speed_results = self.run_speed_test(drive)
-        all_results['tests']['speed_test'] = speed_results
-        
-        if not self.stop_requested and speed_results:
-            self.logger.info("=== PHASE 2: DATA INTEGRITY TEST ===")
-            integrity_results = self.run_data_integrity_test(drive)
-            all_results['tests']['integrity_test'] = integrity_results
+        # Speed, integrity and capacity all reuse one written dataset
+        scheduler = PhaseScheduler(self)
+        self._partial_source = lambda: self._partial_results(all_results, scheduler)
+        self._start_resource_monitor(drive)
+        try:
+            tests, dataset_info = scheduler.run(drive, capacity_mode)
+        finally:
+            self._partial_source = None
+            self._stop_resource_monitor(all_results)
+        all_results['tests'] = tests
+        all_results['dataset'] = dataset_info
+        all_results['profile'] = self.profiler.results()
         
-        if not self.stop_requested and integrity_results:
-            self.logger.info("=== PHASE 3: FULL CAPACITY TEST ===")
-            capacity_results = self.run_full_capacity_test(drive)
-            all_results['tests']['capacity_test'] = capacity_results
+        if self.stop_requested:
+            self._flush_partial_report(self._partial_results(all_results, scheduler))
+        else:
+            all_results['fingerprint'] = self._update_fingerprint(drive, all_results)
         
         # Generate comprehensive report
         if not self.stop_requested:
@@ -432,16 +1279,31 @@ class TestRunner:
             # Format drive to restore initial state after comprehensive test
             self._format_drive_after_test(drive)
         
-        self.logger.success("Comprehensive test (detailed) completed")
         return all_results
     
+    def _update_fingerprint(self, drive, all_results):
+        """Compare a finished run with the known values for its model, then add it to the store"""
+        store = self.drive_detector.fingerprints
+        warnings = store.compare(drive, all_results)
+        for warning in warnings:
+            self.logger.warning(f"Fingerprint: {warning}")
+        store.record(drive, all_results)
+        return {'key': fingerprint_key(drive), 'warnings': warnings}
+    
+    def _partial_results(self, all_results, scheduler):
+        """Copy of the run results with everything the scheduler gathered so far"""
+        partial = dict(all_results)
+        partial['tests'], partial['dataset'] = scheduler.snapshot()
+        partial['profile'] = self.profiler.results()
+        return partial
+    
     def _test_sequential_write(self, test_file, block_size):
         """Test sequential write speed"""
         test_data = os.urandom(block_size)
         
         start_time = time.time()
         with open(test_file, 'wb') as f:
-            f.write(test_data)
+            self._write_chunked(f, test_data)
             f.flush()
             os.fsync(f.fileno())  # Force write to disk
         end_time = time.time()
@@ -468,7 +1330,7 @@ class TestRunner:
         test_data = os.urandom(file_size)
         
         with open(test_file, 'wb') as f:
-            f.write(test_data)
+            self._write_chunked(f, test_data)
         
         # Random write test
         write_times = []
@@ -529,19 +1391,8 @@ class TestRunner:
         return avg_access_time
     
     def _generate_test_pattern(self, pattern_name, size):
-        """Generate test data pattern"""
-        if pattern_name == 'zeros':
-            return b'\x00' * size
-        elif pattern_name == 'ones':
-            return b'\xFF' * size
-        elif pattern_name == 'alternating':
-            return b'\xAA' * size
-        elif pattern_name == 'random':
-            return os.urandom(size)
-        elif pattern_name == 'incremental':
-            return bytes(i % 256 for i in range(size))
-        else:
-            return os.urandom(size)
+        """Test data pattern as a read-only memoryview, unknown patterns fall back to random data"""
+        return self.patterns.get(pattern_name, size)
     
     def _display_speed_results(self, results):
         """Display speed test results"""
@@ -561,7 +1412,10 @@ class TestRunner:
         print(f"{'DATA INTEGRITY TEST RESULTS':^60}")
         print(f"{'='*60}")
         print(f"Patterns Tested:      {results['patterns_tested']}")
-        print(f"Files Created:        {results['files_created']}")
+        if 'files_created' in results:
+            print(f"Files Created:        {results['files_created']}")
+        else:
+            print(f"Blocks Tested:        {results['blocks_tested']}")
         print(f"Verification Passed:  {results['verification_passed']}")
         print(f"Verification Failed:  {results['verification_failed']}")
         if results['errors']:
@@ -582,8 +1436,147 @@ class TestRunner:
         print(f"Verify Speed:     {results['verify_speed']:.2f} MB/s")
         if results['errors']:
             print(f"Errors: {len(results['errors'])}")
+        bad_map = results.get('bad_block_map')
+        if bad_map and bad_map['regions']:
+            print(f"Bad Regions:      {bad_map['region_count']} ({bad_map['total_bad_bytes'] / (1024*1024):.1f} MB)")
+            for region in bad_map['regions'][:5]:  # Show first 5 regions
+                print(f"  - blocks {region['first_block']}-{region['first_block'] + region['block_count'] - 1}")
+        print(f"{'='*60}")
+
+    def _display_retest_results(self, results):
+        """Display bad region retest results"""
+        print(f"\n{'='*60}")
+        print(f"{'BAD REGION RETEST RESULTS':^60}")
+        print(f"{'='*60}")
+        print(f"Passes per Region: {results['passes']}")
+        print(f"Transient:         {results['transient']}")
+        print(f"Permanent:         {results['permanent']}")
+        if results['incomplete']:
+            print(f"Incomplete:        {results['incomplete']} (cancelled before all passes ran)")
+        if not results.get('cache_bypassed', True):
+            print(f"Note:              read back through the OS cache, 'transient' is unreliable")
+        for region in results['regions'][:5]:  # Show first 5 regions
+            print(f"  - offset {region['offset']} ({region['length'] / (1024*1024):.1f} MB): "
+                  f"{region['classification']} ({region['failed_passes']}/{region['completed_passes']} failed)")
+        print(f"{'='*60}")
+
+    def _display_durability_results(self, results):
+        """Display durability benchmark results"""
+        print(f"\n{'='*60}")
+        print(f"{'DURABILITY BENCHMARK RESULTS':^60}")
+        print(f"{'='*60}")
+        for method_name, by_size in results['latency'].items():
+            for size, latency in by_size.items():
+                print(f"{method_name + ' ' + size + ':':<20} p50 {latency['p50_ms']:.3f} ms, "
+                      f"p99 {latency['p99_ms']:.3f} ms, max {latency['max_ms']:.3f} ms")
+        check = results['sequence_check']
+        print(f"Sequence Check:      {check['records']} records, {check['out_of_order']} out of order")
+        if results['warnings']:
+            print(f"Suspicious Flushes:")
+            for warning in results['warnings']:
+                print(f"  - {warning}")
+        else:
+            print(f"Flush Behaviour:     plausible")
+        print(f"{'='*60}")
+
+    def _display_alignment_results(self, results):
+        """Display alignment probe results"""
+        def size_text(size):
+            return f"{size // 1024} KB" if size else "not detected"
+
+        print(f"\n{'='*60}")
+        print(f"{'ALIGNMENT PROBE RESULTS':^60}")
+        print(f"{'='*60}")
+        print(f"Cluster Size:       {size_text(results['cluster_size'])}")
+        offset = results['partition_offset']
+        print(f"Partition Offset:   {f'{offset} bytes' if offset is not None else 'unknown'}")
+        if results['offsets'] == 'device':
+            print(f"Probe Offsets:      device (probe file at {results['file_device_offset']} bytes)")
+        else:
+            print(f"Probe Offsets:      file-relative (probe file position on the device unknown)")
+        print(f"{'Boundary':<12}{'Straddle':>12}{'Inside':>12}{'Penalty':>10}")
+        for unit in results['units']:
+            print(f"{size_text(unit['unit']):<12}{unit['straddle_ms']:>9.3f} ms{unit['inside_ms']:>9.3f} ms{unit['penalty']:>9.2f}x")
+        print(f"Page Size Guess:    {size_text(results['page_size_guess'])}")
+        print(f"Erase Block Guess:  {size_text(results['erase_block_guess'])}")
+        shift = results['cluster_shift']
+        if shift:
+            print(f"Cluster Writes:     {shift['aligned_mbps']:.2f} MB/s aligned, {shift['shifted_mbps']:.2f} MB/s "
+                  f"shifted by {shift['shift']} bytes ({shift['cost'] * 100:.0f}% cost)")
+        if results['warnings']:
+            print(f"Findings:")
+            for warning in results['warnings']:
+                print(f"  - {warning}")
+        else:
+            print(f"Alignment:          no throughput lost")
+        print(f"{'='*60}")
+
+    def _display_sustained_results(self, results):
+        """Display sustained write results"""
+        print(f"\n{'='*60}")
+        print(f"{'SUSTAINED WRITE RESULTS':^60}")
+        print(f"{'='*60}")
+        print(f"Duration:         {results['duration_sec'] / 60:.1f} min")
+        print(f"Data Written:     {results['bytes_written'] / (1024**3):.2f} GB")
+        print(f"Average Speed:    {results['average_mbps']:.2f} MB/s")
+        if results['windows']:
+            speeds = [w['mbps'] for w in results['windows']]
+            print(f"Rolling Speed:    min {min(speeds):.2f}, max {max(speeds):.2f} MB/s ({results['window_sec']}s windows)")
+        temperatures = [w['device_c'] if w['device_c'] is not None else w['host_c'] for w in results['windows']]
+        temperatures = [t for t in temperatures if t is not None]
+        if temperatures:
+            source = 'drive' if results['sensors']['device'] else 'host'
+            print(f"Temperature:      {temperatures[0]:.1f} -> {temperatures[-1]:.1f} C (max {max(temperatures):.1f} C, {source})")
+        throttle = results['throttle']
+        if throttle and throttle['baseline_mbps'] is not None:
+            print(f"Baseline Speed:   {throttle['baseline_mbps']:.2f} MB/s")
+        if throttle and throttle['events']:
+            print(f"Throttling Events:")
+            for event in throttle['events']:
+                recovery = f"recovered at {event['recovery_sec'] / 60:.1f} min" if event['recovery_sec'] is not None else "no recovery"
+                print(f"  - at {event['onset_sec'] / 60:.1f} min ({event['onset_bytes'] / (1024**3):.2f} GB): "
+                      f"down to {event['min_mbps']:.2f} MB/s, {recovery} [{event['likely_cause']}]")
+        else:
+            print(f"Throttling:       none detected")
+        print(f"{'='*60}")
+
+    def _display_trace_replay_results(self, results):
+        """Display trace replay results"""
+        print(f"\n{'='*60}")
+        print(f"{'TRACE REPLAY RESULTS':^60}")
+        print(f"{'='*60}")
+        print(f"Mode:             {results['mode']}, {results['workers']} worker(s)")
+        print(f"Operations:       {results['completed']} of {results['operations']}")
+        print(f"OS Cache:         {'bypassed' if results['cache_bypassed'] else 'NOT bypassed, reads may come from RAM'}")
+        print(f"Duration:         {results['elapsed_sec']:.2f} s (recorded {results['recorded_duration_sec']:.2f} s)")
+        print(f"Throughput:       {results['total_mbps']:.2f} MB/s, {results['iops']:.0f} IOPS "
+              f"(read {results['read_mbps']:.2f}, write {results['write_mbps']:.2f} MB/s)")
+        for op, latency in results['latency'].items():
+            print(f"{op.capitalize() + ' Latency:':<18}p50 {latency['p50_ms']:.2f} ms, p99 {latency['p99_ms']:.2f} ms, "
+                  f"p99.9 {latency['p999_ms']:.2f} ms")
+        if results['lag']:
+            print(f"Schedule Lag:     p50 {results['lag']['p50_ms']:.2f} ms, p99 {results['lag']['p99_ms']:.2f} ms, "
+                  f"max {results['lag']['max_ms']:.2f} ms")
+            print(f"Late Operations:  {results['late_ops']} (> {results['late_threshold_ms']} ms)")
         print(f"{'='*60}")
     
+    def _display_soak_results(self, results):
+        """Display retention soak results"""
+        print(f"\n{'='*60}")
+        print(f"{'RETENTION SOAK RESULTS':^60}")
+        print(f"{'='*60}")
+        print(f"Dataset Size:     {results['dataset']['blocks_written'] * results['dataset']['block_size'] / (1024*1024):.1f} MB")
+        print(f"Write Speed:      {results['write_speed']:.2f} MB/s")
+        print(f"Passes Completed: {results['passes_completed']}")
+        if results['passes']:
+            speeds = [p['read_speed'] for p in results['passes']]
+            print(f"Read Speed:       min {min(speeds):.2f}, max {max(speeds):.2f} MB/s")
+        print(f"Bit Errors:       {results['total_bit_errors']}")
+        failing = [p['pass'] for p in results['passes'] if p['blocks_failed']]
+        if failing:
+            print(f"Failing Passes:   {', '.join(str(p) for p in failing[:10])}")
+        print(f"{'='*60}")
+
     def _display_full_capacity_results(self, results):
         """Display full capacity test results"""
         print(f"\n{'='*60}")
@@ -0,0 +1,137 @@
+"""Sustained-write throttle detection and temperature sampling for USB Storage Tester"""
+
+from pathlib import Path
+from .metrics import median
+
+HWMON_DIR = Path('/sys/class/hwmon')
+BLOCK_DIR = Path('/sys/class/block')
+
+# hwmon drivers that report the host CPU/board temperature
+HOST_SENSOR_NAMES = ('coretemp', 'k10temp', 'zenpower', 'cpu_thermal', 'acpitz', 'soc_thermal')
+
+
+def _first_temp_input(hwmon):
+    """First temperature input of a hwmon directory, None if it has none"""
+    inputs = sorted(hwmon.glob('temp*_input'))
+    return inputs[0] if inputs else None
+
+
+def find_temperature_sensors(drive):
+    """hwmon temperature inputs for the drive and the host, either may be None
+
+    Drive temperatures are only exposed by some bridges and by drivers such
+    as drivetemp; most USB sticks have none, in which case only the host is
+    sampled. Nothing is available on Windows without vendor tools.
+    """
+    sensors = {'device': None, 'host': None}
+    if not HWMON_DIR.exists():
+        return sensors
+
+    device = drive.get('device')
+    if device:
+        block = BLOCK_DIR / Path(device).name
+        if block.exists():
+            disk = block.resolve()
+            if (disk / 'partition').exists():
+                disk = disk.parent
+            for hwmon in sorted((disk / 'device').glob('hwmon/hwmon*')):
+                sensors['device'] = _first_temp_input(hwmon)
+                if sensors['device']:
+                    break
+
+    for hwmon in sorted(HWMON_DIR.iterdir()):
+        try:
+            name = (hwmon / 'name').read_text().strip()
+        except OSError:
+            continue
+        if name in HOST_SENSOR_NAMES:
+            sensors['host'] = _first_temp_input(hwmon)
+            if sensors['host']:
+                break
+
+    return sensors
+
+
+def read_temperature(path):
+    """Temperature in degrees Celsius from a hwmon input, None if it cannot be read"""
+    if path is None:
+        return None
+    try:
+        return int(path.read_text().strip()) / 1000
+    except (OSError, ValueError):
+        return None
+
+
+class ThrottleDetector:
+    """Finds throttling onsets and recoveries in a rolling throughput series
+
+    The baseline is the median of the first windows after warm-up. A drive
+    is throttled once throughput stays below (1 - drop) of the baseline for
+    `confirm` windows, and recovered once it is back above (1 - drop / 2)
+    for as many windows, so noise around a single threshold is ignored.
+    """
+
+    def __init__(self, baseline_windows, drop, confirm=2):
+        self.baseline_windows = baseline_windows
+        self.drop = drop
+        self.confirm = confirm
+        self.baseline = None
+        self.events = []
+        self._warmup = []
+        self._pending = []
+        self._current = None
+
+    def add(self, t, mbps, bytes_written, temperature=None):
+        """Account one window ending t seconds into the run"""
+        if self.baseline is None:
+            self._warmup.append(mbps)
+            if len(self._warmup) >= self.baseline_windows:
+                self.baseline = median(self._warmup)
+            return
+
+        if self._current is None:
+            below = mbps < self.baseline * (1 - self.drop)
+        else:
+            below = mbps < self.baseline * (1 - self.drop / 2)
+            self._current['min_mbps'] = min(self._current['min_mbps'], mbps)
+
+        crossing = below if self._current is None else not below
+        if not crossing:
+            self._pending = []
+            return
+
+        self._pending.append((t, mbps, bytes_written, temperature))
+        if len(self._pending) < self.confirm:
+            return
+
+        onset_t, onset_mbps, onset_bytes, onset_temperature = self._pending[0]
+        self._pending = []
+        if self._current is None:
+            self._current = {
+                'onset_sec': onset_t,
+                'onset_bytes': onset_bytes,
+                'onset_temperature_c': onset_temperature,
+                'mbps_before': self.baseline,
+                'min_mbps': min(onset_mbps, mbps),
+                'recovery_sec': None,
+                'recovery_temperature_c': None
+            }
+            self.events.append(self._current)
+        else:
+            self._current['recovery_sec'] = onset_t
+            self._current['recovery_temperature_c'] = onset_temperature
+            self._current = None
+
+    @property
+    def throttled(self):
+        """True while the latest event has not recovered"""
+        return self._current is not None
+
+    def to_dict(self):
+        """Serialize the detector state for reports"""
+        return {
+            'baseline_mbps': self.baseline,
+            'drop_threshold': self.drop,
+            'events': self.events,
+            'throttled_at_end': self.throttled
+        }
@@ -0,0 +1,254 @@
+"""Recorded I/O trace loading and replay for USB Storage Tester"""
+
+import os
+import csv
+import time
+import struct
+import threading
+from collections import namedtuple
+from .metrics import LatencyHistogram
+
+# Binary traces: magic, then fixed records of op (b'R'/b'W'/b'F'), offset, size, time in seconds
+TRACE_MAGIC = b'USBTRC1\n'
+TRACE_RECORD = struct.Struct('<cQId')
+
+OP_NAMES = {
+    'r': 'read', 'read': 'read',
+    'w': 'write', 'write': 'write',
+    'f': 'flush', 'flush': 'flush', 'fsync': 'flush'
+}
+
+TraceOp = namedtuple('TraceOp', 'op offset size time')
+
+
+def load_trace(path):
+    """Operations of a binary or CSV trace, ordered by their relative time"""
+    with open(path, 'rb') as f:
+        binary = f.read(len(TRACE_MAGIC)) == TRACE_MAGIC
+    ops = _load_binary(path) if binary else _load_csv(path)
+    if not ops:
+        raise ValueError(f"{path} contains no operations")
+    # Stable sort keeps the recorded order of operations issued at the same time
+    ops.sort(key=lambda op: op.time)
+    return ops
+
+
+def _parse_op(name, line):
+    op = OP_NAMES.get(name.strip().lower())
+    if op is None:
+        raise ValueError(f"line {line}: unknown operation '{name}'")
+    return op
+
+
+def _load_csv(path):
+    """op,offset,size,time rows, an optional header and '#' comments are skipped"""
+    ops = []
+    with open(path, 'r', newline='', encoding='utf-8') as f:
+        for line, row in enumerate(csv.reader(f), 1):
+            if not row or row[0].lstrip().startswith('#'):
+                continue
+            if line == 1 and row[0].strip().lower() == 'op':
+                continue
+            if len(row) < 4:
+                raise ValueError(f"line {line}: expected op,offset,size,time")
+            op = _parse_op(row[0], line)
+            try:
+                offset, size, t = int(row[1]), int(row[2]), float(row[3])
+            except ValueError:
+                raise ValueError(f"line {line}: offset and size must be integers, time a number")
+            if offset < 0 or size < 0:
+                raise ValueError(f"line {line}: offset and size must not be negative")
+            ops.append(TraceOp(op, offset, size, t))
+    return ops
+
+
+def _load_binary(path):
+    ops = []
+    with open(path, 'rb') as f:
+        f.seek(len(TRACE_MAGIC))
+        data = f.read()
+    if len(data) % TRACE_RECORD.size:
+        raise ValueError(f"{path} is truncated")
+    for index, (op, offset, size, t) in enumerate(TRACE_RECORD.iter_unpack(data), 1):
+        ops.append(TraceOp(_parse_op(op.decode('ascii', 'replace'), index), offset, size, t))
+    return ops
+
+
+def save_binary_trace(path, ops):
+    """Write operations as a compact binary trace (21 bytes per operation)"""
+    with open(path, 'wb') as f:
+        f.write(TRACE_MAGIC)
+        for op in ops:
+            f.write(TRACE_RECORD.pack(op.op[0].upper().encode('ascii'), op.offset, op.size, op.time))
+
+
+def _latency_dict(histogram):
+    """Histogram summary with the tail percentiles a replay is judged by"""
+    result = histogram.to_dict()
+    result['p90_ms'] = histogram.percentile(90) * 1000
+    result['p999_ms'] = histogram.percentile(99.9) * 1000
+    return result
+
+
+class TraceReplayer:
+    """Replays trace operations against one pre-allocated file with a pool of workers
+
+    Workers take operations strictly in trace order, so at most `workers`
+    operations are in flight, like the queue depth of the recording
+    application. In timed mode each operation waits for its recorded time;
+    lag is how late it was issued, which grows once the drive cannot keep
+    up with the schedule. In asap mode operations are issued back to back.
+    Offsets beyond the file are folded into it, data comes from `payload`
+    so every replay writes the same bytes.
+    """
+
+    def __init__(self, test_file, file_size, ops, payload, workers=4, timed=False, late_ms=10,
+                 stop_check=None, on_op=None):
+        self.test_file = test_file
+        self.file_size = file_size
+        self.ops = ops
+        self.payload = payload
+        self.workers = workers
+        self.timed = timed
+        self.late_ms = late_ms
+        self.stop_check = stop_check
+        self.on_op = on_op
+        self.completed = 0
+        self._next = 0
+        self._lock = threading.Lock()
+        self._states = []
+        self._start = None
+        self._elapsed = None
+
+    def run(self, on_progress=None, poll_interval=0.2):
+        """Replay all operations, returns the results"""
+        self._states = [self._new_state() for _ in range(self.workers)]
+        threads = [threading.Thread(target=self._worker, args=(state,), daemon=True) for state in self._states]
+        self._start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            while thread.is_alive():
+                thread.join(poll_interval)
+                if on_progress:
+                    on_progress(self.completed)
+        self._elapsed = time.perf_counter() - self._start
+        for state in self._states:
+            if state['error']:
+                raise state['error']
+        return self.results()
+
+    @staticmethod
+    def _new_state():
+        return {
+            'latency': {op: LatencyHistogram() for op in ('read', 'write', 'flush')},
+            'lag': LatencyHistogram(),
+            'late_ops': 0,
+            'bytes_read': 0,
+            'bytes_written': 0,
+            'error': None
+        }
+
+    def _take(self):
+        """Index of the next operation to issue, None when done or stopped"""
+        if self.stop_check and self.stop_check():
+            return None
+        with self._lock:
+            index = self._next
+            if index >= len(self.ops):
+                return None
+            self._next += 1
+            return index
+
+    def _wait_until(self, scheduled):
+        """Sleep until the scheduled time, in short slices so cancellation stays responsive"""
+        while True:
+            delay = scheduled - time.perf_counter()
+            if delay <= 0:
+                return True
+            if self.stop_check and self.stop_check():
+                return False
+            time.sleep(min(delay, 0.1))
+
+    def _worker(self, state):
+        try:
+            # One handle per worker, seek + I/O on a shared handle would race
+            with open(self.test_file, 'r+b', buffering=0) as f:
+                buffer = memoryview(bytearray(max((op.size for op in self.ops if op.op == 'read'), default=0)))
+                while True:
+                    index = self._take()
+                    if index is None:
+                        break
+                    op = self.ops[index]
+                    scheduled = self._start + op.time
+                    if self.timed and not self._wait_until(scheduled):
+                        break
+
+                    offset = op.offset % self.file_size
+                    offset = min(offset, self.file_size - op.size)
+                    issued = time.perf_counter()
+                    if op.op == 'read':
+                        f.seek(offset)
+                        f.readinto(buffer[:op.size])
+                        state['bytes_read'] += op.size
+                    elif op.op == 'write':
+                        f.seek(offset)
+                        f.write(self.payload[:op.size])
+                        state['bytes_written'] += op.size
+                    else:
+                        os.fsync(f.fileno())
+                    elapsed = time.perf_counter() - issued
+
+                    state['latency'][op.op].add(elapsed)
+                    if self.timed:
+                        lag = max(0.0, issued - scheduled)
+                        state['lag'].add(lag)
+                        if lag * 1000 > self.late_ms:
+                            state['late_ops'] += 1
+                    with self._lock:
+                        self.completed += 1
+                        if self.on_op:
+                            self.on_op(op.op, op.size, elapsed)
+        except Exception as e:
+            state['error'] = e
+
+    def results(self):
+        """Throughput, latency percentiles and schedule lag of the operations replayed so far"""
+        elapsed = self._elapsed if self._elapsed is not None else time.perf_counter() - (self._start or time.perf_counter())
+        latency = {op: LatencyHistogram() for op in ('read', 'write', 'flush')}
+        combined = LatencyHistogram()
+        lag = LatencyHistogram()
+        late_ops = bytes_read = bytes_written = 0
+        for state in self._states:
+            for op, histogram in state['latency'].items():
+                latency[op].merge(histogram)
+                combined.merge(histogram)
+            lag.merge(state['lag'])
+            late_ops += state['late_ops']
+            bytes_read += state['bytes_read']
+            bytes_written += state['bytes_written']
+
+        recorded = self.ops[-1].time if self.ops else 0
+        mb = 1024 * 1024
+        results = {
+            'mode': 'timed' if self.timed else 'asap',
+            'workers': self.workers,
+            'operations': len(self.ops),
+            'completed': self.completed,
+            'recorded_duration_sec': recorded,
+            'elapsed_sec': elapsed,
+            'bytes_read': bytes_read,
+            'bytes_written': bytes_written,
+            'read_mbps': bytes_read / elapsed / mb if elapsed else 0,
+            'write_mbps': bytes_written / elapsed / mb if elapsed else 0,
+            'total_mbps': (bytes_read + bytes_written) / elapsed / mb if elapsed else 0,
+            'iops': self.completed / elapsed if elapsed else 0,
+            'latency': {op: _latency_dict(histogram) for op, histogram in latency.items() if histogram.count},
+            'lag': None,
+            'late_ops': late_ops,
+            'late_threshold_ms': self.late_ms
+        }
+        results['latency']['all'] = _latency_dict(combined)
+        if self.timed:
+            results['lag'] = _latency_dict(lag)
+        return results
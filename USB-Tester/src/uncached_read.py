@@ -0,0 +1,113 @@
+"""Reads that bypass the OS page cache for USB Storage Tester"""
+
+import os
+import hashlib
+
+# Unbuffered Windows reads must cover whole sectors; 4 KiB covers 512e and 4Kn drives
+SECTOR_ALIGNMENT = 4096
+
+
+def region_digests(path, offset, length, block_size):
+    """SHA-256 digest of every block of a region, read from the device instead of the OS cache
+
+    Returns None where the cache cannot be bypassed, the caller then reads
+    through the cache and has to treat the result as unreliable.
+    """
+    if os.name == 'nt':
+        try:
+            return _region_digests_no_buffering(path, offset, length, block_size)
+        except OSError:
+            return None
+    if hasattr(os, 'posix_fadvise'):
+        with open(path, 'rb', buffering=0) as f:
+            # Drops the clean pages of the region, the caller has flushed its writes
+            os.posix_fadvise(f.fileno(), offset, length, os.POSIX_FADV_DONTNEED)
+            return cached_region_digests(f, offset, length, block_size)
+    return None
+
+
+def drop_cached(path):
+    """Evict a flushed file from the OS cache, False where that is not possible
+
+    Windows has no call for it, but opening a handle without buffering makes
+    the cache manager flush and purge the file's cached pages.
+    """
+    if os.name == 'nt':
+        try:
+            kernel32, handle = _open_no_buffering(path)
+        except OSError:
+            return False
+        kernel32.CloseHandle(handle)
+        return True
+    if hasattr(os, 'posix_fadvise'):
+        with open(path, 'rb', buffering=0) as f:
+            os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_DONTNEED)
+        return True
+    return False
+
+
+def cached_region_digests(f, offset, length, block_size):
+    """SHA-256 digest of every block of a region, read through an open file"""
+    digests = []
+    f.seek(offset)
+    for block_offset in range(0, length, block_size):
+        digests.append(hashlib.sha256(f.read(min(block_size, length - block_offset))).digest())
+    return digests
+
+
+def _open_no_buffering(path):
+    """Windows: kernel32 and a read handle opened with FILE_FLAG_NO_BUFFERING"""
+    import ctypes
+    from ctypes import wintypes
+
+    GENERIC_READ = 0x80000000
+    FILE_SHARE_READ_WRITE = 0x1 | 0x2
+    OPEN_EXISTING = 3
+    FILE_FLAG_NO_BUFFERING = 0x20000000
+    INVALID_HANDLE_VALUE = wintypes.HANDLE(-1).value
+
+    kernel32 = ctypes.WinDLL('kernel32', use_last_error=True)
+    kernel32.CreateFileW.restype = wintypes.HANDLE
+    kernel32.CreateFileW.argtypes = [wintypes.LPCWSTR, wintypes.DWORD, wintypes.DWORD, wintypes.LPVOID,
+                                     wintypes.DWORD, wintypes.DWORD, wintypes.HANDLE]
+    kernel32.SetFilePointerEx.argtypes = [wintypes.HANDLE, ctypes.c_longlong, wintypes.LPVOID, wintypes.DWORD]
+    kernel32.ReadFile.argtypes = [wintypes.HANDLE, wintypes.LPVOID, wintypes.DWORD,
+                                  ctypes.POINTER(wintypes.DWORD), wintypes.LPVOID]
+    kernel32.CloseHandle.argtypes = [wintypes.HANDLE]
+
+    handle = kernel32.CreateFileW(str(path), GENERIC_READ, FILE_SHARE_READ_WRITE, None, OPEN_EXISTING,
+                                  FILE_FLAG_NO_BUFFERING, None)
+    if handle == INVALID_HANDLE_VALUE:
+        raise ctypes.WinError(ctypes.get_last_error())
+    return kernel32, handle
+
+
+def _region_digests_no_buffering(path, offset, length, block_size):
+    """Windows: read with FILE_FLAG_NO_BUFFERING into a page-aligned buffer"""
+    import ctypes
+    import mmap
+    from ctypes import wintypes
+
+    if offset % SECTOR_ALIGNMENT:
+        raise OSError(f"offset {offset} is not sector aligned")
+
+    kernel32, handle = _open_no_buffering(path)
+    aligned_size = -(-block_size // SECTOR_ALIGNMENT) * SECTOR_ALIGNMENT
+    buffer = mmap.mmap(-1, aligned_size)  # Page aligned, as unbuffered reads require
+    address = ctypes.c_char.from_buffer(buffer)
+    try:
+        if not kernel32.SetFilePointerEx(handle, offset, None, 0):
+            raise ctypes.WinError(ctypes.get_last_error())
+        digests = []
+        read = wintypes.DWORD()
+        for block_offset in range(0, length, block_size):
+            wanted = min(block_size, length - block_offset)
+            request = -(-wanted // SECTOR_ALIGNMENT) * SECTOR_ALIGNMENT
+            if not kernel32.ReadFile(handle, ctypes.addressof(address), request, ctypes.byref(read), None):
+                raise ctypes.WinError(ctypes.get_last_error())
+            digests.append(hashlib.sha256(buffer[:min(wanted, read.value)]).digest())
+        return digests
+    finally:
+        del address  # Release the buffer export before the mmap is closed
+        buffer.close()
+        kernel32.CloseHandle(handle)
@@ -1,6 +1,5 @@
 """Main USB Storage Tester class"""
 
-from logging import config
 import sys
 import time
 from datetime import datetime
@@ -9,26 +8,38 @@ from .menu import Menu
 from .logger import Logger
 from .test_runner import TestRunner
 from .report_manager import ReportManager
+from .config import SOAK_DEFAULT_PASSES, SUSTAINED_WRITE_DEFAULT_MIN, TRACE_REPLAY_WORKERS, METRICS_HTTP_PORT, METRICS_TEXTFILE, METRICS_TEXTFILE_INTERVAL_SEC
+from .telemetry import TelemetryExporter
 
 class USBStorageTester:
     """Main USB Storage Tester application"""
     
-    def __init__(self):
+    def __init__(self, profile=False):
         # Create main logger with session timestamp
         session_log = f"main_session_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log"
         self.logger = Logger(session_log)
         self.drive_detector = DriveDetector(self.logger)
         self.menu = Menu(self.logger)
-        self.test_runner = TestRunner(self.logger)
+        self.test_runner = TestRunner(self.logger, profile=profile)
+        if profile:
+            self.logger.info("Profiling enabled - each test phase runs under cProfile and tracemalloc")
         self.report_manager = ReportManager(self.logger)
         self.drives = []
+        self.telemetry_exporter = None
+        if METRICS_HTTP_PORT or METRICS_TEXTFILE:
+            self.telemetry_exporter = TelemetryExporter(
+                self.test_runner.telemetry, self.logger,
+                http_port=METRICS_HTTP_PORT, textfile=METRICS_TEXTFILE,
+                interval=METRICS_TEXTFILE_INTERVAL_SEC
+            )
+            self.telemetry_exporter.start()
     
     def run(self):
         """Main application loop"""
         while True:
             try:
                 self.menu.show_menu()
-                choice = self.menu.get_user_choice(10)
+                choice = self.menu.get_user_choice(15)
                 
                 if choice is None:
                     self.logger.error("Invalid input. Please enter a number.")
@@ -49,16 +60,28 @@ class USBStorageTester:
                 elif choice == 7:
                     self._run_comprehensive_test_detailed()
                 elif choice == 8:
-                    self._view_test_logs()
+                    self._run_durability_test()
                 elif choice == 9:
-                    self._view_test_reports()
+                    self._run_retention_soak()
                 elif choice == 10:
+                    self._run_alignment_probe()
+                elif choice == 11:
+                    self._run_sustained_write()
+                elif choice == 12:
+                    self._run_trace_replay()
+                elif choice == 13:
+                    self._view_test_logs()
+                elif choice == 14:
+                    self._view_test_reports()
+                elif choice == 15:
                     self.logger.info("Exiting USB Storage Tester. Goodbye!")
+                    if self.telemetry_exporter:
+                        self.telemetry_exporter.stop()
                     break
                 else:
-                    self.logger.error("Invalid choice. Please select 1-10.")
+                    self.logger.error("Invalid choice. Please select 1-15.")
                 
-                if choice != 10:
+                if choice != 15:
                     self.menu.pause()
                     
             except KeyboardInterrupt:
@@ -95,14 +118,49 @@ class USBStorageTester:
         """Run speed test only"""
         drive = self._select_drive()
         if drive:
-            self.test_runner.run_speed_test(drive)
+            with self.test_runner.cancellable():
+                self.test_runner.run_speed_test(drive)
+    
+    def _run_durability_test(self):
+        """Run fsync/fdatasync durability benchmark"""
+        drive = self._select_drive()
+        if drive:
+            with self.test_runner.cancellable():
+                self.test_runner.run_durability_test(drive)
+    
+    def _run_alignment_probe(self):
+        """Run alignment and cluster-boundary probe"""
+        drive = self._select_drive()
+        if drive:
+            with self.test_runner.cancellable():
+                self.test_runner.run_alignment_probe(drive)
+    
+    def _run_sustained_write(self):
+        """Run time-bounded sustained write with throttle detection"""
+        drive = self._select_drive()
+        if drive:
+            minutes = self.menu.get_sustained_minutes(SUSTAINED_WRITE_DEFAULT_MIN)
+            with self.test_runner.cancellable():
+                self.test_runner.run_sustained_write(drive, minutes=minutes)
+    
+    def _run_trace_replay(self):
+        """Replay a recorded application I/O trace"""
+        drive = self._select_drive()
+        if drive:
+            trace_path, timed, workers = self.menu.get_trace_replay_options(TRACE_REPLAY_WORKERS)
+            if not trace_path:
+                self.logger.warning("No trace file given")
+                return
+            with self.test_runner.cancellable():
+                self.test_runner.run_trace_replay(drive, trace_path, timed=timed, workers=workers)
     
     def _run_data_integrity_test(self):
         """Run data integrity test only"""
         drive = self._select_drive()
         if drive:
             if self.menu.confirm_destructive_test(drive, "data integrity test"):
-                result = self.test_runner.run_data_integrity_test(drive)
+                with self.test_runner.cancellable():
+                    result = self.test_runner.run_data_integrity_test(drive)
                 if result and not self.test_runner.stop_requested:
                     self.test_runner._format_drive_after_test(drive)
             else:
@@ -113,7 +171,25 @@ class USBStorageTester:
         drive = self._select_drive()
         if drive:
             if self.menu.confirm_destructive_test(drive, "fast capacity verify"):
-                result = self.test_runner.run_fast_capacity_verify(drive)
+                with self.test_runner.cancellable():
+                    result = self.test_runner.run_fast_capacity_verify(drive)
+                if result and not self.test_runner.stop_requested:
+                    region_count = result['bad_block_map']['region_count']
+                    if region_count and self.menu.confirm_bad_region_retest(region_count):
+                        with self.test_runner.cancellable():
+                            self.test_runner.run_bad_region_retest(drive, result)
+                    self.test_runner._format_drive_after_test(drive)
+            else:
+                self.logger.warning("Test cancelled - confirmation not received")
+    
+    def _run_retention_soak(self):
+        """Run repeated-read retention soak"""
+        drive = self._select_drive()
+        if drive:
+            if self.menu.confirm_destructive_test(drive, "retention soak"):
+                passes, hours = self.menu.get_soak_limits(SOAK_DEFAULT_PASSES)
+                with self.test_runner.cancellable():
+                    result = self.test_runner.run_retention_soak(drive, passes=passes, hours=hours)
                 if result and not self.test_runner.stop_requested:
                     self.test_runner._format_drive_after_test(drive)
             else:
@@ -124,7 +200,8 @@ class USBStorageTester:
         drive = self._select_drive()
         if drive:
             if self.menu.confirm_destructive_test(drive, "full capacity verify"):
-                result = self.test_runner.run_full_capacity_test(drive)
+                with self.test_runner.cancellable():
+                    result = self.test_runner.run_full_capacity_test(drive)
                 if result and not self.test_runner.stop_requested:
                     self.test_runner._format_drive_after_test(drive)
             else:
@@ -138,7 +215,8 @@ class USBStorageTester:
         drive = self.menu.show_drive_selection_menu(self.drives)
         if drive:
             if self.menu.confirm_destructive_test(drive, "comprehensive test (fast)"):
-                self.test_runner.run_comprehensive_test_fast(drive)
+                with self.test_runner.cancellable():
+                    self.test_runner.run_comprehensive_test_fast(drive)
             else:
                 self.logger.warning("Test cancelled - confirmation not received")
     
@@ -150,7 +228,8 @@ class USBStorageTester:
         drive = self.menu.show_drive_selection_menu(self.drives)
         if drive:
             if self.menu.confirm_destructive_test(drive, "comprehensive test (detailed)"):
-                self.test_runner.run_comprehensive_test_detailed(drive)
+                with self.test_runner.cancellable():
+                    self.test_runner.run_comprehensive_test_detailed(drive)
             else:
                 self.logger.warning("Test cancelled - confirmation not received")
     
@@ -161,14 +240,3 @@ class USBStorageTester:
     def _view_test_reports(self):
         """View test reports"""
         self.report_manager.view_test_reports()
-    
-    def _toggle_temp_file_cleanup(self):
-        """Toggle temp file cleanup setting"""
-        config.DELETE_TEMP_FILES = not config.DELETE_TEMP_FILES
-        status = "enabled" if config.DELETE_TEMP_FILES else "disabled"
-        self.logger.success(f"Temp file cleanup {status}")
-        
-        if config.DELETE_TEMP_FILES:
-            self.logger.warning("Temp files will be automatically deleted after tests")
-        else:
-            self.logger.info("Temp files will be preserved for analysis")
\ No newline at end of file
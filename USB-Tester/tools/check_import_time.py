@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Import-time budget check for USB Storage Tester
+
+Runs `python -X importtime` on the application modules in a fresh interpreter
+and fails when startup exceeds the budget, when a module that should load
+lazily shows up at import, or when importing creates directories.
+"""
+
+import re
+import sys
+import argparse
+import statistics
+import subprocess
+from pathlib import Path
+
+APP_DIR = Path(__file__).resolve().parent.parent
+TARGET = "src.usb_tester"
+DEFAULT_BUDGET_MS = 60
+RUNTIME_DIRS = ["usb_test_logs", "test_reports", "temp_test_files", "baselines"]
+
+# Heavy or platform modules that must only load when a feature needs them
+LAZY_MODULES = [
+    "psutil", "wmi", "win32api", "win32file", "subprocess", "logging",
+    "statistics", "cProfile", "pstats", "tracemalloc", "http.server"
+]
+
+LINE_RE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def measure():
+    """Import the target once in a fresh interpreter, returns {module: (self_us, cumulative_us)}"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {TARGET}"],
+        cwd=APP_DIR, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {TARGET} failed:\n{result.stderr}")
+
+    modules = {}
+    for line in result.stderr.splitlines():
+        match = LINE_RE.match(line)
+        if match:
+            modules[match.group(4)] = (int(match.group(1)), int(match.group(2)))
+    return modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the import-time budget of USB Storage Tester")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS,
+                        help=f"maximum median cumulative import time of {TARGET} (default {DEFAULT_BUDGET_MS})")
+    parser.add_argument("--runs", type=int, default=5, help="number of measured imports (default 5)")
+    parser.add_argument("--top", type=int, default=10, help="number of slowest modules to list (default 10)")
+    args = parser.parse_args()
+
+    existing_dirs = {name for name in RUNTIME_DIRS if (APP_DIR / name).exists()}
+    measure()  # Warm-up run so bytecode compilation is not counted
+
+    runs = [measure() for _ in range(args.runs)]
+    totals_ms = [run[TARGET][1] / 1000 for run in runs]
+    median_ms = statistics.median(totals_ms)
+    failures = []
+
+    print(f"{TARGET}: median {median_ms:.1f} ms over {args.runs} runs "
+          f"(min {min(totals_ms):.1f}, max {max(totals_ms):.1f}), budget {args.budget_ms:.0f} ms")
+    if median_ms > args.budget_ms:
+        failures.append(f"import time {median_ms:.1f} ms exceeds the {args.budget_ms:.0f} ms budget")
+
+    print(f"\nSlowest modules (self time, last run):")
+    for name, (self_us, cumulative_us) in sorted(runs[-1].items(), key=lambda item: item[1][0], reverse=True)[:args.top]:
+        print(f"  {self_us / 1000:7.2f} ms  {cumulative_us / 1000:7.2f} ms cumulative  {name}")
+
+    for name in LAZY_MODULES:
+        if name in runs[-1]:
+            failures.append(f"{name} is imported at startup but should load lazily")
+
+    for name in RUNTIME_DIRS:
+        if name not in existing_dirs and (APP_DIR / name).exists():
+            failures.append(f"importing {TARGET} created the {name}/ directory")
+
+    if failures:
+        print("\nFAIL")
+        for failure in failures:
+            print(f"  - {failure}")
+        return 1
+
+    print("\nPASS")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())